@@ -0,0 +1,29 @@
+"""add idempotency_keys locked_until column
+
+Revision ID: 4e8a2c6f0b3d
+Revises: 7c1e3a5b9d2f
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "4e8a2c6f0b3d"
+down_revision = "7c1e3a5b9d2f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keys claimed before the upgrade have no lease: they can be taken over
+    op.add_column(
+        "idempotency_keys", sa.Column("locked_until", sa.DateTime(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("idempotency_keys", "locked_until")
@@ -0,0 +1,48 @@
+"""create cache_versions table
+
+Revision ID: 5b7d3f1a2c8e
+Revises: 8e2f4b6a9c1d
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5b7d3f1a2c8e"
+down_revision = "8e2f4b6a9c1d"
+branch_labels = None
+depends_on = None
+
+OPERATIONS = ("INSERT", "UPDATE", "DELETE")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "cache_versions",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for operation in OPERATIONS:
+        op.execute(
+            f"CREATE TRIGGER users_{operation.lower()}_cache_version "
+            f"AFTER {operation} ON users BEGIN "
+            "INSERT INTO cache_versions (name, version) VALUES ('users', 1) "
+            "ON CONFLICT (name) DO UPDATE SET version = version + 1; "
+            "END"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        for operation in OPERATIONS:
+            op.execute(
+                f"DROP TRIGGER IF EXISTS users_{operation.lower()}_cache_version"
+            )
+    op.drop_table("cache_versions")
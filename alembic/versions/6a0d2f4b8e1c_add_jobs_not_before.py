@@ -0,0 +1,26 @@
+"""add jobs not_before column
+
+Revision ID: 6a0d2f4b8e1c
+Revises: 4e8a2c6f0b3d
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "6a0d2f4b8e1c"
+down_revision = "4e8a2c6f0b3d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("jobs", sa.Column("not_before", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("jobs", "not_before")
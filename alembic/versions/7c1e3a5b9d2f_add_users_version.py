@@ -0,0 +1,30 @@
+"""add users version column
+
+Revision ID: 7c1e3a5b9d2f
+Revises: 2d6f8a0c4e1b
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7c1e3a5b9d2f"
+down_revision = "2d6f8a0c4e1b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Needs SQLite 3.35+; unlike a batch operation, keeps the users triggers
+    op.drop_column("users", "version")
@@ -0,0 +1,34 @@
+"""enable incremental auto_vacuum
+
+Revision ID: 8e2f4b6a9c1d
+Revises: 3c9a1d2e7b4f
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8e2f4b6a9c1d"
+down_revision = "3c9a1d2e7b4f"
+branch_labels = None
+depends_on = None
+
+
+def set_auto_vacuum(mode: str) -> None:
+    """Change SQLite's auto_vacuum mode, which only applies after a VACUUM."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    # VACUUM cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.execute(f"PRAGMA auto_vacuum = {mode}")
+        op.execute("VACUUM")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    set_auto_vacuum("INCREMENTAL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    set_auto_vacuum("NONE")
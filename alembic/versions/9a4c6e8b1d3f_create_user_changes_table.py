@@ -0,0 +1,69 @@
+"""create user_changes table
+
+Revision ID: 9a4c6e8b1d3f
+Revises: 5b7d3f1a2c8e
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9a4c6e8b1d3f"
+down_revision = "5b7d3f1a2c8e"
+branch_labels = None
+depends_on = None
+
+# Trigger event, logged operation and the row holding the user's new state
+CHANGE_TRIGGERS = (
+    ("INSERT", "create", "NEW"),
+    ("UPDATE", "update", "NEW"),
+    ("DELETE", "delete", None),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "user_changes",
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("operation", sa.String(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column(
+            "changed_at",
+            sa.DateTime(),
+            server_default=sa.func.current_timestamp(),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("seq"),
+        sqlite_autoincrement=True,
+    )
+    op.create_index("ix_user_changes_changed_at", "user_changes", ["changed_at"])
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for event_name, operation, row in CHANGE_TRIGGERS:
+        values = (
+            f"{row}.id, {row}.name, {row}.email, {row}.created_at"
+            if row
+            else "OLD.id, NULL, NULL, NULL"
+        )
+        op.execute(
+            f"CREATE TRIGGER users_{operation}_change "
+            f"AFTER {event_name} ON users BEGIN "
+            "INSERT INTO user_changes (operation, user_id, name, email, created_at) "
+            f"VALUES ('{operation}', {values}); "
+            "END"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        for _, operation, _ in CHANGE_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS users_{operation}_change")
+    op.drop_index("ix_user_changes_changed_at", table_name="user_changes")
+    op.drop_table("user_changes")
@@ -0,0 +1,77 @@
+"""Command line entry points.
+
+Usage:
+    python -m app.cli import-users users.csv [--format csv] [--chunk-size 5000]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.schemas.user import ImportFormat
+from app.services.user_import_service import UserImportService
+
+
+def import_users(args: argparse.Namespace) -> int:
+    """Import users from a CSV/NDJSON file, printing a summary."""
+    path = Path(args.file)
+    file_format = args.format or (
+        ImportFormat.CSV if path.suffix.lower() == ".csv" else ImportFormat.NDJSON
+    )
+    db = SessionLocal()
+    try:
+        service = UserImportService(db=db, chunk_size=args.chunk_size)
+        with path.open("rb") as stream:
+            result = service.import_users(
+                stream, ImportFormat(file_format), report_dir=args.report_dir
+            )
+    finally:
+        db.close()
+
+    print(
+        f"Imported {result.imported} of {result.total_rows} rows "
+        f"({result.failed} failed)"
+    )
+    if result.error_report:
+        print(f"Error report: {result.error_report}")
+    return 0 if result.failed == 0 else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_import = commands.add_parser(
+        "import-users", help="Bulk import users from a CSV or NDJSON file"
+    )
+    parser_import.add_argument("file", help="Path of the file to import")
+    parser_import.add_argument(
+        "--format",
+        choices=[f.value for f in ImportFormat],
+        help="File format (default: guessed from the file extension)",
+    )
+    parser_import.add_argument(
+        "--chunk-size",
+        type=int,
+        default=settings.IMPORT_CHUNK_SIZE,
+        help="Rows validated and inserted per transaction",
+    )
+    parser_import.add_argument(
+        "--report-dir",
+        default=settings.IMPORT_REPORT_DIR,
+        help="Directory for the per-row error report",
+    )
+    parser_import.set_defaults(handler=import_users)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
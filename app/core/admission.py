@@ -0,0 +1,303 @@
+import asyncio
+import math
+import time
+import weakref
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import Settings
+from app.core.metrics import metrics
+from app.core.settings_provider import settings_provider
+
+# Token buckets kept per client before idle (full) ones are dropped
+MAX_TRACKED_CLIENTS = 10000
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second, up to ``burst``."""
+
+    def __init__(self, rate: float, burst: int, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Take a token, returning 0, or the seconds until one is available."""
+        self.refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Per-client token buckets."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def check(self, client: str) -> float:
+        """Admit a request of the client, returning 0, or the seconds to wait."""
+        now = time.monotonic()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            if len(self._buckets) >= MAX_TRACKED_CLIENTS:
+                self._prune(now)
+            bucket = self._buckets[client] = TokenBucket(self.rate, self.burst, now)
+        return bucket.take(now)
+
+    def _prune(self, now: float) -> None:
+        for client, bucket in list(self._buckets.items()):
+            bucket.refill(now)
+            if bucket.tokens >= bucket.burst:
+                del self._buckets[client]
+
+
+class QueueFullError(Exception):
+    """Raised when no slot is free and the wait queue is full."""
+
+
+class ConcurrencyLimiter:
+    """Cap on in-flight requests, with a bounded FIFO queue of waiters.
+
+    Waiting requests get a slot as soon as one is released. They give up
+    (``asyncio.TimeoutError``) after ``timeout`` seconds. The average queue wait
+    is tracked so new arrivals can be shed before the queue itself grows.
+    """
+
+    def __init__(self, limit: int, queue_size: int):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.in_flight = 0
+        self.average_wait = 0.0  # Exponentially weighted, in seconds
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def saturated(self) -> bool:
+        return self.in_flight >= self.limit or bool(self._waiters)
+
+    async def acquire(self, timeout: float) -> float:
+        """Take a slot, returning how long the request had to wait for it.
+
+        Raises:
+            QueueFullError: If the wait queue is full
+            asyncio.TimeoutError: If no slot got free within the timeout
+        """
+        if not self.saturated:
+            self.in_flight += 1
+            self._record_wait(0)
+            return 0
+        if len(self._waiters) >= self.queue_size:
+            raise QueueFullError()
+        start = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                self.release()  # The slot was handed over just as we gave up
+            else:
+                waiter.cancel()
+            self._record_wait(time.monotonic() - start)
+            raise
+        waited = time.monotonic() - start
+        self._record_wait(waited)
+        return waited
+
+    def resize(self, limit: int, queue_size: int) -> None:
+        """Change the limits; waiters get the new slots as requests finish."""
+        self.limit = limit
+        self.queue_size = queue_size
+
+    def release(self) -> None:
+        """Free a slot, handing it over to the first waiter if there is one."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _record_wait(self, waited: float) -> None:
+        self.average_wait = 0.8 * self.average_wait + 0.2 * waited
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware admitting requests only while the service keeps up.
+
+    In order, a request is:
+
+    - Rejected with 429 when its client exceeded its token bucket
+      (``RATE_LIMIT_PER_SECOND`` with bursts of ``RATE_LIMIT_BURST``)
+    - Admitted right away when its route limit (``ROUTE_MAX_IN_FLIGHT``, by
+      longest path prefix) and the global ``MAX_IN_FLIGHT_REQUESTS`` allow it
+    - Otherwise queued (at most ``ADMISSION_QUEUE_SIZE`` waiting) until a slot
+      frees up, for up to ``ADMISSION_MAX_WAIT_MS``
+
+    A request that would have to queue while the average queue wait exceeds
+    ``ADMISSION_LATENCY_TARGET_MS`` is shed immediately, as is one whose wait
+    times out or finds the queue full: 503 with ``Retry-After``. The average
+    decays as requests are admitted without waiting again.
+    """
+
+    def __init__(self, app: ASGIApp, settings: Settings):
+        self.app = app
+        self.exempt_paths = tuple(settings.ADMISSION_EXEMPT_PATHS)
+        self.client_header = (settings.RATE_LIMIT_CLIENT_HEADER or "").lower()
+        self.rate_limiter: Optional[RateLimiter] = None
+        self.global_limiter = ConcurrencyLimiter(
+            settings.MAX_IN_FLIGHT_REQUESTS, settings.ADMISSION_QUEUE_SIZE
+        )
+        self.route_limiters: List[Tuple[str, ConcurrencyLimiter]] = []
+        self.configure(settings)
+        if settings is settings_provider.settings:
+            settings_provider.subscribe_component(self)
+        _middlewares.add(self)
+
+    def configure(self, settings: Settings) -> None:
+        """Apply the (reloaded) rate limits, concurrency limits and waits.
+
+        Limiters keep their requests in flight and waiting, and client buckets
+        are only reset when the rate limit changes.
+        """
+        self.latency_target = settings.ADMISSION_LATENCY_TARGET_MS / 1000
+        self.max_wait = settings.ADMISSION_MAX_WAIT_MS / 1000
+        rate, burst = settings.RATE_LIMIT_PER_SECOND, settings.RATE_LIMIT_BURST
+        if rate <= 0:
+            self.rate_limiter = None
+        elif self.rate_limiter is None or (
+            (self.rate_limiter.rate, self.rate_limiter.burst) != (rate, burst)
+        ):
+            self.rate_limiter = RateLimiter(rate, burst)
+        queue_size = settings.ADMISSION_QUEUE_SIZE
+        self.global_limiter.resize(settings.MAX_IN_FLIGHT_REQUESTS, queue_size)
+        limiters = dict(self.route_limiters)
+        for prefix, limit in settings.ROUTE_MAX_IN_FLIGHT.items():
+            if prefix in limiters:
+                limiters[prefix].resize(limit, queue_size)
+            else:
+                limiters[prefix] = ConcurrencyLimiter(limit, queue_size)
+        # Longest prefixes first, so the most specific route limit applies
+        self.route_limiters = sorted(
+            (
+                (prefix, limiter)
+                for prefix, limiter in limiters.items()
+                if prefix in settings.ROUTE_MAX_IN_FLIGHT
+            ),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+
+    def client_id(self, scope: Scope) -> str:
+        if self.client_header:
+            for name, value in scope.get("headers", []):
+                if name.decode("latin-1") == self.client_header:
+                    return value.decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def route_limiter(self, path: str) -> Optional[ConcurrencyLimiter]:
+        for prefix, limiter in self.route_limiters:
+            if path.startswith(prefix):
+                return limiter
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        if self.rate_limiter:
+            wait = self.rate_limiter.check(self.client_id(scope))
+            if wait:
+                metrics.increment("admission.rejected.rate_limited")
+                await self.reject(
+                    scope, receive, send, 429, "Rate limit exceeded", wait
+                )
+                return
+
+        acquired: List[ConcurrencyLimiter] = []
+        try:
+            for limiter in filter(
+                None, (self.route_limiter(scope["path"]), self.global_limiter)
+            ):
+                if limiter.saturated and limiter.average_wait > self.latency_target:
+                    metrics.increment("admission.rejected.shed")
+                    await self.reject_overloaded(scope, receive, send)
+                    return
+                try:
+                    waited = await limiter.acquire(self.max_wait)
+                except QueueFullError:
+                    metrics.increment("admission.rejected.queue_full")
+                    await self.reject_overloaded(scope, receive, send)
+                    return
+                except asyncio.TimeoutError:
+                    metrics.increment("admission.rejected.timeout")
+                    await self.reject_overloaded(scope, receive, send)
+                    return
+                acquired.append(limiter)
+                metrics.observe("admission.queue_wait_seconds", waited)
+
+            metrics.increment("admission.admitted")
+            await self.app(scope, receive, send)
+        finally:
+            for limiter in acquired:
+                limiter.release()
+
+    async def reject_overloaded(self, scope: Scope, receive: Receive, send: Send):
+        await self.reject(
+            scope,
+            receive,
+            send,
+            503,
+            "Service overloaded, try again later",
+            self.latency_target,
+        )
+
+    @staticmethod
+    async def reject(
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        status_code: int,
+        detail: str,
+        retry_after: float,
+    ) -> None:
+        response = JSONResponse(
+            {"detail": detail},
+            status_code=status_code,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+        await response(scope, receive, send)
+
+
+# Middlewares of the live apps, reported by the collector registered once
+# below, so apps created and dropped (e.g. by tests) go away
+_middlewares: weakref.WeakSet[AdmissionControlMiddleware] = weakref.WeakSet()
+
+
+def admission_stats() -> Dict[str, float]:
+    """Requests in flight and longest average queue wait of all middlewares."""
+    middlewares = list(_middlewares)
+    if not middlewares:
+        return {}
+    return {
+        "admission.in_flight": sum(m.global_limiter.in_flight for m in middlewares),
+        "admission.average_wait_seconds": max(
+            m.global_limiter.average_wait for m in middlewares
+        ),
+    }
+
+
+metrics.register_collector(admission_stats)
@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import uuid
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+
+from app.core.metrics import metrics
+
+
+class SlowConsumerError(Exception):
+    """Raised to a subscriber that fell too far behind and was dropped."""
+
+
+class BroadcastEvent:
+    """A published event, serialized once for all subscribers."""
+
+    __slots__ = ("data", "id", "seq", "type")
+
+    def __init__(self, id: str, seq: int, type: str, data: str):
+        self.id = id
+        self.seq = seq
+        self.type = type
+        self.data = data
+
+
+class Subscription:
+    """A subscriber's bounded queue of events, consumed on its event loop."""
+
+    def __init__(self, broadcaster: "Broadcaster", loop: asyncio.AbstractEventLoop):
+        self.broadcaster = broadcaster
+        self.loop = loop
+        self.queue: Deque[BroadcastEvent] = deque()
+        self.last_seq = 0  # Of the last queued event, to skip duplicates
+        self.resync = False  # Events were missed before subscribing
+        self.evicted = False
+        self._ready = asyncio.Event()
+
+    def _put(self, event: BroadcastEvent) -> None:
+        if self.evicted or event.seq <= self.last_seq:
+            return
+        if len(self.queue) >= self.broadcaster.queue_size:
+            self.evicted = True
+            self.queue.clear()
+            self.broadcaster.unsubscribe(self)
+            metrics.increment(f"broadcast.{self.broadcaster.name}.evicted")
+        else:
+            self.queue.append(event)
+            self.last_seq = event.seq
+        self._ready.set()
+
+    async def get(self, timeout: float) -> Optional[BroadcastEvent]:
+        """Wait for the next event, or return None after ``timeout`` seconds.
+
+        Raises:
+            SlowConsumerError: If the queue overflowed and the subscriber was
+                dropped
+        """
+        if not self.queue and not self.evicted:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.queue:
+            return self.queue.popleft()
+        raise SlowConsumerError("Subscriber fell too far behind")
+
+    def close(self) -> None:
+        self.broadcaster.unsubscribe(self)
+
+
+class Broadcaster:
+    """In-process publish/subscribe fan-out to asyncio subscribers.
+
+    ``publish`` may be called from any thread; each event is serialized once
+    and handed to every subscriber's event loop in a single callback. Idle
+    subscribers only cost an empty queue. A subscriber whose queue reaches
+    ``queue_size`` events is dropped rather than buffering without bound.
+
+    The last ``history_size`` events are kept so reconnecting subscribers can
+    resume after the last event they saw. Event ids embed an id of this
+    broadcaster, so ids from another process (or before a restart) are known
+    to be unresumable.
+    """
+
+    def __init__(self, name: str, queue_size: int = 100, history_size: int = 1000):
+        self.name = name
+        self.queue_size = queue_size
+        self.epoch = uuid.uuid4().hex[:8]
+        self._seq = 0
+        self._history: Deque[BroadcastEvent] = deque(maxlen=history_size)
+        self._subscribers: Dict[asyncio.AbstractEventLoop, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        metrics.register_collector(self.stats)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subs) for subs in self._subscribers.values())
+
+    def stats(self) -> Dict[str, float]:
+        """Number of subscribers."""
+        return {f"broadcast.{self.name}.subscribers": self.subscriber_count}
+
+    def publish(self, type: str, data: str) -> BroadcastEvent:
+        """Publish an event with already serialized ``data`` to all subscribers."""
+        with self._lock:
+            self._seq += 1
+            event = BroadcastEvent(f"{self.epoch}-{self._seq}", self._seq, type, data)
+            self._history.append(event)
+            loops = [loop for loop, subs in self._subscribers.items() if subs]
+        metrics.increment(f"broadcast.{self.name}.published")
+        for loop in loops:
+            try:
+                loop.call_soon_threadsafe(self._deliver, loop, event)
+            except RuntimeError:
+                self._drop_loop(loop)  # Closed without unsubscribing
+        return event
+
+    def _deliver(self, loop: asyncio.AbstractEventLoop, event: BroadcastEvent) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(loop, ()))
+        for subscription in subscribers:
+            subscription._put(event)
+
+    def _drop_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        with self._lock:
+            self._subscribers.pop(loop, None)
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Subscription:
+        """Subscribe from the running event loop.
+
+        With the id of the last event a client saw, the events published since
+        are queued first; if they are no longer (or were never) in this
+        broadcaster's history, or would overflow the queue, ``resync`` is set
+        instead.
+        """
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(self, loop)
+        with self._lock:
+            if last_event_id is not None:
+                missed = self._missed_since(last_event_id)
+                if missed is None or len(missed) > self.queue_size:
+                    subscription.resync = True
+                else:
+                    subscription.queue.extend(missed)
+            subscription.last_seq = self._seq
+            self._subscribers.setdefault(loop, set()).add(subscription)
+        return subscription
+
+    def _missed_since(self, last_event_id: str) -> Optional[List[BroadcastEvent]]:
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > self._seq:
+            return None
+        seq = int(seq)
+        oldest = self._history[0].seq if self._history else self._seq + 1
+        if seq < oldest - 1:
+            return None
+        return [event for event in self._history if event.seq > seq]
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.loop)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.loop]
@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db import get_engine
+
+logger = logging.getLogger(__name__)
+
+
+def default_engines() -> List[Engine]:
+    """The application database and the user shards."""
+    return [get_engine()] + [get_engine(url) for url in settings.USER_SHARD_URLS]
+
+
+class CacheVersionWatcher:
+    """Notice writes made by any process to the tables in-process caches use.
+
+    Triggers bump a table's row in ``cache_versions`` on every write to it
+    (see ``app.models.cache_version``). A thread polls those rows every
+    ``interval`` seconds and, when a table's version changed, calls its
+    listeners, e.g. to invalidate a cache. So every worker's caches drop a
+    write within about ``interval`` seconds, whichever worker made it.
+
+    Before serving, caches check ``is_current``: it is false when polling
+    has not succeeded for ``max_lag`` seconds (e.g. while the database is
+    locked), in which case they must not serve from memory.
+    """
+
+    def __init__(
+        self,
+        engines: Optional[Callable[[], List[Engine]]] = None,
+        interval: Optional[float] = None,
+        max_lag: Optional[float] = None,
+    ):
+        self.engines = engines or default_engines
+        self.interval = (
+            settings.CACHE_VERSION_POLL_INTERVAL_MS / 1000
+            if interval is None
+            else interval
+        )
+        self.max_lag = (
+            settings.CACHE_VERSION_MAX_LAG_MS / 1000 if max_lag is None else max_lag
+        )
+        self.last_polled = 0.0
+        self._versions: Dict[str, Dict[str, int]] = {}  # By database URL
+        self._listeners: Dict[str, List[Callable[[], None]]] = defaultdict(list)
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, table: str, listener: Callable[[], None]) -> None:
+        """Call ``listener`` whenever another write to the table is noticed."""
+        self._listeners[table].append(listener)
+
+    def is_current(self) -> bool:
+        """Whether writes of other processes are known up to ``max_lag`` ago."""
+        if self._thread is None:
+            return True  # Not watching: only this process's writes matter
+        return time.monotonic() - self.last_polled <= self.max_lag
+
+    def poll(self) -> Set[str]:
+        """Read the versions, notify and return the tables that changed.
+
+        The first poll of a database only records its versions.
+        """
+        changed = set()
+        for engine in self.engines():
+            with engine.connect() as conn:
+                versions = dict(
+                    conn.execute(text("SELECT name, version FROM cache_versions")).all()
+                )
+            previous = self._versions.get(str(engine.url))
+            self._versions[str(engine.url)] = versions
+            if previous is not None:
+                changed.update(
+                    name
+                    for name, version in versions.items()
+                    if previous.get(name) != version
+                )
+        self.last_polled = time.monotonic()
+        for name in changed:
+            metrics.increment("cache_versions.changes")
+            for listener in self._listeners[name]:
+                listener()
+        return changed
+
+    def start(self) -> None:
+        """Start the polling thread."""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="cache-versions", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the polling thread."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self) -> None:
+        failing = False
+        while True:
+            try:
+                self.poll()
+                failing = False
+            except Exception:
+                metrics.increment("cache_versions.poll_failures")
+                if not failing:
+                    logger.exception("Polling cache versions failed")
+                failing = True
+            if self._stopping.wait(self.interval):
+                return
+
+
+# Create global watcher, started from the application lifespan
+cache_versions = CacheVersionWatcher()
@@ -1,7 +1,8 @@
-from typing import ClassVar
+from typing import ClassVar, Dict, List, Optional
 
 from pydantic import EmailStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from starlette.requests import HTTPConnection
 
 
 class Settings(BaseSettings):
@@ -10,9 +11,118 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "FastAPI Microservice"
     PROJECT_DESCRIPTION: str = "A FastAPI microservice with proper configuration"
     VERSION: str = "0.2.0"
+    LOG_LEVEL: str = "INFO"  # Level of the application's ("app.*") loggers
+
+    # Settings Reload
+    SETTINGS_RELOAD_ENABLED: bool = True  # Apply tunable .env changes live
+    SETTINGS_RELOAD_INTERVAL_SECONDS: float = 5.0  # How often .env is checked
 
     # Database Settings
     DATABASE_URL: str = "sqlite:///./test.db"
+    USER_SHARD_URLS: List[str] = []  # Partition users across these databases
+    SINGLE_WRITER_ENABLED: bool = False  # Run user writes on one writer thread
+    WRITE_QUEUE_MAX_SIZE: int = 1000  # Pending writes before callers must wait
+    WRITE_QUEUE_TIMEOUT_SECONDS: float = 1.0  # Wait for a queue slot, then 503
+    WRITE_RESULT_TIMEOUT_SECONDS: float = 60.0  # Wait for a queued write to run
+
+    # User API Settings
+    USER_BATCH_MAX_SIZE: int = 100  # Max ids/emails per multi-get request
+    USER_LOOKUP_COALESCING: bool = True  # Share in-flight identical user lookups
+    EMAIL_VALIDATION_CACHE_SIZE: int = 65536  # Distinct validated emails memoized
+    WRITE_BATCHING_ENABLED: bool = False  # Group-commit concurrent user writes
+    WRITE_BATCH_WINDOW_MS: float = 2.0  # How long a batch waits for more writes
+    WRITE_BATCH_MAX_SIZE: int = 100  # Max writes committed together
+    USER_CHANGES_MAX_LIMIT: int = 1000  # Max changes per delta-sync page
+    USER_CHANGES_RETENTION_HOURS: float = 168.0  # Older changes are compacted
+    IDEMPOTENCY_KEY_TTL_HOURS: float = 24.0  # Responses kept for retries
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0  # Wait on a duplicate in flight, then 409
+    # Claims of lost requests lapse after; a claim must outlast its request, which
+    # the deadline stops after REQUEST_TIMEOUT_MAX_SECONDS at most
+    IDEMPOTENCY_LOCK_SECONDS: float = 120.0
+    SSE_MAX_SUBSCRIBERS: int = 10000  # Concurrent user event streams per process
+    SSE_SUBSCRIBER_QUEUE_SIZE: int = 100  # Undelivered events before a stream is cut
+    SSE_HISTORY_SIZE: int = 1000  # Recent events kept for Last-Event-ID resumes
+    SSE_HEARTBEAT_SECONDS: float = 15.0  # Keep-alive comment on idle streams
+
+    # Bulk Import Settings
+    IMPORT_CHUNK_SIZE: int = 1000  # Rows validated and inserted per transaction
+    IMPORT_REPORT_DIR: str = "./data/imports"  # Where per-row error reports go
+    IMPORT_UPLOAD_DIR: str = "./data/uploads"  # The only files import jobs may read
+
+    # Background Job Settings
+    JOBS_ENABLED: bool = True  # Start the job workers with the application
+    JOB_WORKERS: int = 2  # Max jobs running concurrently in this process
+    JOB_MAX_ATTEMPTS: int = 3  # Default attempts before a job is marked failed
+    JOB_RETRY_DELAY_SECONDS: float = 5.0  # Base delay, doubled on each retry
+    JOB_HEARTBEAT_SECONDS: float = 10.0  # Heartbeat and queue rescan interval
+    JOB_STALE_SECONDS: float = 60.0  # Running jobs without heartbeat are resumed
+
+    # Database Maintenance Settings
+    MAINTENANCE_ENABLED: bool = True  # Start the maintenance scheduler with the app
+    MAINTENANCE_INTERVAL_SECONDS: float = 3600.0  # How often maintenance may run
+    MAINTENANCE_WINDOW: Optional[str] = None  # Local "HH:MM-HH:MM", None: any time
+    MAINTENANCE_VACUUM_PAGES: int = 10000  # Free pages reclaimed per run (0: all)
+
+    # Readiness Settings
+    READINESS_PROBE_ENABLED: bool = True  # Probe dependencies in the background
+    READINESS_PROBE_INTERVAL_SECONDS: float = 10.0  # Age of /system/ready results
+    READINESS_MAX_POOL_USAGE: float = 0.9  # Connections in use, as a pool fraction
+    READINESS_MIN_FREE_DISK_MB: int = 100  # Free space by the database files
+
+    # Threadpool Settings
+    THREADPOOL_SIZE: int = 40  # Threads for sync dependencies and other routes
+    READ_THREADPOOL_SIZE: int = 32  # Threads for sync user reads (GET)
+    WRITE_THREADPOOL_SIZE: int = 8  # Threads for sync user writes, kept apart
+
+    # Tracing Settings
+    TRACING_ENABLED: bool = False  # Record spans of sampled requests
+    TRACING_SAMPLE_RATE: float = 0.01  # Of requests without a traceparent header
+    TRACING_FILE: str = "./data/traces/spans.jsonl"  # Where spans are written
+    TRACING_FILE_MAX_BYTES: int = 50 * 1024 * 1024  # Rotated beyond this size
+    TRACING_FILE_BACKUP_COUNT: int = 5  # Rotated files kept
+    TRACING_QUEUE_SIZE: int = 10000  # Spans waiting for export before dropping
+
+    # Request Deadline Settings
+    REQUEST_TIMEOUT_SECONDS: float = 30.0  # Abort a request's queries after (0: off)
+    REQUEST_TIMEOUT_MAX_SECONDS: float = 120.0  # Cap on the timeout header
+    REQUEST_TIMEOUT_HEADER: str = "X-Request-Timeout"  # Per-request timeout override
+    REQUEST_TIMEOUT_EXEMPT_PATHS: List[str] = [
+        "/api/v1/users/import",
+        "/api/v1/users/stream",
+    ]
+
+    # Admission Control Settings
+    ADMISSION_CONTROL_ENABLED: bool = False  # Rate limit and shed excess requests
+    RATE_LIMIT_PER_SECOND: float = 0.0  # Requests per second per client (0: off)
+    RATE_LIMIT_BURST: int = 20  # Requests a client may send at once
+    RATE_LIMIT_CLIENT_HEADER: Optional[str] = None  # e.g. X-API-Key, default: IP
+    MAX_IN_FLIGHT_REQUESTS: int = 64  # Requests processed concurrently
+    ROUTE_MAX_IN_FLIGHT: Dict[str, int] = {}  # Per path prefix, like the above
+    ADMISSION_QUEUE_SIZE: int = 128  # Requests waiting for a slot before 503
+    ADMISSION_MAX_WAIT_MS: float = 2000.0  # Queued requests give up after this
+    ADMISSION_LATENCY_TARGET_MS: float = 500.0  # Shed when average wait is above
+    ADMISSION_EXEMPT_PATHS: List[str] = [  # Also long-lived event streams
+        "/api/v1/system/health",
+        "/api/v1/system/ready",
+        "/api/v1/users/stream",
+    ]
+
+    # Response Cache Settings
+    RESPONSE_CACHE_ENABLED: bool = False  # Cache GET responses in each process
+    RESPONSE_CACHE_TTL_SECONDS: float = 5.0  # How long a response is fresh
+    RESPONSE_CACHE_STALE_SECONDS: float = 30.0  # Served stale while refreshing
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000  # Least recently used evicted beyond
+    RESPONSE_CACHE_MAX_BYTES: int = 16 * 1024 * 1024  # Total cached body size
+    RESPONSE_CACHE_PATHS: List[str] = ["/api/v1/users"]  # Cached path prefixes
+    RESPONSE_CACHE_INVALIDATE_PATHS: List[str] = [  # Writes here invalidate
+        "/api/v1/users",
+        "/api/v1/admin/users",
+    ]
+    RESPONSE_CACHE_READ_ONLY_PATHS: List[str] = ["/api/v1/users/batch-get"]
+    RESPONSE_CACHE_EXEMPT_PATHS: List[str] = ["/api/v1/users/stream"]
+    RESPONSE_CACHE_VARY_HEADERS: List[str] = ["Accept", "Accept-Encoding"]
+    CACHE_VERSION_POLL_INTERVAL_MS: float = 200.0  # Notice other workers' writes
+    CACHE_VERSION_MAX_LAG_MS: float = 2000.0  # Bypass caches if polling stalls
 
     # CORS Settings
     BACKEND_CORS_ORIGINS: ClassVar[list[str]] = [
@@ -22,6 +132,7 @@ class Settings(BaseSettings):
 
     # Security Settings
     SECRET_KEY: str = "your-secret-key-here"  # Change in production
+    ADMIN_API_TOKEN: Optional[str] = None  # X-Admin-Token for /admin (None: closed)
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
     # Admin User Settings
@@ -34,5 +145,46 @@ class Settings(BaseSettings):
     )
 
 
+# Tunable settings applied without a restart when the .env file changes (see
+# app.core.settings_provider); changes to any other setting need a restart
+RELOADABLE_SETTINGS = frozenset(
+    {
+        "LOG_LEVEL",
+        "USER_BATCH_MAX_SIZE",
+        "SSE_MAX_SUBSCRIBERS",
+        "SSE_HEARTBEAT_SECONDS",
+        "IMPORT_CHUNK_SIZE",
+        "WRITE_QUEUE_MAX_SIZE",
+        "WRITE_QUEUE_TIMEOUT_SECONDS",
+        "WRITE_RESULT_TIMEOUT_SECONDS",
+        "READ_THREADPOOL_SIZE",
+        "WRITE_THREADPOOL_SIZE",
+        "TRACING_SAMPLE_RATE",
+        "REQUEST_TIMEOUT_SECONDS",
+        "REQUEST_TIMEOUT_MAX_SECONDS",
+        "RATE_LIMIT_PER_SECOND",
+        "RATE_LIMIT_BURST",
+        "MAX_IN_FLIGHT_REQUESTS",
+        "ROUTE_MAX_IN_FLIGHT",
+        "ADMISSION_QUEUE_SIZE",
+        "ADMISSION_MAX_WAIT_MS",
+        "ADMISSION_LATENCY_TARGET_MS",
+        "RESPONSE_CACHE_TTL_SECONDS",
+        "RESPONSE_CACHE_STALE_SECONDS",
+        "RESPONSE_CACHE_MAX_ENTRIES",
+        "RESPONSE_CACHE_MAX_BYTES",
+        "USER_CHANGES_RETENTION_HOURS",
+    }
+)
+
 # Create global settings object
 settings = Settings()
+
+
+def get_settings(connection: HTTPConnection) -> Settings:
+    """Dependency to get the settings of the application handling a request.
+
+    Those given to ``create_app``, or the global settings for applications
+    built otherwise.
+    """
+    return getattr(connection.app.state, "settings", settings)
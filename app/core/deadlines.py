@@ -0,0 +1,201 @@
+import asyncio
+import math
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import Settings
+from app.core.metrics import metrics
+from app.core.settings_provider import settings_provider
+
+# SQLite VM instructions between two deadline checks of a running statement
+PROGRESS_HANDLER_INTERVAL = 1000
+
+
+class DeadlineExceededError(Exception):
+    """Raised when work is aborted because its request's deadline passed."""
+
+
+class Deadline:
+    """Point in time by which a request's work must be done.
+
+    The work is also abandoned once ``cancel`` was called, e.g. when the client
+    disconnected.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    @property
+    def remaining(self) -> float:
+        """Seconds left until the deadline (0 once it passed or was cancelled)."""
+        if self.cancelled:
+            return 0.0
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.cancelled or time.monotonic() >= self.expires_at
+
+    def check(self) -> None:
+        """Raises ``DeadlineExceededError`` if the deadline passed."""
+        if self.expired:
+            raise DeadlineExceededError(
+                "Client disconnected"
+                if self.cancelled
+                else f"Request deadline of {self.timeout:g}s exceeded"
+            )
+
+
+# Deadline of the request being handled, copied into its threadpool threads
+current_deadline: ContextVar[Optional[Deadline]] = ContextVar(
+    "current_deadline", default=None
+)
+
+
+@contextmanager
+def deadline(timeout: float) -> Iterator[Deadline]:
+    """Run the enclosed code (and the queries it makes) under a deadline."""
+    value = Deadline(timeout)
+    token = current_deadline.set(value)
+    try:
+        yield value
+    finally:
+        current_deadline.reset(token)
+
+
+@contextmanager
+def no_deadline() -> Iterator[None]:
+    """Run the enclosed code (and the queries it makes) without a deadline.
+
+    For work that must be done even after the request was aborted, e.g.
+    recording its outcome.
+    """
+    token = current_deadline.set(None)
+    try:
+        yield
+    finally:
+        current_deadline.reset(token)
+
+
+def check_deadline() -> None:
+    """Raises ``DeadlineExceededError`` if the current deadline passed."""
+    value = current_deadline.get()
+    if value is not None:
+        value.check()
+
+
+def install_deadline_handler(engine: Engine) -> None:
+    """Abort the SQLite statements of requests whose deadline passed.
+
+    Statements are not started after the deadline, and running ones are
+    interrupted by a progress handler that checks the deadline of the thread
+    executing them. The resulting error is raised as ``DeadlineExceededError``.
+    """
+
+    def progress_handler() -> int:
+        value = current_deadline.get()
+        return 1 if value is not None and value.expired else 0
+
+    @event.listens_for(engine, "connect")
+    def set_progress_handler(dbapi_connection, connection_record):
+        dbapi_connection.set_progress_handler(
+            progress_handler, PROGRESS_HANDLER_INTERVAL
+        )
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def check_before_execute(conn, cursor, statement, parameters, context, many):
+        check_deadline()
+
+    @event.listens_for(engine, "handle_error")
+    def raise_deadline_exceeded(context):
+        value = current_deadline.get()
+        if (
+            isinstance(context.original_exception, sqlite3.OperationalError)
+            and value is not None
+            and value.expired
+        ):
+            metrics.increment("deadlines.interrupted_queries")
+            value.check()
+
+
+class DeadlineMiddleware:
+    """ASGI middleware running each request under a deadline.
+
+    The timeout is ``REQUEST_TIMEOUT_SECONDS``, or the value of the
+    ``REQUEST_TIMEOUT_HEADER`` header (capped by
+    ``REQUEST_TIMEOUT_MAX_SECONDS``). Header values that are not positive
+    finite numbers are ignored, so clients cannot lift the deadline. The
+    deadline is also cancelled as soon as the client disconnects. Requests
+    aborted by the deadline get a 504.
+    """
+
+    def __init__(self, app: ASGIApp, settings: Settings):
+        self.app = app
+        self.header = settings.REQUEST_TIMEOUT_HEADER.lower().encode("latin-1")
+        self.exempt_paths = tuple(settings.REQUEST_TIMEOUT_EXEMPT_PATHS)
+        self.configure(settings)
+        if settings is settings_provider.settings:
+            settings_provider.subscribe_component(self)
+
+    def configure(self, settings: Settings) -> None:
+        """Apply the (reloaded) timeouts."""
+        self.default_timeout = settings.REQUEST_TIMEOUT_SECONDS
+        self.max_timeout = settings.REQUEST_TIMEOUT_MAX_SECONDS
+
+    def timeout(self, scope: Scope) -> Optional[float]:
+        timeout = self.default_timeout
+        for name, value in scope.get("headers", []):
+            if name == self.header:
+                try:
+                    requested = float(value.decode("latin-1"))
+                except ValueError:
+                    break
+                if math.isfinite(requested) and requested > 0:
+                    timeout = requested
+                break
+        if timeout <= 0:
+            return None
+        return min(timeout, self.max_timeout)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        timeout = None
+        if scope["type"] == "http" and not scope["path"].startswith(self.exempt_paths):
+            timeout = self.timeout(scope)
+        if timeout is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Read the client's messages in the background to notice disconnects
+        # while the request is being handled, handing them over to the app
+        messages: asyncio.Queue = asyncio.Queue()
+        with deadline(timeout) as value:
+
+            async def watch_disconnect() -> None:
+                while True:
+                    message = await receive()
+                    await messages.put(message)
+                    if message["type"] == "http.disconnect":
+                        value.cancel()
+                        metrics.increment("deadlines.disconnects")
+                        return
+
+            async def receive_message() -> Message:
+                return await messages.get()
+
+            watcher = asyncio.ensure_future(watch_disconnect())
+            try:
+                await self.app(scope, receive_message, send)
+            finally:
+                watcher.cancel()
@@ -0,0 +1,60 @@
+import threading
+from typing import Callable, Dict, List
+
+Collector = Callable[[], Dict[str, float]]
+
+
+class Metrics:
+    """Thread-safe, in-process registry of named counters, gauges and timings.
+
+    Names are flat dotted strings (e.g. ``singleflight.user_lookup.coalesced``).
+    Values that are cheaper to compute on demand than to keep up to date can be
+    provided by collectors, which are called whenever a snapshot is taken.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, float] = {}
+        self._collectors: List[Collector] = []
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """Add ``value`` to a counter."""
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Set a gauge to its current value."""
+        with self._lock:
+            self._values[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record a sample (e.g. a duration), tracking count, sum and max."""
+        with self._lock:
+            self._values[f"{name}.count"] = self._values.get(f"{name}.count", 0) + 1
+            self._values[f"{name}.sum"] = self._values.get(f"{name}.sum", 0) + value
+            self._values[f"{name}.max"] = max(
+                self._values.get(f"{name}.max", value), value
+            )
+
+    def register_collector(self, collector: Collector) -> None:
+        """Register a callable returning extra values for each snapshot."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def get(self, name: str, default: float = 0) -> float:
+        """Get the current value of a counter or gauge."""
+        with self._lock:
+            return self._values.get(name, default)
+
+    def snapshot(self) -> Dict[str, float]:
+        """Return a copy of all current values, including collected ones."""
+        with self._lock:
+            values = dict(self._values)
+            collectors = list(self._collectors)
+        for collector in collectors:
+            values.update(collector())
+        return dict(sorted(values.items()))
+
+
+# Create global metrics registry
+metrics = Metrics()
@@ -0,0 +1,318 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache_versions import CacheVersionWatcher, cache_versions
+from app.core.config import Settings, settings
+from app.core.metrics import metrics
+from app.core.settings_provider import settings_provider
+
+CacheKey = Tuple[str, bytes, Tuple[bytes, ...]]
+Headers = List[Tuple[bytes, bytes]]
+
+
+class CachedResponse:
+    """A complete serialized response and when it was stored."""
+
+    def __init__(self, status: int, headers: Headers, body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.stored_at = time.monotonic()
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers)
+
+
+class ResponseCache:
+    """LRU cache of serialized responses, bounded in entries and bytes.
+
+    Entries are fresh for ``ttl`` seconds, then may still be served for
+    ``stale`` more seconds while being refreshed. Every invalidation bumps a
+    generation, so responses computed before it are never stored after it.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        stale: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.ttl = settings.RESPONSE_CACHE_TTL_SECONDS if ttl is None else ttl
+        self.stale = settings.RESPONSE_CACHE_STALE_SECONDS if stale is None else stale
+        self.max_entries = max_entries or settings.RESPONSE_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or settings.RESPONSE_CACHE_MAX_BYTES
+        self.generation = 0
+        self._entries: OrderedDict[CacheKey, CachedResponse] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def configure(self, settings: Settings) -> None:
+        """Apply reloaded lifetimes and bounds, evicting entries over the bounds."""
+        with self._lock:
+            self.ttl = settings.RESPONSE_CACHE_TTL_SECONDS
+            self.stale = settings.RESPONSE_CACHE_STALE_SECONDS
+            self.max_entries = settings.RESPONSE_CACHE_MAX_ENTRIES
+            self.max_bytes = settings.RESPONSE_CACHE_MAX_BYTES
+            self._evict()
+
+    def stats(self) -> Dict[str, float]:
+        """Number and size of the cached responses, and the hit ratio."""
+        hits = metrics.get("response_cache.hits") + metrics.get(
+            "response_cache.stale_hits"
+        )
+        lookups = hits + metrics.get("response_cache.misses")
+        with self._lock:
+            return {
+                "response_cache.entries": len(self._entries),
+                "response_cache.bytes": self._bytes,
+                "response_cache.hit_ratio": hits / lookups if lookups else 0,
+            }
+
+    def get(self, key: CacheKey) -> Tuple[Optional[CachedResponse], bool]:
+        """Get a usable entry and whether it is stale, or (None, False)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            age = time.monotonic() - entry.stored_at
+            if age >= self.ttl + self.stale:
+                self._remove(key)
+                return None, False
+            self._entries.move_to_end(key)
+            return entry, age >= self.ttl
+
+    def set(self, key: CacheKey, entry: CachedResponse, generation: int) -> bool:
+        """Store an entry computed at ``generation``, unless invalidated since."""
+        if entry.size > self.max_bytes:
+            return False
+        with self._lock:
+            if generation != self.generation:
+                return False
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            self._evict()
+            return True
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            metrics.increment("response_cache.evictions")
+
+    def invalidate(self, prefixes: Optional[Sequence[str]] = None) -> None:
+        """Drop the entries under the given path prefixes (default: all)."""
+        with self._lock:
+            self.generation += 1
+            for key in list(self._entries):
+                if prefixes is None or key[0].startswith(tuple(prefixes)):
+                    self._remove(key)
+        metrics.increment("response_cache.invalidations")
+
+    def _remove(self, key: CacheKey) -> None:
+        self._bytes -= self._entries.pop(key).size
+
+
+def has_directive(headers: Headers, name: bytes, *directives: bytes) -> bool:
+    """Whether a (Cache-Control like) header contains one of the directives."""
+    for key, value in headers:
+        if key.lower() == name and any(d in value.lower() for d in directives):
+            return True
+    return False
+
+
+class ResponseCacheMiddleware:
+    """ASGI middleware caching successful GET responses under some paths.
+
+    Responses are keyed by path, query string and the ``Vary``-like request
+    headers of ``RESPONSE_CACHE_VARY_HEADERS``. Stale entries are served while
+    a single background request refreshes them. Any successful write (a
+    non-GET request answered with 2xx) under ``RESPONSE_CACHE_INVALIDATE_PATHS``
+    invalidates the cached ``RESPONSE_CACHE_PATHS`` entries (except for the
+    ``RESPONSE_CACHE_READ_ONLY_PATHS``, e.g. ``POST`` lookups). Paths under
+    ``RESPONSE_CACHE_EXEMPT_PATHS`` (e.g. event streams) and requests sent with
+    ``Cache-Control: no-cache`` bypass the cache, and responses with
+    ``Cache-Control: no-store``/``no-cache`` or cookies are not stored.
+
+    Writes of other processes invalidate the cache through ``cache_versions``,
+    and the cache is bypassed while that watcher is not current.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        settings: Settings,
+        cache: Optional[ResponseCache] = None,
+        watcher: Optional[CacheVersionWatcher] = None,
+    ):
+        self.app = app
+        self.cache = cache or response_cache
+        self.watcher = watcher or cache_versions
+        self.paths = tuple(settings.RESPONSE_CACHE_PATHS)
+        self.invalidate_paths = tuple(settings.RESPONSE_CACHE_INVALIDATE_PATHS)
+        self.read_only_paths = tuple(settings.RESPONSE_CACHE_READ_ONLY_PATHS)
+        self.exempt_paths = tuple(settings.RESPONSE_CACHE_EXEMPT_PATHS)
+        self.vary = [
+            h.lower().encode("latin-1") for h in settings.RESPONSE_CACHE_VARY_HEADERS
+        ]
+        self._refreshing: Set[CacheKey] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def key(self, scope: Scope) -> CacheKey:
+        headers = dict(scope.get("headers", []))
+        return (
+            scope["path"],
+            scope.get("query_string", b""),
+            tuple(headers.get(name, b"") for name in self.vary),
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if scope["method"] not in ("GET", "HEAD"):
+            await self.forward_write(scope, receive, send)
+            return
+        if (
+            scope["method"] != "GET"
+            or not scope["path"].startswith(self.paths)
+            or scope["path"].startswith(self.exempt_paths)
+            or has_directive(scope.get("headers", []), b"cache-control", b"no-cache")
+        ):
+            await self.app(scope, receive, send)
+            return
+        if not self.watcher.is_current():
+            metrics.increment("response_cache.bypassed")
+            await self.app(scope, receive, send)
+            return
+
+        key = self.key(scope)
+        entry, stale = self.cache.get(key)
+        if entry is None:
+            metrics.increment("response_cache.misses")
+            await self.fetch(scope, receive, send, key)
+            return
+        if stale:
+            metrics.increment("response_cache.stale_hits")
+            self.refresh(scope, key)
+        else:
+            metrics.increment("response_cache.hits")
+        await self.send_cached(send, entry, b"STALE" if stale else b"HIT")
+
+    async def forward_write(self, scope: Scope, receive: Receive, send: Send) -> None:
+        status = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+        path = scope["path"]
+        if (
+            200 <= status < 300
+            and path.startswith(self.invalidate_paths)
+            and not path.startswith(self.read_only_paths)
+        ):
+            self.cache.invalidate(self.paths)
+
+    async def fetch(
+        self, scope: Scope, receive: Receive, send: Optional[Send], key: CacheKey
+    ) -> None:
+        """Run the request, storing its response if it can be cached."""
+        generation = self.cache.generation
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+        size = 0
+        cacheable = True
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, size, cacheable
+            if message["type"] == "http.response.start":
+                start = message
+                headers = message.get("headers", [])
+                cacheable = (
+                    message["status"] == 200
+                    and not has_directive(
+                        headers, b"cache-control", b"no-store", b"no-cache"
+                    )
+                    and not any(k.lower() == b"set-cookie" for k, _ in headers)
+                )
+                if send is not None:
+                    message = {
+                        **message,
+                        "headers": [*headers, (b"x-cache", b"MISS")],
+                    }
+            elif message["type"] == "http.response.body" and cacheable:
+                size += len(message.get("body", b""))
+                if size > self.cache.max_bytes:
+                    cacheable = False
+                    chunks.clear()
+                else:
+                    chunks.append(message.get("body", b""))
+            if send is not None:
+                await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+        if start is not None and cacheable:
+            entry = CachedResponse(
+                start["status"], start.get("headers", []), b"".join(chunks)
+            )
+            self.cache.set(key, entry, generation)
+
+    def refresh(self, scope: Scope, key: CacheKey) -> None:
+        """Refresh a stale entry in the background, once at a time per key."""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        sent = False
+
+        async def receive() -> Message:
+            # An empty body, then a client that stays connected
+            nonlocal sent
+            if sent:
+                await asyncio.Event().wait()
+            sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def run() -> None:
+            try:
+                await self.fetch(dict(scope), receive, None, key)
+                metrics.increment("response_cache.refreshes")
+            except Exception:
+                metrics.increment("response_cache.refresh_failures")
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.ensure_future(run())
+        self._tasks.add(task)  # Keep a reference until it is done
+        task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    async def send_cached(send: Send, entry: CachedResponse, state: bytes) -> None:
+        age = str(int(time.monotonic() - entry.stored_at)).encode("latin-1")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": entry.status,
+                "headers": [*entry.headers, (b"x-cache", state), (b"age", age)],
+            }
+        )
+        await send({"type": "http.response.body", "body": entry.body})
+
+
+# Create global response cache, used by ResponseCacheMiddleware
+response_cache = ResponseCache()
+metrics.register_collector(response_cache.stats)
+# Drop it whenever any process writes users
+cache_versions.subscribe("users", response_cache.invalidate)
+settings_provider.subscribe(lambda settings, _: response_cache.configure(settings))
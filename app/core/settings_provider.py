@@ -0,0 +1,174 @@
+import logging
+import os
+import threading
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dotenv import dotenv_values
+from pydantic import ValidationError
+
+from app.core import config
+from app.core.config import RELOADABLE_SETTINGS, Settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Called with the reloaded settings and the changed ones, with their new values
+SettingsListener = Callable[[Settings, Dict[str, Any]], None]
+
+
+class SettingsProvider:
+    """Serve the ``.env`` file and apply its tunable settings without a restart.
+
+    The parsed file is cached along with its modification time and size, so
+    reading it costs one ``stat`` unless it changed. When it did, the settings
+    are loaded again (environment variables still take precedence) and the
+    changed ones listed in ``RELOADABLE_SETTINGS`` are assigned to ``settings``
+    in place: code reading them at use time sees the new values right away,
+    and components that copied them on creation subscribe to be reconfigured.
+    Other changed settings are only logged, they need a restart. An invalid
+    file is logged and ignored, the previous settings stay in effect.
+
+    The file is checked whenever it is read, and every ``interval`` seconds
+    once ``start`` was called.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        env_file: str = ".env",
+        interval: Optional[float] = None,
+    ):
+        self.settings = settings
+        self.env_file = env_file
+        self.interval = interval or settings.SETTINGS_RELOAD_INTERVAL_SECONDS
+        self.pending_restart: Dict[str, Any] = {}  # Changed, not reloadable
+        self._values: Dict[str, Optional[str]] = {}
+        self._listeners: List[SettingsListener] = []
+        self._components: weakref.WeakSet[Any] = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stamp: Optional[Tuple[int, int]] = self._stat()  # (mtime_ns, size)
+        if self._stamp is not None:
+            self._values = dotenv_values(env_file)
+
+    def subscribe(self, listener: SettingsListener) -> None:
+        """Call ``listener(settings, changed)`` after reloaded settings changed."""
+        self._listeners.append(listener)
+
+    def subscribe_component(self, component: Any) -> None:
+        """Call ``component.configure(settings)`` after reloaded settings changed.
+
+        Only a weak reference is kept, so components made per app (such as
+        middlewares) go away with their app instead of piling up here.
+        """
+        self._components.add(component)
+
+    def env_exists(self) -> bool:
+        """Whether the ``.env`` file exists."""
+        self.check()
+        return self._stamp is not None
+
+    def env_values(self) -> Dict[str, Optional[str]]:
+        """The parsed ``.env`` file, empty if there is none."""
+        self.check()
+        return self._values
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.env_file)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self) -> Dict[str, Any]:
+        """Reload the settings if the ``.env`` file changed.
+
+        Returns:
+            The reloadable settings that changed, with their new values
+        """
+        stamp = self._stat()
+        if stamp == self._stamp:
+            return {}
+        with self._lock:
+            if stamp == self._stamp:  # Reloaded by another thread meanwhile
+                return {}
+            return self._reload(stamp)
+
+    def _reload(self, stamp: Optional[Tuple[int, int]]) -> Dict[str, Any]:
+        try:
+            values = dotenv_values(self.env_file) if stamp is not None else {}
+            loaded = Settings(_env_file=self.env_file if stamp is not None else None)
+        except (OSError, ValidationError) as e:
+            # Keep the previous settings until the file is fixed
+            self._stamp = stamp
+            metrics.increment("settings.reload_failures")
+            logger.error("Ignoring invalid settings in %s: %s", self.env_file, e)
+            return {}
+        self._stamp, self._values = stamp, values
+
+        changed, pending_restart = {}, {}
+        for name in Settings.model_fields:
+            value = getattr(loaded, name)
+            if value == getattr(self.settings, name):
+                continue
+            if name in RELOADABLE_SETTINGS:
+                changed[name] = value
+            else:
+                pending_restart[name] = value
+        for name, value in changed.items():
+            setattr(self.settings, name, value)
+        self.pending_restart = pending_restart
+        metrics.increment("settings.reloads")
+        if pending_restart:
+            logger.warning(
+                "Changed settings need a restart: %s", ", ".join(pending_restart)
+            )
+        if changed:
+            logger.info("Reloaded settings: %s", ", ".join(changed))
+            for listener in list(self._listeners):
+                try:
+                    listener(self.settings, changed)
+                except Exception:
+                    logger.exception("Settings listener %r failed", listener)
+            for component in list(self._components):
+                try:
+                    component.configure(self.settings)
+                except Exception:
+                    logger.exception("Settings listener %r failed", component)
+        return changed
+
+    def start(self) -> None:
+        """Start checking the ``.env`` file in a thread."""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="settings-reload", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the checking thread."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stopping.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Settings reload failed")
+
+
+def configure_logging(settings: Settings) -> None:
+    """Set the level of the application's loggers to ``LOG_LEVEL``."""
+    logging.getLogger("app").setLevel(settings.LOG_LEVEL.upper())
+
+
+# Create global settings provider, reloading the global settings object
+settings_provider = SettingsProvider(config.settings)
+settings_provider.subscribe(lambda settings, _: configure_logging(settings))
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from app.core.metrics import metrics
+
+T = TypeVar("T")
+
+
+class _Call:
+    """An in-flight call shared by a leader and any number of followers."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into a single execution.
+
+    The first caller for a key (the leader) executes the function; callers
+    arriving while it is in flight (followers) wait for and share its result
+    or exception. Nothing is cached: once the call completes the next caller
+    executes again.
+
+    ``do`` is for blocking code running in threads (e.g. FastAPI's threadpool)
+    and ``do_async`` for coroutines. Calls are counted in the metrics registry
+    under ``singleflight.<name>.{calls,executions,coalesced}``.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._futures: Dict[Tuple[int, Hashable], asyncio.Future] = {}
+
+    def _count(self, leader: bool) -> None:
+        metrics.increment(f"singleflight.{self.name}.calls")
+        metrics.increment(
+            f"singleflight.{self.name}.{'executions' if leader else 'coalesced'}"
+        )
+
+    def do(
+        self, key: Hashable, fn: Callable[[], T], timeout: Optional[float] = None
+    ) -> T:
+        """Run ``fn`` unless a call for ``key`` is in flight, then share it.
+
+        Raises:
+            TimeoutError: If the call in flight did not complete within
+                ``timeout`` seconds (the call itself goes on)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        self._count(leader)
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError(f"Call in flight for over {timeout:g}s")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await ``fn()`` unless a call for ``key`` is in flight, then share it.
+
+        Calls are only coalesced within the same event loop. A cancelled
+        follower does not cancel the leader's call.
+        """
+        loop = asyncio.get_running_loop()
+        loop_key = (id(loop), key)
+        with self._lock:
+            future = self._futures.get(loop_key)
+            leader = future is None
+            if leader:
+                future = self._futures[loop_key] = loop.create_future()
+        self._count(leader)
+
+        if not leader:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    # The leader was cancelled, not us: run the call again
+                    return await self.do_async(key, fn)
+                raise
+
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Followers retrieve the exception; avoid "never retrieved" warnings
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._futures[loop_key]
@@ -0,0 +1,183 @@
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+import anyio.to_thread
+from anyio import CapacityLimiter
+from anyio.lowlevel import RunVar
+
+from app.core.config import Settings, settings
+from app.core.metrics import metrics
+from app.core.settings_provider import settings_provider
+from app.core.tracing import TracedRoute
+
+T = TypeVar("T")
+Endpoint = TypeVar("Endpoint", bound=Callable[..., Any])
+
+READ_METHODS = frozenset({"GET", "HEAD"})
+
+
+class DefaultThreadpool:
+    """AnyIO's default worker thread limiter, sized by ``THREADPOOL_SIZE``.
+
+    It runs the sync endpoints outside of bulkheads and the sync dependencies
+    of all routes. The limiter belongs to the event loop, so it is only sized
+    (and then tracked) once the loop runs, from the application's lifespan.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._limiter: Optional[CapacityLimiter] = None
+        metrics.register_collector(self.stats)
+
+    def configure(self, size: int) -> None:
+        """Size the running event loop's default limiter."""
+        self.size = size
+        self._limiter = anyio.to_thread.current_default_thread_limiter()
+        self._limiter.total_tokens = size
+
+    def stats(self) -> Dict[str, float]:
+        """Size of the threadpool, and its calls running and queued."""
+        if self._limiter is None:
+            return {}
+        statistics = self._limiter.statistics()
+        return {
+            "threadpool.default.size": self.size,
+            "threadpool.default.running": statistics.borrowed_tokens,
+            "threadpool.default.queued": statistics.tasks_waiting,
+        }
+
+
+class Bulkhead:
+    """Worker threads reserved for one class of sync endpoints.
+
+    Endpoints in a bulkhead run on its own capacity limiter rather than on the
+    default one, so that a burst of slow calls in one bulkhead (e.g. writes
+    waiting on the database lock) cannot take the threads of another (reads).
+    Calls beyond ``size`` queue for a thread of their bulkhead.
+
+    Limiters are bound to an event loop: one is created per loop on first use,
+    and resized on the loop when ``size`` changes.
+    """
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+        self.running = 0
+        self.queued = 0
+        self._lock = threading.Lock()
+        self._limiters: RunVar[CapacityLimiter] = RunVar(f"bulkhead_{name}")
+        metrics.register_collector(self.stats)
+
+    def resize(self, size: int) -> None:
+        """Change the number of threads, applied to the limiters on next use."""
+        self.size = size
+
+    def limiter(self) -> CapacityLimiter:
+        """The running event loop's limiter for this bulkhead."""
+        try:
+            limiter = self._limiters.get()
+        except LookupError:
+            limiter = CapacityLimiter(self.size)
+            self._limiters.set(limiter)
+        if limiter.total_tokens != self.size:
+            limiter.total_tokens = self.size
+        return limiter
+
+    async def run_sync(self, func: Callable[[], T]) -> T:
+        """Call ``func`` in a worker thread of this bulkhead."""
+        enqueued = time.monotonic()
+        started = False
+
+        def run() -> T:
+            nonlocal started
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                started = True
+            metrics.observe(
+                f"threadpool.{self.name}.queue_wait_seconds",
+                time.monotonic() - enqueued,
+            )
+            try:
+                return func()
+            finally:
+                with self._lock:
+                    self.running -= 1
+
+        with self._lock:
+            self.queued += 1
+        try:
+            return await anyio.to_thread.run_sync(run, limiter=self.limiter())
+        finally:
+            if not started:  # Cancelled while waiting for a thread
+                with self._lock:
+                    self.queued -= 1
+
+    def wrap(self, endpoint: Endpoint) -> Endpoint:
+        """Turn a sync endpoint into an async one calling it in this bulkhead.
+
+        The wrapper keeps the endpoint's signature, for FastAPI to resolve its
+        parameters and dependencies as before.
+        """
+
+        @functools.wraps(endpoint)
+        async def run_in_bulkhead(*args, **kwargs):
+            return await self.run_sync(functools.partial(endpoint, *args, **kwargs))
+
+        run_in_bulkhead.bulkhead = self
+        return run_in_bulkhead
+
+    def stats(self) -> Dict[str, float]:
+        """Size of the bulkhead, and its calls running and queued."""
+        return {
+            f"threadpool.{self.name}.size": self.size,
+            f"threadpool.{self.name}.running": self.running,
+            f"threadpool.{self.name}.queued": self.queued,
+        }
+
+
+def in_bulkhead(bulkhead: Bulkhead) -> Callable[[Endpoint], Endpoint]:
+    """Run a sync endpoint in the given bulkhead, whatever its HTTP methods.
+
+    For routes that only read despite their method, e.g. a search by POST.
+    """
+
+    def mark(endpoint: Endpoint) -> Endpoint:
+        endpoint.bulkhead = bulkhead
+        return endpoint
+
+    return mark
+
+
+class BulkheadRoute(TracedRoute):
+    """Route running its sync endpoint in the read or write bulkhead.
+
+    GET and HEAD routes read, others write, unless the endpoint is marked
+    with ``in_bulkhead``. Async endpoints run on the event loop as usual.
+    The endpoint's span includes the wait for a thread.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        if not inspect.iscoroutinefunction(endpoint):
+            methods = {method.upper() for method in kwargs.get("methods") or ()}
+            bulkhead = getattr(endpoint, "bulkhead", None) or (
+                read_bulkhead if methods <= READ_METHODS else write_bulkhead
+            )
+            endpoint = bulkhead.wrap(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def configure_bulkheads(settings: Settings) -> None:
+    """Apply the (reloaded) bulkhead sizes."""
+    read_bulkhead.resize(settings.READ_THREADPOOL_SIZE)
+    write_bulkhead.resize(settings.WRITE_THREADPOOL_SIZE)
+
+
+# Create global threadpool and bulkheads, sized by the global settings
+default_threadpool = DefaultThreadpool(settings.THREADPOOL_SIZE)
+read_bulkhead = Bulkhead("read", settings.READ_THREADPOOL_SIZE)
+write_bulkhead = Bulkhead("write", settings.WRITE_THREADPOOL_SIZE)
+settings_provider.subscribe(lambda settings, _: configure_bulkheads(settings))
@@ -0,0 +1,442 @@
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, TypeVar
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import Settings, settings
+from app.core.metrics import metrics
+from app.core.settings_provider import settings_provider
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+C = TypeVar("C", bound=type)
+
+# Span kinds, as named by OpenTelemetry
+SERVER = "SPAN_KIND_SERVER"
+INTERNAL = "SPAN_KIND_INTERNAL"
+CLIENT = "SPAN_KIND_CLIENT"
+
+# SQL statements are recorded up to this length
+MAX_STATEMENT_LENGTH = 2000
+
+TRACEPARENT = re.compile(r"([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})")
+
+
+class Span:
+    """A timed operation of a trace, modelled after OpenTelemetry spans.
+
+    Exported (by ``to_dict``) with the field names of OTLP/JSON, except that
+    attributes are a plain object rather than a list of typed key/values.
+    """
+
+    __slots__ = (
+        "attributes",
+        "end_ns",
+        "error",
+        "kind",
+        "name",
+        "parent_id",
+        "span_id",
+        "start_ns",
+        "trace_id",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        kind: str = INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        """End the span, failed if given an error, and queue it for export."""
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        span_exporter.export(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "status": (
+                {"code": "STATUS_CODE_ERROR", "message": self.error}
+                if self.error
+                else {"code": "STATUS_CODE_OK"}
+            ),
+        }
+
+
+# Span being run by the current request, copied into its threadpool threads;
+# None when the request is not sampled (or outside of requests)
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Dict[str, Any]]:
+    """The trace id, parent span id and sampled flag of a W3C ``traceparent``.
+
+    Returns None if the header is missing or invalid.
+    """
+    match = TRACEPARENT.fullmatch((value or "").strip().lower())
+    if match is None:
+        return None
+    version, trace_id, parent_id, flags = match.groups()
+    if version == "ff" or set(trace_id) == {"0"} or set(parent_id) == {"0"}:
+        return None
+    return {
+        "trace_id": trace_id,
+        "parent_id": parent_id,
+        "sampled": bool(int(flags, 16) & 1),
+    }
+
+
+def start_trace(
+    name: str,
+    traceparent: Optional[str],
+    sample_rate: float,
+    attributes: Optional[Dict[str, Any]] = None,
+) -> Optional[Span]:
+    """Start the server span of a request, or None if it is not sampled.
+
+    A request carrying a valid ``traceparent`` continues that trace, and is
+    sampled if its caller sampled it. Other requests start a new trace,
+    sampled with a probability of ``sample_rate``.
+    """
+    parent = parse_traceparent(traceparent)
+    if parent is None:
+        if random.random() >= sample_rate:
+            return None
+        return Span(name, f"{random.getrandbits(128):032x}", None, SERVER, attributes)
+    if not parent["sampled"]:
+        return None
+    return Span(name, parent["trace_id"], parent["parent_id"], SERVER, attributes)
+
+
+def start_span(
+    name: str, kind: str = INTERNAL, attributes: Optional[Dict[str, Any]] = None
+) -> Optional[Span]:
+    """Start a child of the current span, or None if no trace is sampled.
+
+    The span does not become the current one; see ``span`` for that.
+    """
+    parent = current_span.get()
+    if parent is None:
+        return None
+    return Span(name, parent.trace_id, parent.span_id, kind, attributes)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Run the enclosed code in a child span of the current one, if any."""
+    value = start_span(name, attributes=attributes)
+    if value is None:
+        yield None
+        return
+    token = current_span.set(value)
+    try:
+        yield value
+    except BaseException as e:
+        value.end(e)
+        raise
+    finally:
+        current_span.reset(token)
+        value.end()
+
+
+def traced(func: F, name: Optional[str] = None) -> F:
+    """Run each call of a (sync or async) function in a span.
+
+    The span is named after the function (``Class.method`` for methods) unless
+    another name is given.
+    """
+    name = name or func.__qualname__
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def run_async(*args, **kwargs):
+            if current_span.get() is None:
+                return await func(*args, **kwargs)
+            with span(name):
+                return await func(*args, **kwargs)
+
+        wrapper = run_async
+    else:
+
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            if current_span.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+
+        wrapper = run
+    wrapper.traced = True
+    return wrapper
+
+
+def trace_methods(cls: C) -> C:
+    """Trace the public methods defined by a class (not the inherited ones)."""
+    for name, attribute in list(vars(cls).items()):
+        if (
+            name.startswith("_")
+            or not inspect.isfunction(attribute)
+            or getattr(attribute, "traced", False)
+        ):
+            continue
+        setattr(cls, name, traced(attribute))
+    return cls
+
+
+class TracedRoute(APIRoute):
+    """Route running its endpoint in a span, e.g. ``users.get_user``.
+
+    Compared to the request's span, it tells how long the request took to be
+    routed, validated and serialized.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        if not getattr(endpoint, "traced", False):
+            module = endpoint.__module__.rsplit(".", 1)[-1]
+            endpoint = traced(endpoint, f"{module}.{endpoint.__name__}")
+        super().__init__(path, endpoint, **kwargs)
+
+
+def install_sql_tracing(engine: Engine) -> None:
+    """Record the statements run for sampled requests as client spans."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_statement_span(conn, cursor, statement, parameters, context, many):
+        if context is None:
+            return
+        context.trace_span = start_span(
+            statement.split(None, 1)[0].upper() if statement.strip() else "SQL",
+            kind=CLIENT,
+            attributes={
+                "db.system": engine.dialect.name,
+                "db.statement": statement[:MAX_STATEMENT_LENGTH],
+            },
+        )
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def end_statement_span(conn, cursor, statement, parameters, context, many):
+        value = getattr(context, "trace_span", None)
+        if value is not None:
+            value.end()
+
+    @event.listens_for(engine, "handle_error")
+    def fail_statement_span(context):
+        value = getattr(context.execution_context, "trace_span", None)
+        if value is not None:
+            value.end(context.original_exception)
+
+
+class SpanExporter:
+    """Write ended spans, one JSON object per line, from a background thread.
+
+    Spans are queued (at most ``queue_size``, the excess is dropped and
+    counted) so requests never wait on the file. The file is rotated when it
+    would exceed ``max_bytes``, keeping ``backup_count`` previous files
+    (``spans.jsonl.1`` being the most recent). The worker processes of a
+    server can share the file: each one reopens it once another rotated it.
+    Spans ended while the exporter is stopped are discarded.
+    """
+
+    def __init__(
+        self,
+        path: str = settings.TRACING_FILE,
+        max_bytes: int = settings.TRACING_FILE_MAX_BYTES,
+        backup_count: int = settings.TRACING_FILE_BACKUP_COUNT,
+        queue_size: int = settings.TRACING_QUEUE_SIZE,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._queue: queue.Queue[Optional[Span]] = queue.Queue(queue_size)
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self, value: Span) -> None:
+        if self._thread is None:
+            return
+        try:
+            self._queue.put_nowait(value)
+        except queue.Full:
+            metrics.increment("tracing.dropped_spans")
+
+    def start(self) -> None:
+        """Start the writing thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._loop, name="span-exporter", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write the queued spans, then stop the writing thread."""
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _loop(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        file = open(self.path, "a", encoding="utf-8")
+        try:
+            while True:
+                batch: List[Optional[Span]] = [self._queue.get()]
+                while batch[-1] is not None:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                spans = [value for value in batch if value is not None]
+                try:
+                    file = self._write(file, spans)
+                except Exception:
+                    metrics.increment("tracing.dropped_spans", len(spans))
+                    logger.exception("Failed to export %d spans", len(spans))
+                if batch[-1] is None:
+                    return
+        finally:
+            file.close()
+
+    def _write(self, file: TextIO, spans: List[Span]) -> TextIO:
+        """Append the spans, rotating the file first if they would not fit.
+
+        Returns the file to write to next, which changes once rotated (here or
+        by another process writing to the same path).
+        """
+        lines = "".join(
+            json.dumps(value.to_dict(), default=str) + "\n" for value in spans
+        )
+        try:
+            rotated = os.stat(self.path).st_ino != os.fstat(file.fileno()).st_ino
+        except FileNotFoundError:
+            rotated = True
+        if not rotated:
+            size = os.fstat(file.fileno()).st_size
+            if size and size + len(lines) > self.max_bytes:
+                self._rotate()
+                rotated = True
+        if rotated:
+            file.close()
+            file = open(self.path, "a", encoding="utf-8")
+        file.write(lines)
+        file.flush()
+        metrics.increment("tracing.exported_spans", len(spans))
+        return file
+
+    def _rotate(self) -> None:
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+class TracingMiddleware:
+    """ASGI middleware tracing sampled requests.
+
+    Each sampled request gets a server span (named after its method and route
+    once routed, e.g. ``GET /api/v1/users/{user_id}``) that its handler,
+    service, repository and SQL spans are children of. Requests continue the
+    trace of their ``traceparent`` header, if any; others are sampled at
+    ``TRACING_SAMPLE_RATE``.
+    """
+
+    def __init__(self, app: ASGIApp, settings: Settings):
+        self.app = app
+        self.configure(settings)
+        if settings is settings_provider.settings:
+            settings_provider.subscribe_component(self)
+
+    def configure(self, settings: Settings) -> None:
+        """Apply the (reloaded) sample rate."""
+        self.sample_rate = settings.TRACING_SAMPLE_RATE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        traceparent = None
+        for name, value in scope.get("headers", []):
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+        method = scope["method"]
+        root = start_trace(
+            f"{method} {scope['path']}",
+            traceparent,
+            self.sample_rate,
+            {"http.request.method": method, "url.path": scope["path"]},
+        )
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_traced(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.response.status_code", message["status"])
+            await send(message)
+
+        error: Optional[BaseException] = None
+        token = current_span.set(root)
+        try:
+            await self.app(scope, receive, send_traced)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            current_span.reset(token)
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                root.name = f"{method} {route}"
+                root.set_attribute("http.route", route)
+            status = root.attributes.get("http.response.status_code", 0)
+            if error is None and status >= 500:
+                error = RuntimeError(f"HTTP {status}")
+            root.end(error)
+
+
+# Create global span exporter, started from the application lifespan
+span_exporter = SpanExporter()
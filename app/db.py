@@ -1,16 +1,108 @@
+import os
+import threading
+from typing import Dict, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from app.core.config import settings
+from app.core.deadlines import install_deadline_handler
+from app.core.tracing import install_sql_tracing
+
+# Engines are created lazily, once per process and database URL: connections
+# must never be shared between a pre-forking server's master and its workers.
+_engines: Dict[str, Engine] = {}
+_engines_pid: Optional[int] = None
+_engine_lock = threading.Lock()
+_database_url: Optional[str] = None
+
+
+def create_db_engine(database_url: str) -> Engine:
+    """Create an engine with the options this application needs."""
+    is_sqlite = database_url.startswith("sqlite")
+    engine = create_engine(
+        database_url,
+        connect_args={"check_same_thread": False} if is_sqlite else {},
+    )
+    if is_sqlite:
+        install_deadline_handler(engine)
+    install_sql_tracing(engine)
+    return engine
+
+
+def get_engine(database_url: Optional[str] = None) -> Engine:
+    """Get this process's engine for a database, creating it on first use.
+
+    Defaults to the application database (``DATABASE_URL``).
+    """
+    global _engines, _engines_pid
+    url = database_url or _database_url or settings.DATABASE_URL
+    pid = os.getpid()
+    with _engine_lock:
+        if _engines_pid != pid:
+            # Inherited from the parent process: drop its connections without
+            # closing them, they still belong to the parent
+            for engine in _engines.values():
+                engine.dispose(close=False)
+            _engines, _engines_pid = {}, pid
+        if url not in _engines:
+            _engines[url] = create_db_engine(url)
+        return _engines[url]
+
+
+def configure_engine(database_url: Optional[str] = None) -> None:
+    """Use another application database URL, the engine is created on next use.
+
+    Nothing happens when the URL is already the one in use.
+    """
+    global _database_url
+    if (database_url or settings.DATABASE_URL) == (
+        _database_url or settings.DATABASE_URL
+    ):
+        return
+    dispose_engine()
+    with _engine_lock:
+        _engines.clear()
+        _database_url = database_url
+
+
+def dispose_engine() -> None:
+    """Close this process's pooled connections, e.g. on shutdown."""
+    if _engines_pid == os.getpid():
+        for engine in list(_engines.values()):
+            engine.dispose()
+
+
+def _reset_engine_after_fork() -> None:
+    global _engines, _engines_pid, _engine_lock
+    # The lock may have been held by another thread of the parent at fork time
+    _engine_lock = threading.Lock()
+    for engine in _engines.values():
+        engine.dispose(close=False)
+    _engines, _engines_pid = {}, None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_engine_after_fork)
+
+
+def __getattr__(name: str):
+    # Keep ``from app.db import engine`` working, resolved to this process's engine
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class LazySessionMaker(sessionmaker):
+    """Session factory binding new sessions to the current process's engine."""
+
+    def __call__(self, **local_kw):
+        local_kw.setdefault("bind", get_engine())
+        return super().__call__(**local_kw)
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False}
-    if settings.DATABASE_URL.startswith("sqlite")
-    else {},
-)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = LazySessionMaker(autocommit=False, autoflush=False)
 
 Base = declarative_base()
 
@@ -1,25 +1,143 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+
+from app.core import config
+from app.core.admission import AdmissionControlMiddleware
+from app.core.cache_versions import cache_versions
+from app.core.config import Settings
+from app.core.deadlines import DeadlineExceededError, DeadlineMiddleware
+from app.core.response_cache import ResponseCacheMiddleware
+from app.core.settings_provider import configure_logging, settings_provider
+from app.core.threadpool import default_threadpool
+from app.core.tracing import TracingMiddleware, span_exporter
+from app.db import configure_engine, dispose_engine
+from app.routers import admin, system, users
+from app.services.job_runner import job_runner
+from app.services.maintenance import maintenance_scheduler
+from app.services.readiness import readiness_prober
+from app.services.single_writer import WriteQueueFullError, single_writer
+from app.services.write_batcher import write_batcher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the background services with the application and stop them after.
+
+    With a pre-forking server this runs in each worker process, after the fork.
+    """
+    default_threadpool.configure(app.state.settings.THREADPOOL_SIZE)
+    if app.state.settings.TRACING_ENABLED:
+        span_exporter.start()
+    if app.state.settings.JOBS_ENABLED:
+        job_runner.start()
+    if app.state.settings.MAINTENANCE_ENABLED:
+        maintenance_scheduler.start()
+    if app.state.settings.READINESS_PROBE_ENABLED:
+        readiness_prober.start()
+    if app.state.settings.SETTINGS_RELOAD_ENABLED:
+        settings_provider.start()
+    if (
+        app.state.settings.RESPONSE_CACHE_ENABLED
+        and app.state.settings.CACHE_VERSION_POLL_INTERVAL_MS > 0
+    ):
+        cache_versions.start()
+    try:
+        yield
+    finally:
+        settings_provider.stop()
+        cache_versions.stop()
+        readiness_prober.stop()
+        maintenance_scheduler.stop()
+        job_runner.stop()
+        write_batcher.stop()
+        single_writer.stop()
+        span_exporter.stop()
+        dispose_engine()
+
+
+async def write_queue_full_handler(request: Request, exc: WriteQueueFullError):
+    """Shed writes while the single writer's queue is full."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))},
+    )
+
+
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceededError):
+    """Answer requests whose work was aborted by their deadline."""
+    return JSONResponse(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT, content={"detail": str(exc)}
+    )
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """Create the application.
+
+    ``settings`` (default: the global settings) configure the middleware and
+    the routes, which get them through the ``get_settings`` dependency, as do
+    the services built for each request. Resources shared by the whole process
+    follow the settings they were created or started with instead: the
+    database engine (a different ``DATABASE_URL`` replaces it process-wide),
+    the background services and the thread pools. Reloaded ``.env`` values
+    only apply to the global settings.
+
+    Nothing connects to the database here: each process creates its own engine
+    on first use, so the app can be created (or preloaded) before the server
+    forks its workers, e.g. ``uvicorn --factory app.main:create_app`` or
+    ``gunicorn --preload -k uvicorn.workers.UvicornWorker "app.main:create_app()"``.
+    """
+    settings = settings or config.settings
+    configure_engine(settings.DATABASE_URL)
+
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        description=settings.PROJECT_DESCRIPTION,
+        version=settings.VERSION,
+        openapi_url=f"{settings.API_V1_STR}/openapi.json",
+        lifespan=lifespan,
+    )
+    app.state.settings = settings
+    configure_logging(settings)
+
+    # Admit requests only while the service keeps up (inside CORS, so that
+    # rejections still carry the CORS headers)
+    if settings.ADMISSION_CONTROL_ENABLED:
+        app.add_middleware(AdmissionControlMiddleware, settings=settings)
+
+    # Abort the queries of requests past their deadline, or whose client left
+    app.add_middleware(DeadlineMiddleware, settings=settings)
+
+    # Serve repeated GETs from memory, before admission control and deadlines
+    if settings.RESPONSE_CACHE_ENABLED:
+        app.add_middleware(ResponseCacheMiddleware, settings=settings)
+
+    # Set up CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.BACKEND_CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Trace sampled requests through all of the above, outermost
+    if settings.TRACING_ENABLED:
+        app.add_middleware(TracingMiddleware, settings=settings)
+
+    app.add_exception_handler(WriteQueueFullError, write_queue_full_handler)
+    app.add_exception_handler(DeadlineExceededError, deadline_exceeded_handler)
+
+    # Include routers
+    app.include_router(users.router, prefix=settings.API_V1_STR)
+    app.include_router(system.router, prefix=settings.API_V1_STR)
+    app.include_router(admin.router, prefix=settings.API_V1_STR)
+    return app
+
 
-from app.core.config import settings
-from app.routers import system, users
-
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    description=settings.PROJECT_DESCRIPTION,
-    version=settings.VERSION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json",
-)
-
-# Set up CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.BACKEND_CORS_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(users.router, prefix=settings.API_V1_STR)
-app.include_router(system.router, prefix=settings.API_V1_STR)
+# Default application, for ``uvicorn app.main:app``
+app = create_app()
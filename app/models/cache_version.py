@@ -0,0 +1,39 @@
+from sqlalchemy import DDL, Column, Integer, String, Table, event
+
+from app.db import Base
+
+
+class CacheVersion(Base):
+    """Version of a table, bumped by triggers on every write to it.
+
+    Lets each process notice the writes of the others, see
+    ``app.core.cache_versions``.
+    """
+
+    __tablename__ = "cache_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+def version_trigger_sql(table: str, operation: str) -> str:
+    """SQLite trigger bumping the table's version on an INSERT/UPDATE/DELETE."""
+    return (
+        f"CREATE TRIGGER IF NOT EXISTS {table}_{operation.lower()}_cache_version "
+        f"AFTER {operation} ON {table} BEGIN "
+        f"INSERT INTO cache_versions (name, version) VALUES ('{table}', 1) "
+        f"ON CONFLICT (name) DO UPDATE SET version = version + 1; "
+        f"END"
+    )
+
+
+def track_versions(table: Table) -> None:
+    """Create the version triggers along with the table (the migrations do too)."""
+    for operation in ("INSERT", "UPDATE", "DELETE"):
+        event.listen(
+            table,
+            "after_create",
+            DDL(version_trigger_sql(table.name, operation)).execute_if(
+                dialect="sqlite"
+            ),
+        )
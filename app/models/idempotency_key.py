@@ -0,0 +1,24 @@
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, String, func
+
+from app.db import Base
+
+
+class IdempotencyKey(Base):
+    """A client-supplied key and the response of the first request sent with it.
+
+    ``status_code`` and ``body`` are NULL while that request is in flight. Its
+    claim on the key lasts until ``locked_until``: past that, the request is
+    presumed lost (e.g. its process crashed) and a retry may take the key over.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)
+    request_hash = Column(String, nullable=False)
+    status_code = Column(Integer, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    created_at = Column(
+        DateTime, nullable=False, server_default=func.current_timestamp()
+    )
+    expires_at = Column(DateTime, nullable=False, index=True)
+    locked_until = Column(DateTime, nullable=True)
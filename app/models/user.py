@@ -3,6 +3,8 @@ from datetime import datetime, timezone
 from sqlalchemy import Column, DateTime, Integer, String
 
 from app.db import Base
+from app.models.cache_version import track_versions
+from app.models.user_change import track_changes
 
 
 class User(Base):
@@ -13,3 +15,11 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # Incremented by every update, for optimistic concurrency control (ETag)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+
+# Let other processes notice writes to users, e.g. to invalidate their caches
+track_versions(User.__table__)
+# Log every write to users for the delta-sync API
+track_changes(User.__table__)
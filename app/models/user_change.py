@@ -0,0 +1,61 @@
+from sqlalchemy import DDL, Column, DateTime, Integer, String, Table, event, func
+
+from app.db import Base
+
+
+class UserChange(Base):
+    """Append-only log of the writes to users, filled by triggers.
+
+    ``seq`` only ever grows (AUTOINCREMENT), even once old changes are
+    compacted, so clients can use it as a cursor.
+    """
+
+    __tablename__ = "user_changes"
+    __table_args__ = ({"sqlite_autoincrement": True},)
+
+    seq = Column(Integer, primary_key=True)
+    operation = Column(String, nullable=False)  # create, update or delete
+    user_id = Column(Integer, nullable=False)
+    # State of the user after the change, NULL for deletes
+    name = Column(String, nullable=True)
+    email = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=True)
+    changed_at = Column(
+        DateTime, nullable=False, server_default=func.current_timestamp(), index=True
+    )
+
+
+# Trigger event, logged operation and the row holding the user's new state
+CHANGE_TRIGGERS = (
+    ("INSERT", "create", "NEW"),
+    ("UPDATE", "update", "NEW"),
+    ("DELETE", "delete", None),
+)
+
+
+def change_trigger_sql(event_name: str, operation: str, row: str) -> str:
+    """SQLite trigger logging an INSERT/UPDATE/DELETE of users."""
+    values = (
+        f"{row}.id, {row}.name, {row}.email, {row}.created_at"
+        if row
+        else "OLD.id, NULL, NULL, NULL"
+    )
+    return (
+        f"CREATE TRIGGER IF NOT EXISTS users_{operation}_change "
+        f"AFTER {event_name} ON users BEGIN "
+        "INSERT INTO user_changes (operation, user_id, name, email, created_at) "
+        f"VALUES ('{operation}', {values}); "
+        "END"
+    )
+
+
+def track_changes(table: Table) -> None:
+    """Create the change log triggers along with the users table."""
+    for event_name, operation, row in CHANGE_TRIGGERS:
+        event.listen(
+            table,
+            "after_create",
+            DDL(change_trigger_sql(event_name, operation, row)).execute_if(
+                dialect="sqlite"
+            ),
+        )
@@ -1,8 +1,11 @@
-from typing import Generic, List, Optional, Type, TypeVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Generic, List, Optional, Sequence, Tuple, Type, TypeVar
 
 from pydantic import BaseModel
+from sqlalchemy import delete, func, insert, select, update
 from sqlalchemy.orm import Session
 
+from app.core.tracing import trace_methods
 from app.db import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
@@ -11,15 +14,54 @@ UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
 class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Traced like the base methods, for sampled requests (see app.core.tracing)
+        trace_methods(cls)
+
     def __init__(self, model: Type[ModelType], db: Session):
         self.model = model
         self.db = db
 
-    def get(self, id: int) -> Optional[ModelType]:
-        return self.db.query(self.model).filter(self.model.id == id).first()
+    def _query(self, fields: Optional[Sequence[str]] = None):
+        """Query whole entities, or only the given columns when fields are set."""
+        if fields:
+            return self.db.query(*(getattr(self.model, name) for name in fields))
+        return self.db.query(self.model)
+
+    def get(self, id: int, fields: Optional[Sequence[str]] = None) -> Optional[Any]:
+        return self._query(fields).filter(self.model.id == id).first()
+
+    def get_all(self, fields: Optional[Sequence[str]] = None) -> List[Any]:
+        return self._query(fields).all()
+
+    def get_many_by(
+        self, key: str, values: Sequence[Any], fields: Optional[Sequence[str]] = None
+    ) -> List[Any]:
+        """Get the entities whose ``key`` column matches any of ``values``.
+
+        Uses a single ``IN`` query and returns the results in the order of the
+        requested values, skipping values that matched nothing. When fields are
+        given the ``key`` column is always selected so callers can tell which
+        values were found.
+        """
+        values = list(dict.fromkeys(values))
+        if not values:
+            return []
+        if fields and key not in fields:
+            fields = (key, *fields)
+        column = getattr(self.model, key)
+        found = {
+            getattr(row, key): row
+            for row in self._query(fields).filter(column.in_(values))
+        }
+        return [found[value] for value in values if value in found]
 
-    def get_all(self) -> List[ModelType]:
-        return self.db.query(self.model).all()
+    def get_many(
+        self, ids: Sequence[int], fields: Optional[Sequence[str]] = None
+    ) -> List[Any]:
+        """Get the entities for the given ids in one query, in requested order."""
+        return self.get_many_by("id", ids, fields=fields)
 
     def create(self, schema: CreateSchemaType) -> ModelType:
         db_obj = self.model(**schema.model_dump())
@@ -28,6 +70,14 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         self.db.refresh(db_obj)
         return db_obj
 
+    def create_many(self, schemas: Sequence[CreateSchemaType]) -> int:
+        """Insert many entities with a single statement in one transaction."""
+        if not schemas:
+            return 0
+        self.db.execute(insert(self.model), [schema.model_dump() for schema in schemas])
+        self.db.commit()
+        return len(schemas)
+
     def update(self, id: int, schema: UpdateSchemaType) -> Optional[ModelType]:
         db_obj = self.get(id)
         if db_obj:
@@ -44,3 +94,74 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             self.db.commit()
             return True
         return False
+
+    def _dry_run(
+        self, criteria: Sequence[Any], return_ids: bool
+    ) -> Tuple[int, Optional[List[int]]]:
+        """Count (and list) the entities matching the criteria without writing."""
+        if return_ids:
+            ids = list(
+                self.db.scalars(
+                    select(self.model.id).where(*criteria).order_by(self.model.id)
+                )
+            )
+            return len(ids), ids
+        count = self.db.scalar(
+            select(func.count()).select_from(self.model).where(*criteria)
+        )
+        return count, None
+
+    def _execute_bulk(
+        self, statement, return_ids: bool
+    ) -> Tuple[int, Optional[List[int]]]:
+        statement = statement.execution_options(synchronize_session=False)
+        if return_ids:
+            ids = sorted(self.db.scalars(statement.returning(self.model.id)))
+            self.db.commit()
+            return len(ids), ids
+        result = self.db.execute(statement)
+        self.db.commit()
+        return result.rowcount, None
+
+    def rollback(self) -> None:
+        """Roll back the current transaction, e.g. after a failed write."""
+        self.db.rollback()
+
+    def bulk_update(
+        self,
+        criteria: Sequence[Any],
+        values: Dict[str, Any],
+        return_ids: bool = False,
+        dry_run: bool = False,
+    ) -> Tuple[int, Optional[List[int]]]:
+        """Update every entity matching the criteria with one UPDATE statement.
+
+        Returns the number of affected entities and, if requested, their ids.
+        In dry-run mode nothing is written and the matching entities are
+        reported instead.
+        """
+        if dry_run:
+            return self._dry_run(criteria, return_ids)
+        if hasattr(self.model, "updated_at"):
+            values = {"updated_at": datetime.now(timezone.utc), **values}
+        if hasattr(self.model, "version"):
+            values = {**values, "version": self.model.version + 1}
+        statement = update(self.model).where(*criteria).values(**values)
+        return self._execute_bulk(statement, return_ids)
+
+    def bulk_delete(
+        self,
+        criteria: Sequence[Any],
+        return_ids: bool = False,
+        dry_run: bool = False,
+    ) -> Tuple[int, Optional[List[int]]]:
+        """Delete every entity matching the criteria with one DELETE statement.
+
+        Returns the number of deleted entities and, if requested, their ids.
+        """
+        if dry_run:
+            return self._dry_run(criteria, return_ids)
+        return self._execute_bulk(delete(self.model).where(*criteria), return_ids)
+
+
+trace_methods(BaseRepository)
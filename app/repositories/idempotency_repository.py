@@ -0,0 +1,101 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+from sqlalchemy import delete, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.idempotency_key import IdempotencyKey
+from app.repositories.base import BaseRepository
+
+
+class IdempotencyRepository(BaseRepository[IdempotencyKey, BaseModel, BaseModel]):
+    """Repository for idempotency keys and their stored responses.
+
+    Every method commits, so that other requests (and processes) see a key as
+    soon as it is claimed.
+    """
+
+    def __init__(self, db: Session):
+        super().__init__(IdempotencyKey, db)
+
+    def get_key(self, key: str, now: datetime) -> Optional[IdempotencyKey]:
+        """Get an unexpired key, reading the latest committed state."""
+        self.db.commit()  # End the current transaction, not to read a stale one
+        return (
+            self.db.query(self.model)
+            .filter(self.model.key == key, self.model.expires_at > now)
+            .populate_existing()
+            .first()
+        )
+
+    def claim(
+        self,
+        key: str,
+        request_hash: str,
+        now: datetime,
+        expires_at: datetime,
+        locked_until: datetime,
+    ) -> bool:
+        """Record a key as in flight, returning False if it is already taken.
+
+        Expired keys (this one included) are deleted first.
+        """
+        self.db.execute(delete(self.model).where(self.model.expires_at <= now))
+        self.db.add(
+            self.model(
+                key=key,
+                request_hash=request_hash,
+                expires_at=expires_at,
+                locked_until=locked_until,
+            )
+        )
+        try:
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            return False
+        return True
+
+    def take_over(
+        self, key: str, request_hash: str, now: datetime, locked_until: datetime
+    ) -> bool:
+        """Claim a key whose in-flight request outlived its lock, if still so.
+
+        Returns False if the request completed, or another one took it over.
+        """
+        result = self.db.execute(
+            update(self.model)
+            .where(
+                self.model.key == key,
+                self.model.request_hash == request_hash,
+                self.model.status_code.is_(None),
+                or_(
+                    self.model.locked_until.is_(None),
+                    self.model.locked_until <= now,
+                ),
+            )
+            .values(locked_until=locked_until)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return result.rowcount == 1
+
+    def complete(self, key: str, status_code: int, body: bytes) -> None:
+        """Store the response of a claimed key."""
+        self.db.execute(
+            update(self.model)
+            .where(self.model.key == key)
+            .values(status_code=status_code, body=body, locked_until=None)
+        )
+        self.db.commit()
+
+    def release(self, key: str) -> None:
+        """Forget a claimed key whose request failed, so it can be retried."""
+        self.db.execute(
+            delete(self.model).where(
+                self.model.key == key, self.model.status_code.is_(None)
+            )
+        )
+        self.db.commit()
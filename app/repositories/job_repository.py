@@ -0,0 +1,152 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.models.job import Job
+from app.repositories.base import BaseRepository
+from app.schemas.job import JobCreate, JobStatus
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class JobRepository(BaseRepository[Job, JobCreate, BaseModel]):
+    """Repository for background jobs.
+
+    State transitions are single conditional ``UPDATE`` statements, so several
+    workers (or processes) can race for the same job and only one wins.
+    """
+
+    def __init__(self, db: Session):
+        super().__init__(Job, db)
+
+    def list(self, status: Optional[JobStatus] = None, limit: int = 100) -> List[Job]:
+        """List the most recent jobs, optionally only those in a given status"""
+        query = self.db.query(self.model)
+        if status:
+            query = query.filter(self.model.status == status.value)
+        return query.order_by(self.model.id.desc()).limit(limit).all()
+
+    def _due(self) -> Any:
+        """Criterion of jobs whose retry backoff, if any, is over"""
+        return or_(self.model.not_before.is_(None), self.model.not_before <= utcnow())
+
+    def queued_ids(self) -> List[int]:
+        """Get the ids of all queued jobs that are due, oldest first"""
+        rows = (
+            self.db.query(self.model.id)
+            .filter(self.model.status == JobStatus.QUEUED.value, self._due())
+            .order_by(self.model.id)
+            .all()
+        )
+        return [row.id for row in rows]
+
+    def _transition(self, id: int, *criteria: Any, **values: Any) -> bool:
+        """Update a job if it matches the criteria, returning whether it did"""
+        result = self.db.execute(
+            update(self.model)
+            .where(self.model.id == id, *criteria)
+            .values(updated_at=utcnow(), **values)
+        )
+        self.db.commit()
+        return result.rowcount == 1
+
+    def claim(self, id: int, runner_id: str) -> bool:
+        """Mark a queued job as running for the given runner, once it is due"""
+        now = utcnow()
+        return self._transition(
+            id,
+            self.model.status == JobStatus.QUEUED.value,
+            self._due(),
+            status=JobStatus.RUNNING.value,
+            attempts=self.model.attempts + 1,
+            runner_id=runner_id,
+            heartbeat_at=now,
+            started_at=now,
+            error=None,
+        )
+
+    def report_progress(self, id: int, progress: float) -> bool:
+        """Store a running job's progress, returning whether it should go on"""
+        self._transition(
+            id, self.model.status == JobStatus.RUNNING.value, progress=progress
+        )
+        return (
+            not self.db.query(self.model.cancel_requested)
+            .filter(self.model.id == id)
+            .scalar()
+        )
+
+    def heartbeat(self, ids: List[int]) -> None:
+        """Record that the given running jobs are still alive"""
+        if ids:
+            self.db.execute(
+                update(self.model)
+                .where(self.model.id.in_(ids))
+                .values(heartbeat_at=utcnow())
+            )
+            self.db.commit()
+
+    def finish(
+        self,
+        id: int,
+        status: JobStatus,
+        result: Any = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        """Move a running job to a final state"""
+        values = {"result": result, "error": error, "finished_at": utcnow()}
+        if status == JobStatus.SUCCEEDED:
+            values["progress"] = 1.0
+        return self._transition(
+            id,
+            self.model.status == JobStatus.RUNNING.value,
+            status=status.value,
+            **values,
+        )
+
+    def retry(self, id: int, error: str, delay: float) -> bool:
+        """Put a failed running job back in the queue, due after ``delay``"""
+        return self._transition(
+            id,
+            self.model.status == JobStatus.RUNNING.value,
+            status=JobStatus.QUEUED.value,
+            error=error,
+            runner_id=None,
+            not_before=utcnow() + timedelta(seconds=delay),
+        )
+
+    def request_cancel(self, id: int) -> Optional[Job]:
+        """Cancel a queued job, or ask a running job to stop"""
+        cancelled = self._transition(
+            id,
+            self.model.status == JobStatus.QUEUED.value,
+            status=JobStatus.CANCELLED.value,
+            cancel_requested=True,
+            finished_at=utcnow(),
+        )
+        if not cancelled:
+            self._transition(
+                id, self.model.status == JobStatus.RUNNING.value, cancel_requested=True
+            )
+        job = self.get(id)
+        if job is not None:
+            self.db.refresh(job)
+        return job
+
+    def requeue_stale(self, stale_after: float) -> int:
+        """Requeue running jobs whose runner stopped sending heartbeats"""
+        result = self.db.execute(
+            update(self.model)
+            .where(
+                self.model.status == JobStatus.RUNNING.value,
+                self.model.heartbeat_at < utcnow() - timedelta(seconds=stale_after),
+            )
+            .values(status=JobStatus.QUEUED.value, runner_id=None, updated_at=utcnow())
+        )
+        self.db.commit()
+        return result.rowcount
@@ -0,0 +1,313 @@
+import heapq
+import zlib
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+from operator import attrgetter
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import get_engine
+from app.models.user import User
+from app.repositories.user_repository import UserRepository
+from app.schemas.user import UserCreate, UserFilter, UserUpdate
+
+
+class PartialCommitError(Exception):
+    """A bulk insert committed in some shards only.
+
+    ``committed`` holds the users stored, ``failed`` those rolled back.
+    """
+
+    def __init__(
+        self, message: str, committed: List[UserCreate], failed: List[UserCreate]
+    ):
+        super().__init__(message)
+        self.committed = committed
+        self.failed = failed
+
+
+class ShardedUserRepository:
+    """User repository partitioning users across several databases (shards).
+
+    A user lives in shard ``id % N``. New users are placed in the shard picked
+    by a stable hash of their email and get an id congruent to it, allocated
+    in the insert statement itself, so operations on one user by id or email
+    go to a single shard. Lists are gathered from every shard and merged by
+    id. Emails are unique across shards: creates and email changes check the
+    other shards, and concurrent creates of one email race on the unique index
+    of its home shard. The check takes no lock, so an email change racing with
+    a create or change of the same email in another shard can register it twice.
+
+    Every operation uses short-lived sessions and commits on its own, so
+    bulk operations are atomic per shard only. The number of shards must not
+    change once users are stored.
+    """
+
+    model = User
+
+    def __init__(self, database_urls: Sequence[str]):
+        if not database_urls:
+            raise ValueError("At least one shard is required")
+        self.database_urls = list(database_urls)
+
+    @property
+    def shard_count(self) -> int:
+        return len(self.database_urls)
+
+    def shard_for_id(self, id: int) -> int:
+        return id % self.shard_count
+
+    def shard_for_email(self, email: str) -> int:
+        return zlib.crc32(email.encode("utf-8")) % self.shard_count
+
+    @contextmanager
+    def _repository(self, shard: int) -> Iterator[UserRepository]:
+        """A repository on a new session of one shard, closed afterwards.
+
+        Objects it returns stay usable (detached, with their loaded attributes).
+        """
+        db = Session(
+            bind=get_engine(self.database_urls[shard]),
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        try:
+            yield UserRepository(db)
+        finally:
+            db.close()
+
+    def _each_shard(self) -> Iterator[UserRepository]:
+        for shard in range(self.shard_count):
+            with self._repository(shard) as repository:
+                yield repository
+
+    def rollback(self) -> None:
+        """Nothing to do: failed operations roll back their own sessions."""
+
+    def get(self, id: int, fields: Optional[Sequence[str]] = None) -> Optional[Any]:
+        with self._repository(self.shard_for_id(id)) as repository:
+            return repository.get(id, fields=fields)
+
+    def get_all(self, fields: Optional[Sequence[str]] = None) -> List[Any]:
+        """Get the users of all shards, merged in id order."""
+        if fields and "id" not in fields:
+            fields = ("id", *fields)
+        results = [
+            repository._query(fields).order_by(User.id).all()
+            for repository in self._each_shard()
+        ]
+        return list(heapq.merge(*results, key=attrgetter("id")))
+
+    def get_many(
+        self, ids: Sequence[int], fields: Optional[Sequence[str]] = None
+    ) -> List[Any]:
+        """Get the users for the given ids, one query per shard, in requested order."""
+        ids = list(dict.fromkeys(ids))
+        by_shard: Dict[int, List[int]] = {}
+        for id in ids:
+            by_shard.setdefault(self.shard_for_id(id), []).append(id)
+        found = {}
+        for shard, shard_ids in by_shard.items():
+            with self._repository(shard) as repository:
+                for row in repository.get_many(shard_ids, fields=fields):
+                    found[row.id] = row
+        return [found[id] for id in ids if id in found]
+
+    def get_by_email(
+        self, email: str, fields: Optional[Sequence[str]] = None
+    ) -> Optional[Any]:
+        """Get a user by email, from its home shard first.
+
+        A user whose email changed may live in another shard.
+        """
+        home = self.shard_for_email(email)
+        for shard in [home, *(s for s in range(self.shard_count) if s != home)]:
+            with self._repository(shard) as repository:
+                user = repository.get_by_email(email, fields=fields)
+            if user is not None:
+                return user
+        return None
+
+    def get_many_by_email(
+        self, emails: Sequence[str], fields: Optional[Sequence[str]] = None
+    ) -> List[Any]:
+        """Get the users with the given emails, one query per shard."""
+        emails = list(dict.fromkeys(emails))
+        if not emails:
+            return []
+        found = {}
+        for repository in self._each_shard():
+            for row in repository.get_many_by_email(emails, fields=fields):
+                found[row.email] = row
+        return [found[email] for email in emails if email in found]
+
+    def _check_email_available(self, email: str, id: Optional[int] = None) -> None:
+        owner = self.get_by_email(email, fields=("id",))
+        if owner is not None and owner.id != id:
+            raise ValueError(f"Email {email} already registered")
+
+    def _insert(self, db: Session, shard: int, values: Dict[str, Any]) -> int:
+        """Insert a user with the next id of the shard, returning that id."""
+        next_id = func.coalesce(func.max(User.id), shard) + self.shard_count
+        columns = list(values)
+        statement = (
+            insert(User)
+            .from_select(
+                ["id", *columns],
+                select(next_id, *(literal(values[c]) for c in columns)),
+            )
+            .returning(User.id)
+        )
+        return db.execute(statement).scalar_one()
+
+    def create(self, schema: UserCreate) -> User:
+        """Create a new user in its home shard, with email uniqueness check"""
+        self._check_email_available(schema.email)
+        now = datetime.now(timezone.utc)
+        shard = self.shard_for_email(schema.email)
+        with self._repository(shard) as repository:
+            try:
+                id = self._insert(
+                    repository.db,
+                    shard,
+                    {**schema.model_dump(), "created_at": now, "updated_at": now},
+                )
+                repository.db.commit()
+            except IntegrityError as e:
+                repository.db.rollback()
+                raise ValueError(f"Email {schema.email} already registered") from e
+            return repository.get(id)
+
+    def create_many(self, schemas: Sequence[UserCreate]) -> int:
+        """Insert many users, committing every shard only if all inserts succeed.
+
+        Shards are committed one after the other, so a commit failing after
+        others succeeded is not undone there: the shards left are rolled back.
+
+        Raises:
+            IntegrityError: If an insert failed; no shard was committed
+            PartialCommitError: If a commit failed after others succeeded
+        """
+        if not schemas:
+            return 0
+        now = datetime.now(timezone.utc)
+        by_shard: Dict[int, List[UserCreate]] = {}
+        for schema in schemas:
+            by_shard.setdefault(self.shard_for_email(schema.email), []).append(schema)
+        with ExitStack() as stack:
+            sessions: List[Tuple[Session, List[UserCreate]]] = []
+            try:
+                for shard, shard_schemas in by_shard.items():
+                    db = stack.enter_context(self._repository(shard)).db
+                    sessions.append((db, shard_schemas))
+                    # A concurrent create taking one of these ids fails the
+                    # whole call with an IntegrityError, like an email conflict
+                    last_id = db.scalar(select(func.coalesce(func.max(User.id), shard)))
+                    db.execute(
+                        insert(User),
+                        [
+                            {
+                                **schema.model_dump(),
+                                "id": last_id + self.shard_count * (i + 1),
+                                "created_at": now,
+                                "updated_at": now,
+                            }
+                            for i, schema in enumerate(shard_schemas)
+                        ],
+                    )
+            except IntegrityError:
+                for db, _ in sessions:
+                    db.rollback()
+                raise
+            for i, (db, _) in enumerate(sessions):
+                try:
+                    db.commit()
+                except Exception as e:
+                    for db, _ in sessions[i:]:
+                        db.rollback()
+                    if i == 0:
+                        raise
+                    raise PartialCommitError(
+                        f"Commit failed after {i} of {len(sessions)} shards: {e}",
+                        committed=[s for _, group in sessions[:i] for s in group],
+                        failed=[s for _, group in sessions[i:] for s in group],
+                    ) from e
+        return len(schemas)
+
+    def update(
+        self, id: int, schema: UserUpdate, expected_version: Optional[int] = None
+    ) -> Optional[User]:
+        """Update a user in place, with email uniqueness check
+
+        The check does not lock the email in the other shards (see the class).
+        """
+        if schema.email is not None:
+            self._check_email_available(schema.email, id)
+        with self._repository(self.shard_for_id(id)) as repository:
+            return repository.update(id, schema, expected_version)
+
+    def delete(self, id: int) -> bool:
+        with self._repository(self.shard_for_id(id)) as repository:
+            return repository.delete(id)
+
+    def filter_criteria(self, user_filter: UserFilter) -> List[Any]:
+        """Translate a bulk operation filter into SQL criteria"""
+        return UserRepository(None).filter_criteria(user_filter)
+
+    def bulk_update(
+        self,
+        criteria: Sequence[Any],
+        values: Dict[str, Any],
+        return_ids: bool = False,
+        dry_run: bool = False,
+    ) -> Tuple[int, Optional[List[int]]]:
+        """Update the matching users of every shard, one statement per shard."""
+        return self._merge_bulk(
+            repository.bulk_update(
+                criteria, values, return_ids=return_ids, dry_run=dry_run
+            )
+            for repository in self._each_shard()
+        )
+
+    def bulk_delete(
+        self,
+        criteria: Sequence[Any],
+        return_ids: bool = False,
+        dry_run: bool = False,
+    ) -> Tuple[int, Optional[List[int]]]:
+        """Delete the matching users of every shard, one statement per shard."""
+        return self._merge_bulk(
+            repository.bulk_delete(criteria, return_ids=return_ids, dry_run=dry_run)
+            for repository in self._each_shard()
+        )
+
+    @staticmethod
+    def _merge_bulk(
+        results: Iterator[Tuple[int, Optional[List[int]]]],
+    ) -> Tuple[int, Optional[List[int]]]:
+        affected, ids = 0, None
+        for count, shard_ids in results:
+            affected += count
+            if shard_ids is not None:
+                ids = sorted((ids or []) + shard_ids)
+        return affected, ids
+
+
+def get_user_repository(
+    db: Session, shard_urls: Optional[List[str]] = None
+) -> Union[UserRepository, ShardedUserRepository]:
+    """The user repository for the configured storage.
+
+    Users are sharded across ``shard_urls`` (default: ``USER_SHARD_URLS``)
+    when set, otherwise they are stored in the application database through
+    ``db``.
+    """
+    if shard_urls is None:
+        shard_urls = settings.USER_SHARD_URLS
+    if shard_urls:
+        return ShardedUserRepository(shard_urls)
+    return UserRepository(db)
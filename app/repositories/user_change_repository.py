@@ -0,0 +1,52 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.models.user_change import UserChange
+from app.repositories.base import BaseRepository
+
+
+class UserChangeRepository(BaseRepository[UserChange, BaseModel, BaseModel]):
+    """Repository for the user change log.
+
+    The log is written by triggers on the users table, in the same transaction
+    as the writes themselves; this repository only reads and compacts it.
+    """
+
+    def __init__(self, db: Session):
+        super().__init__(UserChange, db)
+
+    def get_since(self, since: int, limit: int) -> List[UserChange]:
+        """Get up to ``limit`` changes after the ``since`` sequence, in order."""
+        return (
+            self.db.query(self.model)
+            .filter(self.model.seq > since)
+            .order_by(self.model.seq)
+            .limit(limit)
+            .all()
+        )
+
+    def bounds(self) -> Tuple[Optional[int], Optional[int]]:
+        """Get the oldest and latest retained sequences (None if the log is empty)."""
+        oldest, latest = self.db.execute(
+            select(func.min(self.model.seq), func.max(self.model.seq))
+        ).one()
+        return oldest, latest
+
+    def compact(self, before: datetime) -> int:
+        """Delete the changes made before the given time, returning how many.
+
+        The latest change is always kept, so the retained range (and whether a
+        cursor is older than it) stays known.
+        """
+        latest = select(func.max(self.model.seq)).scalar_subquery()
+        result = self.db.execute(
+            delete(self.model).where(
+                self.model.changed_at < before, self.model.seq < latest
+            )
+        )
+        self.db.commit()
+        return result.rowcount
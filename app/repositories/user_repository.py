@@ -1,22 +1,116 @@
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Sequence
 
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.models.user import User
 from app.repositories.base import BaseRepository
-from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.user import UserCreate, UserFilter, UserUpdate
+
+
+class VersionMismatchError(Exception):
+    """Raised when a conditional update finds the user at another version."""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"User is at version {current_version}")
+        self.current_version = current_version
+
+
+def is_email_conflict(error: IntegrityError) -> bool:
+    """Whether an integrity error violates the uniqueness of user emails."""
+    message = str(error.orig).lower()
+    return "unique" in message and "email" in message
 
 
 class UserRepository(BaseRepository[User, UserCreate, UserUpdate]):
     def __init__(self, db: Session):
         super().__init__(User, db)
 
-    def get_by_email(self, email: str) -> Optional[User]:
+    def get_by_email(
+        self, email: str, fields: Optional[Sequence[str]] = None
+    ) -> Optional[Any]:
         """Get a user by their email address"""
-        return self.db.query(self.model).filter(self.model.email == email).first()
+        return self._query(fields).filter(self.model.email == email).first()
+
+    def get_many_by_email(
+        self, emails: Sequence[str], fields: Optional[Sequence[str]] = None
+    ) -> List[Any]:
+        """Get the users with the given email addresses in one query"""
+        return self.get_many_by("email", emails, fields=fields)
+
+    def filter_criteria(self, user_filter: UserFilter) -> List[Any]:
+        """Translate a bulk operation filter into SQL criteria"""
+        criteria = []
+        if user_filter.ids is not None:
+            criteria.append(self.model.id.in_(user_filter.ids))
+        if user_filter.created_after is not None:
+            criteria.append(self.model.created_at >= user_filter.created_after)
+        if user_filter.created_before is not None:
+            criteria.append(self.model.created_at < user_filter.created_before)
+        if user_filter.email_domain is not None:
+            criteria.append(
+                self.model.email.like(f"%@{user_filter.email_domain.lower()}")
+            )
+        return criteria
 
     def create(self, schema: UserCreate) -> User:
         """Create a new user, with email uniqueness check"""
         if self.get_by_email(schema.email):
             raise ValueError(f"Email {schema.email} already registered")
         return super().create(schema)
+
+    def update(
+        self, id: int, schema: UserUpdate, expected_version: Optional[int] = None
+    ) -> Optional[User]:
+        """Update a user with a single UPDATE statement, bumping its version.
+
+        With ``expected_version``, the user is only updated if it is still at
+        that version (``UPDATE ... WHERE id = ? AND version = ?``), so that
+        concurrent updates based on the same read cannot overwrite each other.
+        The updated row is read back with ``RETURNING``; the user is only read
+        separately when the update did not apply, to tell why.
+
+        Raises:
+            ValueError: If the new email is already registered
+            VersionMismatchError: If the user is at another version
+            IntegrityError: On any other constraint violation
+        """
+        values = schema.model_dump(exclude_unset=True)
+        if values.get("email") is not None:
+            owner = self.get_by_email(values["email"], fields=("id",))
+            if owner is not None and owner.id != id:
+                raise ValueError(f"Email {values['email']} already registered")
+        criteria = [self.model.id == id]
+        if expected_version is not None:
+            criteria.append(self.model.version == expected_version)
+        statement = (
+            update(self.model)
+            .where(*criteria)
+            .values(
+                **values,
+                updated_at=datetime.now(timezone.utc),
+                version=self.model.version + 1,
+            )
+            .returning(self.model)
+            .execution_options(populate_existing=True)
+        )
+        try:
+            user = self.db.scalars(statement).first()
+        except IntegrityError as e:
+            self.db.rollback()
+            if "email" in values and is_email_conflict(e):
+                raise ValueError(f"Email {values['email']} already registered") from e
+            raise
+        if user is None:
+            current = self.get(id, fields=("version",))
+            # End the transaction of the UPDATE, which holds the write lock
+            self.db.rollback()
+            if current is not None and expected_version is not None:
+                raise VersionMismatchError(current.version)
+            return None
+        # Keep the returned state loaded, instead of expiring it on commit
+        self.db.expunge(user)
+        self.db.commit()
+        return user
@@ -0,0 +1,141 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+
+from app.core.config import Settings, get_settings
+from app.core.tracing import TracedRoute
+from app.routers.users import get_user_service
+from app.schemas.maintenance import MaintenanceReport
+from app.schemas.user import BulkOperationResult, UserBulkDelete, UserBulkUpdate
+from app.services.maintenance import (
+    MaintenanceInProgressError,
+    MaintenanceScheduler,
+    maintenance_scheduler,
+)
+from app.services.user_service import UserService
+
+
+def require_admin_token(
+    x_admin_token: Optional[str] = Header(None),
+    settings: Settings = Depends(get_settings),  # noqa: B008
+) -> None:
+    """Dependency guarding admin endpoints with the ``X-Admin-Token`` header.
+
+    Admin endpoints are closed to everyone until ``ADMIN_API_TOKEN`` is
+    configured.
+    """
+    expected = settings.ADMIN_API_TOKEN
+    if not expected:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin endpoints are disabled: ADMIN_API_TOKEN is not set",
+        )
+    if not secrets.compare_digest(x_admin_token or "", expected):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token"
+        )
+
+
+def get_maintenance_scheduler() -> MaintenanceScheduler:
+    """Dependency to get the application's maintenance scheduler."""
+    return maintenance_scheduler
+
+
+router = APIRouter(
+    route_class=TracedRoute,
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin_token)],
+    responses={
+        status.HTTP_403_FORBIDDEN: {"description": "Invalid admin token"},
+    },
+)
+
+
+@router.post(
+    "/users/bulk-update",
+    response_model=BulkOperationResult,
+    status_code=status.HTTP_200_OK,
+    summary="Bulk Update Users",
+    description=(
+        "Update every user matching a filter with a single UPDATE statement in "
+        "one transaction. Use `dry_run` to only report what would be affected."
+    ),
+    response_description="The number (and optionally the IDs) of affected users.",
+)
+def bulk_update_users(
+    request: UserBulkUpdate,
+    service: UserService = Depends(get_user_service),  # noqa: B008
+):
+    """
+    Update all users matching a filter.
+
+    Parameters:
+    - filter: ids, created_after, created_before and/or email_domain
+    - changes: Values to set on every matching user
+    - dry_run: Report the matching users without updating them
+    - return_ids: Also return the IDs of the affected users
+    """
+    return service.bulk_update_users(
+        request.filter,
+        request.changes,
+        dry_run=request.dry_run,
+        return_ids=request.return_ids,
+    )
+
+
+@router.post(
+    "/users/bulk-delete",
+    response_model=BulkOperationResult,
+    status_code=status.HTTP_200_OK,
+    summary="Bulk Delete Users",
+    description=(
+        "Delete every user matching a filter with a single DELETE statement in "
+        "one transaction. Use `dry_run` to only report what would be affected."
+    ),
+    response_description="The number (and optionally the IDs) of deleted users.",
+)
+def bulk_delete_users(
+    request: UserBulkDelete,
+    service: UserService = Depends(get_user_service),  # noqa: B008
+):
+    """
+    Delete all users matching a filter.
+
+    Parameters:
+    - filter: ids, created_after, created_before and/or email_domain
+    - dry_run: Report the matching users without deleting them
+    - return_ids: Also return the IDs of the deleted users
+    """
+    return service.bulk_delete_users(
+        request.filter, dry_run=request.dry_run, return_ids=request.return_ids
+    )
+
+
+@router.post(
+    "/maintenance",
+    response_model=MaintenanceReport,
+    status_code=status.HTTP_200_OK,
+    summary="Run Database Maintenance",
+    description=(
+        "Run the scheduled SQLite maintenance now: ANALYZE / PRAGMA optimize, "
+        "incremental vacuum and WAL checkpoint of every database."
+    ),
+    response_description="What was done on each database and how long it took.",
+    responses={
+        status.HTTP_409_CONFLICT: {"description": "Maintenance already running"},
+    },
+)
+def run_maintenance(
+    scheduler: MaintenanceScheduler = Depends(get_maintenance_scheduler),  # noqa: B008
+):
+    """
+    Maintain the databases now, e.g. after deleting many users.
+
+    Returns the file size and free pages of each database before and after.
+    """
+    try:
+        return scheduler.run()
+    except MaintenanceInProgressError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e)) from e
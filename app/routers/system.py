@@ -1,12 +1,28 @@
-import os
+from typing import List, Optional
 
-from dotenv import dotenv_values
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
 
-from app.core.config import settings
-from app.schemas.system import ConfigResponse, HealthCheck
+from app.core.config import Settings, get_settings
+from app.core.metrics import metrics
+from app.core.settings_provider import settings_provider
+from app.core.tracing import TracedRoute
+from app.db import get_db
+from app.repositories.job_repository import JobRepository
+from app.routers.admin import require_admin_token
+from app.schemas.job import Job, JobCreate, JobStatus
+from app.schemas.system import (
+    ConfigResponse,
+    HealthCheck,
+    MetricsResponse,
+    ReadinessResponse,
+)
+from app.services.job_runner import JobRunner, job_runner
+from app.services.readiness import ReadinessProber, readiness_prober
 
 router = APIRouter(
+    route_class=TracedRoute,
     prefix="/system",
     tags=["system"],
     responses={
@@ -23,7 +39,7 @@ router = APIRouter(
     summary="System Health Check",
     description="Returns the current health status of the system and its version.",
 )
-def healthcheck():
+def healthcheck(settings: Settings = Depends(get_settings)):  # noqa: B008
     """
     Perform a health check of the system.
 
@@ -34,6 +50,52 @@ def healthcheck():
     return {"status": "ok", "version": settings.VERSION}
 
 
+def get_readiness_prober() -> ReadinessProber:
+    """Dependency to get the application's ReadinessProber."""
+    return readiness_prober
+
+
+@router.get(
+    "/ready",
+    response_model=ReadinessResponse,
+    status_code=status.HTTP_200_OK,
+    summary="System Readiness Check",
+    description=(
+        "Returns whether the system's dependencies are usable, from the last "
+        "background probe."
+    ),
+    responses={
+        status.HTTP_503_SERVICE_UNAVAILABLE: {
+            "model": ReadinessResponse,
+            "description": "A dependency check failed",
+        }
+    },
+)
+def readiness(
+    prober: ReadinessProber = Depends(get_readiness_prober),  # noqa: B008
+):
+    """
+    Report the readiness of the system, for load balancers and orchestrators.
+
+    The checks run in the background every READINESS_PROBE_INTERVAL_SECONDS,
+    so this endpoint never waits on a slow dependency.
+
+    Returns:
+        - status: "ready", or "degraded" (with HTTP 503) if a check failed
+        - checked_at: When the checks last ran
+        - age_seconds: Time since the checks last ran
+        - checks: Database reachability, connection pool usage, migration
+          revision and free disk space of each database
+    """
+    report = prober.report()
+    if report.status != "ready":
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content=report.model_dump(mode="json"),
+        )
+    return report
+
+
 @router.get(
     "/config",
     response_model=ConfigResponse,
@@ -45,7 +107,7 @@ def healthcheck():
     ),
     response_description="Current system configuration and environment settings.",
 )
-def get_config():
+def get_config(settings: Settings = Depends(get_settings)):  # noqa: B008
     """
     Retrieve the current system configuration.
 
@@ -54,6 +116,9 @@ def get_config():
     - Current environment variables (from .env file)
     - Active system settings
 
+    The .env file is parsed again only when it changed, which also applies
+    its tunable settings (see RELOADABLE_SETTINGS) without a restart.
+
     Note: Sensitive values may be redacted in production.
 
     Returns:
@@ -61,15 +126,142 @@ def get_config():
         - env_file_contents: Contents of the .env file if it exists
         - current_settings: Active configuration settings
     """
-    # Read .env file directly
-    env_values = dotenv_values(".env") if os.path.exists(".env") else {}
-
     return {
-        "env_file_exists": os.path.exists(".env"),
-        "env_file_contents": env_values,
+        "env_file_exists": settings_provider.env_exists(),
+        "env_file_contents": settings_provider.env_values(),
         "current_settings": {
             "version": settings.VERSION,
             "project_name": settings.PROJECT_NAME,
             "database_url": settings.DATABASE_URL,
         },
     }
+
+
+@router.get(
+    "/metrics",
+    response_model=MetricsResponse,
+    status_code=status.HTTP_200_OK,
+    summary="System Metrics",
+    description="Returns the current values of the in-process application metrics.",
+)
+def get_metrics():
+    """
+    Retrieve the application metrics.
+
+    Returns:
+        - metrics: Counters, gauges and timings keyed by their dotted name
+    """
+    return {"metrics": metrics.snapshot()}
+
+
+def get_job_runner() -> JobRunner:
+    """Dependency to get the application's JobRunner."""
+    return job_runner
+
+
+@router.post(
+    "/jobs",
+    response_model=Job,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Submit Job",
+    description="Queue a long-running operation to be run by the background workers.",
+    response_description="The queued job.",
+    # Jobs run privileged operations (e.g. reading server files): admins only
+    dependencies=[Depends(require_admin_token)],
+    responses={status.HTTP_403_FORBIDDEN: {"description": "Invalid admin token"}},
+)
+def submit_job(
+    job: JobCreate,
+    db: Session = Depends(get_db),  # noqa: B008
+    runner: JobRunner = Depends(get_job_runner),  # noqa: B008
+):
+    """
+    Submit a background job.
+
+    Parameters:
+    - type: Registered job type (e.g. "users.import")
+    - payload: Job type specific parameters
+    - max_attempts: Attempts before the job is marked as failed
+
+    Raises:
+    - HTTP 422: If the job type is unknown or its payload invalid
+    """
+    try:
+        return runner.submit(db, job)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        ) from e
+
+
+@router.get(
+    "/jobs",
+    response_model=List[Job],
+    status_code=status.HTTP_200_OK,
+    summary="List Jobs",
+    description="List the most recent background jobs, newest first.",
+    dependencies=[Depends(require_admin_token)],
+    responses={status.HTTP_403_FORBIDDEN: {"description": "Invalid admin token"}},
+)
+def list_jobs(
+    job_status: Optional[JobStatus] = Query(None, alias="status"),  # noqa: B008
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),  # noqa: B008
+):
+    """List background jobs, optionally filtered by status."""
+    return JobRepository(db).list(status=job_status, limit=limit)
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=Job,
+    status_code=status.HTTP_200_OK,
+    summary="Get Job",
+    description="Poll the status, progress and result of a background job.",
+    dependencies=[Depends(require_admin_token)],
+    responses={status.HTTP_403_FORBIDDEN: {"description": "Invalid admin token"}},
+)
+def get_job(job_id: int, db: Session = Depends(get_db)):  # noqa: B008
+    """
+    Retrieve a background job.
+
+    Raises:
+    - HTTP 404: If the job does not exist
+    """
+    job = JobRepository(db).get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found"
+        )
+    return job
+
+
+@router.post(
+    "/jobs/{job_id}/cancel",
+    response_model=Job,
+    status_code=status.HTTP_200_OK,
+    summary="Cancel Job",
+    description=(
+        "Cancel a queued job, or ask a running job to stop at its next progress "
+        "report. Finished jobs are left unchanged."
+    ),
+    dependencies=[Depends(require_admin_token)],
+    responses={status.HTTP_403_FORBIDDEN: {"description": "Invalid admin token"}},
+)
+def cancel_job(
+    job_id: int,
+    db: Session = Depends(get_db),  # noqa: B008
+    runner: JobRunner = Depends(get_job_runner),  # noqa: B008
+):
+    """
+    Cancel a background job.
+
+    Raises:
+    - HTTP 404: If the job does not exist
+    """
+    job = runner.cancel(db, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found"
+        )
+    return job
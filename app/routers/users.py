@@ -1,15 +1,58 @@
-from typing import List
+import re
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, AsyncIterator, List, Mapping, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
+from app.core.broadcast import BroadcastEvent, SlowConsumerError
+from app.core.config import Settings, get_settings
+from app.core.threadpool import BulkheadRoute, in_bulkhead, read_bulkhead
 from app.db import get_db
-from app.schemas import User, UserCreate
-from app.services.user_service import UserService
+from app.repositories.sharded_user_repository import get_user_repository
+from app.repositories.user_repository import VersionMismatchError
+from app.schemas import User, UserBatchGet, UserBatchResult, UserCreate
+from app.schemas.user import (
+    USER_FIELDS,
+    ImportFormat,
+    UserChangesPage,
+    UserImportResult,
+    UserUpdate,
+    get_user_projection,
+    parse_user_fields,
+    user_adapter,
+    user_list_adapter,
+)
+from app.services.idempotency import (
+    IdempotencyKeyInProgressError,
+    IdempotencyKeyMismatchError,
+    IdempotencyService,
+    StoredResponse,
+    request_hash,
+)
+from app.services.single_writer import single_writer
+from app.services.user_change_service import ResyncRequiredError, UserChangeService
+from app.services.user_import_service import UserImportService
+from app.services.user_service import UserService, user_events
+from app.services.write_batcher import write_batcher
 
+# Sync endpoints run in the read or write bulkhead (see app.core.threadpool)
 router = APIRouter(
     prefix="/users",
     tags=["users"],
+    route_class=BulkheadRoute,
     responses={
         status.HTTP_404_NOT_FOUND: {"description": "User not found"},
         status.HTTP_409_CONFLICT: {"description": "Email already registered"},
@@ -17,9 +60,161 @@ router = APIRouter(
 )
 
 
-def get_user_service(db: Session = Depends(get_db)) -> UserService:  # noqa: B008
+def get_user_service(
+    db: Session = Depends(get_db),  # noqa: B008
+    settings: Settings = Depends(get_settings),  # noqa: B008
+) -> UserService:
     """Dependency to get UserService instance."""
-    return UserService(db=db)
+    # Batched and single-writer writes go to DATABASE_URL, not to user shards
+    unsharded = not settings.USER_SHARD_URLS
+    return UserService(
+        repository=get_user_repository(db, settings.USER_SHARD_URLS),
+        db=db,
+        write_batcher=write_batcher
+        if settings.WRITE_BATCHING_ENABLED and unsharded
+        else None,
+        writer=single_writer if settings.SINGLE_WRITER_ENABLED and unsharded else None,
+        coalesce_lookups=settings.USER_LOOKUP_COALESCING,
+    )
+
+
+def get_user_import_service(
+    db: Session = Depends(get_db),  # noqa: B008
+    settings: Settings = Depends(get_settings),  # noqa: B008
+) -> UserImportService:
+    """Dependency to get UserImportService instance."""
+    return UserImportService(db=db, chunk_size=settings.IMPORT_CHUNK_SIZE)
+
+
+def get_user_change_service(
+    db: Session = Depends(get_db),  # noqa: B008
+    settings: Settings = Depends(get_settings),  # noqa: B008
+) -> UserChangeService:
+    """Dependency to get UserChangeService instance."""
+    if settings.USER_SHARD_URLS:
+        # Each shard logs its own changes, with its own sequence
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="The change log is not available when users are sharded",
+        )
+    return UserChangeService(db=db)
+
+
+def get_idempotency_service(
+    db: Session = Depends(get_db),  # noqa: B008
+    settings: Settings = Depends(get_settings),  # noqa: B008
+) -> IdempotencyService:
+    """Dependency to get IdempotencyService instance."""
+    return IdempotencyService(
+        db=db,
+        ttl=timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+        wait=settings.IDEMPOTENCY_WAIT_SECONDS,
+        lock=timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+    )
+
+
+def get_fields(
+    fields: Optional[str] = Query(
+        None,
+        description=(
+            "Comma separated list of fields to return "
+            f"(any of: {', '.join(USER_FIELDS)}). Defaults to all fields."
+        ),
+        examples=["id,email"],
+    ),
+) -> Optional[Tuple[str, ...]]:
+    """Dependency to parse and validate the sparse fieldset query parameter."""
+    try:
+        return parse_user_fields(fields)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        ) from e
+
+
+def get_ids(
+    ids: Optional[str] = Query(
+        None,
+        description=(
+            "Comma separated list of user IDs to fetch in a single query. "
+            "IDs that do not exist are listed in the `X-Missing-Ids` header."
+        ),
+        examples=["1,2,3"],
+    ),
+    settings: Settings = Depends(get_settings),  # noqa: B008
+) -> Optional[List[int]]:
+    """Dependency to parse the multi-get ``ids`` query parameter."""
+    if ids is None:
+        return None
+    try:
+        parsed = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="ids must be a comma separated list of integers",
+        ) from e
+    check_batch_size(len(parsed), settings.USER_BATCH_MAX_SIZE)
+    return parsed
+
+
+def check_batch_size(size: int, max_size: int) -> None:
+    """Reject multi-get requests that are empty or larger than allowed."""
+    if not 0 < size <= max_size:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Batch must contain between 1 and {max_size} ids/emails",
+        )
+
+
+def project_users(rows, fields: Tuple[str, ...]) -> List[dict]:
+    """Serialize rows holding only the selected fields.
+
+    The result is meant to be wrapped in a response directly, bypassing the
+    full ``User`` response model which would reject the partial rows.
+    """
+    projection = get_user_projection(fields)
+    return [projection.model_validate(row).model_dump(mode="json") for row in rows]
+
+
+def users_response(
+    users: Any,
+    status_code: int = status.HTTP_200_OK,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """Serialize one user or a list of users straight to a JSON response.
+
+    Returned as is, it skips FastAPI's ``response_model`` handling, which would
+    validate the rows, convert them to JSON-compatible objects and encode
+    those: the precompiled adapter validates the rows and dumps them to bytes
+    in one pass instead. The ``response_model`` still documents the route.
+    """
+    adapter = user_list_adapter if isinstance(users, list) else user_adapter
+    body = adapter.dump_json(adapter.validate_python(users, from_attributes=True))
+    return Response(
+        body, status_code=status_code, headers=headers, media_type="application/json"
+    )
+
+
+def etag(user: Any) -> str:
+    """ETag of a user: its version, which every update increments."""
+    return f'"{user.version}"'
+
+
+def parse_if_match(if_match: str) -> Optional[int]:
+    """The version an ``If-Match`` header requires, None for ``*`` (any).
+
+    Weak tags are accepted as the version is the same whatever the encoding.
+    A header that cannot match any version fails the precondition.
+    """
+    if if_match.strip() == "*":
+        return None
+    match = re.fullmatch(r'\s*(?:W/)?"(\d+)"\s*', if_match)
+    if match is None:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="If-Match must be the user's ETag",
+        )
+    return int(match.group(1))
 
 
 @router.get(
@@ -27,10 +222,18 @@ def get_user_service(db: Session = Depends(get_db)) -> UserService:  # noqa: B00
     response_model=List[User],
     status_code=status.HTTP_200_OK,
     summary="Get All Users",
-    description="Retrieve a list of all registered users in the system.",
+    description=(
+        "Retrieve a list of all registered users in the system. "
+        "Use `fields` to only return (and load) a subset of the user fields."
+    ),
     response_description="List of users with their details.",
 )
-def get_users(service: UserService = Depends(get_user_service)):  # noqa: B008
+def get_users(
+    response: Response,
+    ids: Optional[List[int]] = Depends(get_ids),  # noqa: B008
+    fields: Optional[Tuple[str, ...]] = Depends(get_fields),
+    service: UserService = Depends(get_user_service),  # noqa: B008
+):
     """
     Retrieve all users from the database.
 
@@ -41,8 +244,372 @@ def get_users(service: UserService = Depends(get_user_service)):  # noqa: B008
     - Creation timestamp
 
     The list will be empty if no users are registered.
+
+    When `ids` is given only those users are returned, in the requested
+    order, and the IDs that were not found are listed in `X-Missing-Ids`.
+
+    Raises:
+    - HTTP 422: If `fields` names an unknown field or `ids` is invalid
+    """
+    if ids is None:
+        users = service.get_all_users(fields=fields)
+    else:
+        users = service.get_users_by_ids(ids, fields=fields)
+        found = {user.id for user in users}
+        missing = [
+            str(user_id) for user_id in dict.fromkeys(ids) if user_id not in found
+        ]
+        response.headers["X-Missing-Ids"] = ",".join(missing)
+    if fields:
+        return JSONResponse(project_users(users, fields), headers=response.headers)
+    return users_response(users, headers=response.headers)
+
+
+@router.post(
+    "/batch-get",
+    response_model=UserBatchResult,
+    status_code=status.HTTP_200_OK,
+    summary="Get Many Users",
+    description=(
+        "Retrieve many users by ID and/or email in a single round trip. "
+        "Users are returned in the requested order (IDs first, then emails) "
+        "and the IDs and emails that were not found are reported."
+    ),
+    response_description="The users found and the IDs/emails that were not.",
+)
+@in_bulkhead(read_bulkhead)
+def batch_get_users(
+    batch: UserBatchGet,
+    service: UserService = Depends(get_user_service),  # noqa: B008
+    settings: Settings = Depends(get_settings),  # noqa: B008
+):
+    """
+    Retrieve many users at once.
+
+    Parameters:
+    - ids: User IDs to fetch
+    - emails: User email addresses to fetch
+
+    Raises:
+    - HTTP 422: If the batch is empty or larger than `USER_BATCH_MAX_SIZE`
+    """
+    check_batch_size(len(batch.ids) + len(batch.emails), settings.USER_BATCH_MAX_SIZE)
+    by_id = service.get_users_by_ids(batch.ids) if batch.ids else []
+    by_email = service.get_users_by_emails(batch.emails) if batch.emails else []
+    found_ids = {user.id for user in by_id}
+    found_emails = {user.email for user in by_email}
+    return {
+        "users": by_id + [user for user in by_email if user.id not in found_ids],
+        "missing_ids": [i for i in dict.fromkeys(batch.ids) if i not in found_ids],
+        "missing_emails": [
+            email for email in dict.fromkeys(batch.emails) if email not in found_emails
+        ],
+    }
+
+
+@router.get(
+    "/changes",
+    response_model=UserChangesPage,
+    status_code=status.HTTP_200_OK,
+    summary="Get User Changes",
+    description=(
+        "Incrementally sync a copy of the users: get the creates, updates and "
+        "deletes made after the `since` cursor, in order, and the cursor to "
+        "continue from. Without `since`, only the current cursor is returned: "
+        "take it, fetch all users, then follow the changes from there."
+    ),
+    response_description="The changes and the next cursor.",
+    responses={
+        status.HTTP_410_GONE: {
+            "description": "Cursor too old (or unknown), fetch all users again"
+        }
+    },
+)
+def get_user_changes(
+    since: Optional[int] = Query(
+        None, ge=0, description="Sequence of the last change already applied."
+    ),
+    limit: int = Query(
+        100, ge=1, description="Max changes to return, up to USER_CHANGES_MAX_LIMIT."
+    ),
+    service: UserChangeService = Depends(get_user_change_service),  # noqa: B008
+    settings: Settings = Depends(get_settings),  # noqa: B008
+):
+    """
+    Get the changes made to users after a cursor.
+
+    Returns:
+    - changes: The changes, oldest first, with the user's new state (`null` for deletes)
+    - next_since: Cursor to pass as `since` next time
+    - has_more: Whether more changes are already available
+
+    Raises:
+    - HTTP 410: If changes after the cursor were compacted away (see
+      `USER_CHANGES_RETENTION_HOURS`): the client must resync from scratch
+    - HTTP 422: If `limit` is above `USER_CHANGES_MAX_LIMIT`
+    - HTTP 501: If users are sharded
+    """
+    if limit > settings.USER_CHANGES_MAX_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"limit must be at most {settings.USER_CHANGES_MAX_LIMIT}",
+        )
+    try:
+        return service.get_changes(since, limit)
+    except ResyncRequiredError as e:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail=str(e)) from e
+
+
+def format_event(event: BroadcastEvent) -> str:
+    """Format an event as a Server-Sent Events message."""
+    return f"id: {event.id}\nevent: {event.type}\ndata: {event.data}\n\n"
+
+
+async def stream_events(
+    last_event_id: Optional[str], heartbeat: float
+) -> AsyncIterator[str]:
+    """Stream the user events as SSE messages until the client disconnects.
+
+    Sends a ``resync`` event first when the events since ``last_event_id``
+    cannot be replayed, a comment on idle streams every ``heartbeat`` seconds,
+    and an ``evicted`` event before closing streams that fell too far behind.
+    """
+    subscription = user_events.subscribe(last_event_id)
+    try:
+        if subscription.resync:
+            yield "event: resync\ndata: {}\n\n"
+        while True:
+            try:
+                event = await subscription.get(heartbeat)
+            except SlowConsumerError:
+                yield "event: evicted\ndata: {}\n\n"
+                return
+            yield ": keep-alive\n\n" if event is None else format_event(event)
+    finally:
+        subscription.close()
+
+
+@router.get(
+    "/stream",
+    response_class=StreamingResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Stream User Changes",
+    description=(
+        "Server-Sent Events stream of the users created, updated and deleted "
+        "through this process: `user.created`, `user.updated` (data: the user), "
+        "`user.deleted` (data: its id), `users.bulk_updated` and "
+        "`users.bulk_deleted` (data: the affected count and ids). Reconnecting "
+        "clients send `Last-Event-ID` to receive the events they missed, or a "
+        "`resync` event if these are no longer available."
+    ),
+    responses={
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"description": "Too many streams"}
+    },
+)
+async def stream_user_events(
+    last_event_id: Optional[str] = Header(None),
+    settings: Settings = Depends(get_settings),  # noqa: B008
+):
+    """
+    Stream user changes.
+
+    Raises:
+    - HTTP 503: If `SSE_MAX_SUBSCRIBERS` streams are already open
+    """
+    if user_events.subscriber_count >= settings.SSE_MAX_SUBSCRIBERS:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open event streams",
+        )
+    return StreamingResponse(
+        stream_events(last_event_id, settings.SSE_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def guess_import_format(file: UploadFile) -> Optional[ImportFormat]:
+    """Guess the format of an uploaded file from its name or content type."""
+    suffix = Path(file.filename or "").suffix.lower()
+    content_type = file.content_type or ""
+    if suffix == ".csv" or content_type == "text/csv":
+        return ImportFormat.CSV
+    if suffix in (".ndjson", ".jsonl") or content_type in (
+        "application/x-ndjson",
+        "application/jsonl",
+    ):
+        return ImportFormat.NDJSON
+    return None
+
+
+@router.post(
+    "/import",
+    response_model=UserImportResult,
+    status_code=status.HTTP_200_OK,
+    summary="Import Users",
+    description=(
+        "Bulk import users from an uploaded CSV (with `name` and `email` columns) "
+        "or NDJSON file. The file is processed incrementally in chunks, each "
+        "inserted in its own transaction. Rows that cannot be imported are "
+        "written to an error report."
+    ),
+    response_description="Summary of the import.",
+)
+def import_users(
+    file: UploadFile = File(...),  # noqa: B008
+    file_format: Optional[ImportFormat] = Query(  # noqa: B008
+        None,
+        alias="format",
+        description="File format. Guessed from the file name or type if omitted.",
+    ),
+    chunk_size: Optional[int] = Query(
+        None, ge=1, le=100_000, description="Rows per chunk/transaction."
+    ),
+    service: UserImportService = Depends(get_user_import_service),  # noqa: B008
+    settings: Settings = Depends(get_settings),  # noqa: B008
+):
+    """
+    Import users from a file.
+
+    Returns:
+    - import_id: Identifier of the import, used to fetch its error report
+    - total_rows / imported / failed: Row counts
+    - error_report: Location of the error report, if any row failed
+
+    Raises:
+    - HTTP 422: If the file format is not given and cannot be guessed
+    """
+    file_format = file_format or guess_import_format(file)
+    if file_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Unable to determine the file format, please set `format`",
+        )
+    if chunk_size:
+        service.chunk_size = chunk_size
+    return service.import_users(
+        file.file, file_format, report_dir=settings.IMPORT_REPORT_DIR
+    )
+
+
+@router.get(
+    "/import/{import_id}/errors",
+    response_class=FileResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get Import Error Report",
+    description="Download the CSV report of the rows an import could not add.",
+    responses={status.HTTP_404_NOT_FOUND: {"description": "No error report"}},
+)
+def get_import_errors(
+    import_id: str,
+    settings: Settings = Depends(get_settings),  # noqa: B008
+):
+    """
+    Download an import's error report.
+
+    Raises:
+    - HTTP 404: If the import does not exist or had no errors
+    """
+    path = Path(settings.IMPORT_REPORT_DIR) / f"{import_id}.csv"
+    if not re.fullmatch("[0-9a-f]{32}", import_id) or not path.is_file():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Error report not found"
+        )
+    return FileResponse(path, media_type="text/csv", filename=path.name)
+
+
+@router.get(
+    "/{user_id}",
+    response_model=User,
+    status_code=status.HTTP_200_OK,
+    summary="Get User",
+    description=(
+        "Retrieve a single user by ID. "
+        "Use `fields` to only return (and load) a subset of the user fields."
+    ),
+    response_description="The user's details.",
+)
+def get_user(
+    user_id: int,
+    fields: Optional[Tuple[str, ...]] = Depends(get_fields),
+    service: UserService = Depends(get_user_service),  # noqa: B008
+):
+    """
+    Retrieve a user by ID.
+
+    Raises:
+    - HTTP 404: If the user does not exist
+    - HTTP 422: If `fields` names an unknown field
+    """
+    user = service.get_user(user_id, fields=fields)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+    if fields:
+        return JSONResponse(project_users([user], fields)[0])
+    return users_response(user, headers={"ETag": etag(user)})
+
+
+@router.patch(
+    "/{user_id}",
+    response_model=User,
+    status_code=status.HTTP_200_OK,
+    summary="Update User",
+    description=(
+        "Update some fields of a user. Send the `ETag` of the user as read "
+        "(from `GET /users/{user_id}`) in `If-Match` to only update it if "
+        "nobody else did meanwhile."
+    ),
+    response_description="The updated user's details.",
+    responses={
+        status.HTTP_412_PRECONDITION_FAILED: {
+            "description": "User changed since read (ETag no longer matches)"
+        }
+    },
+)
+def update_user(
+    user_id: int,
+    user: UserUpdate,
+    if_match: Optional[str] = Header(
+        None,
+        description=(
+            "ETag of the user being updated. Without it the update is "
+            "unconditional and may overwrite a concurrent one."
+        ),
+    ),
+    service: UserService = Depends(get_user_service),  # noqa: B008
+):
     """
-    return service.get_all_users()
+    Update a user.
+
+    The version check and the update are a single conditional statement, so
+    concurrent updates based on the same read cannot both succeed: the later
+    one gets a 412 and should read the user again before retrying.
+
+    Returns the updated user, with its new `ETag`.
+
+    Raises:
+    - HTTP 404: If the user does not exist
+    - HTTP 409: If the new email is already registered
+    - HTTP 412: If `If-Match` does not match the user's current `ETag`
+    """
+    expected_version = None if if_match is None else parse_if_match(if_match)
+    try:
+        updated = service.update_user(user_id, user, expected_version)
+    except VersionMismatchError as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="User was modified since it was read",
+            headers={"ETag": f'"{e.current_version}"'},
+        ) from e
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e)) from e
+    if updated is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+    return users_response(updated, headers={"ETag": etag(updated)})
 
 
 @router.post(
@@ -55,7 +622,16 @@ def get_users(service: UserService = Depends(get_user_service)):  # noqa: B008
 )
 def create_user(
     user: UserCreate,
+    idempotency_key: Optional[str] = Header(
+        None,
+        max_length=255,
+        description=(
+            "Unique key of this creation: retries sent with the same key get "
+            "the first request's response instead of creating the user again."
+        ),
+    ),
     service: UserService = Depends(get_user_service),  # noqa: B008
+    idempotency: IdempotencyService = Depends(get_idempotency_service),  # noqa: B008
 ):
     """
     Create a new user.
@@ -70,10 +646,56 @@ def create_user(
     - Email
     - Creation timestamp
 
+    With an `Idempotency-Key` header, the response is stored for
+    `IDEMPOTENCY_KEY_TTL_HOURS` and replayed (with `Idempotent-Replayed: true`)
+    to retries with the same key and body, which wait for the first request
+    if it is still in progress.
+
     Raises:
-    - HTTP 409: If the email is already registered
+    - HTTP 409: If the email is already registered, or a request with the same
+      `Idempotency-Key` is still in progress after `IDEMPOTENCY_WAIT_SECONDS`
+    - HTTP 422: If the `Idempotency-Key` was used with a different body
     """
+
+    def create() -> Response:
+        try:
+            created = service.create_user(user)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT, detail=str(e)
+            ) from e
+        return users_response(created, status_code=status.HTTP_201_CREATED)
+
+    if idempotency_key is None:
+        return create()
+
+    def execute() -> StoredResponse:
+        try:
+            response = create()
+        except HTTPException as e:
+            # Client errors are the request's outcome too, replayed like successes
+            response = JSONResponse({"detail": e.detail}, status_code=e.status_code)
+        return response.status_code, response.body
+
     try:
-        return service.create_user(user)
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e)) from e
+        (status_code, body), replayed = idempotency.run(
+            idempotency_key,
+            request_hash("POST", "/users", user.model_dump_json().encode()),
+            execute,
+        )
+    except IdempotencyKeyMismatchError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        ) from e
+    except IdempotencyKeyInProgressError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        ) from e
+    return Response(
+        body,
+        status_code=status_code,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"} if replayed else None,
+    )
@@ -0,0 +1,42 @@
+from functools import lru_cache
+from typing import Annotated, Dict
+
+from pydantic import AfterValidator, WithJsonSchema
+from pydantic.networks import validate_email
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+@lru_cache(maxsize=settings.EMAIL_VALIDATION_CACHE_SIZE)
+def normalize_email(value: str) -> str:
+    """Validate an email address and return its normalized form, memoized.
+
+    Same rules and errors as ``EmailStr`` (which calls ``validate_email`` with
+    deliverability checks disabled: syntax only, no DNS queries), so the
+    result only depends on the input and can be cached. The cache is bounded
+    and thread safe; invalid addresses raise and are not cached.
+    """
+    return validate_email(value)[1]
+
+
+def email_cache_stats() -> Dict[str, float]:
+    """Hits, misses and size of the email validation cache."""
+    info = normalize_email.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "email_cache.hits": info.hits,
+        "email_cache.misses": info.misses,
+        "email_cache.entries": info.currsize,
+        "email_cache.hit_ratio": info.hits / lookups if lookups else 0,
+    }
+
+
+metrics.register_collector(email_cache_stats)
+
+# Drop-in replacement for EmailStr, validating each distinct address once
+Email = Annotated[
+    str,
+    AfterValidator(normalize_email),
+    WithJsonSchema({"type": "string", "format": "email"}),
+]
@@ -0,0 +1,57 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.core.config import settings
+
+
+class JobStatus(str, Enum):
+    """Lifecycle states of a background job"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobCreate(BaseModel):
+    """Request model for submitting a background job"""
+
+    type: str = Field(..., min_length=1)
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    max_attempts: int = Field(default_factory=lambda: settings.JOB_MAX_ATTEMPTS, ge=1)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "type": "users.import",
+                "payload": {"path": "data/uploads/users.csv", "format": "csv"},
+                "max_attempts": 3,
+            }
+        }
+    )
+
+
+class Job(BaseModel):
+    """Response model for a background job"""
+
+    id: int
+    type: str
+    status: JobStatus
+    payload: Dict[str, Any]
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    progress: float
+    attempts: int
+    max_attempts: int
+    not_before: Optional[datetime] = None
+    cancel_requested: bool
+    created_at: datetime
+    updated_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import List
+
+from pydantic import BaseModel
+
+
+class DatabaseMaintenance(BaseModel):
+    """Outcome of a maintenance pass on one database file"""
+
+    database: str
+    file_size_before: int  # Bytes
+    file_size_after: int
+    freelist_pages_before: int
+    freelist_pages_after: int
+    vacuumed_pages: int
+    wal_checkpointed: bool
+    compacted_changes: int = 0  # User change log entries dropped
+    seconds: float
+
+
+class MaintenanceReport(BaseModel):
+    """Response model for a database maintenance run"""
+
+    started_at: datetime
+    seconds: float
+    databases: List[DatabaseMaintenance]
@@ -1,4 +1,5 @@
-from typing import Dict
+from datetime import datetime
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, ConfigDict
 
@@ -45,3 +46,58 @@ class ConfigResponse(BaseModel):
             }
         }
     )
+
+
+class MetricsResponse(BaseModel):
+    """Response model for metrics endpoint"""
+
+    metrics: Dict[str, float]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "metrics": {
+                    "singleflight.user_lookup.calls": 120,
+                    "singleflight.user_lookup.coalesced": 85,
+                    "singleflight.user_lookup.executions": 35,
+                }
+            }
+        }
+    )
+
+
+class DependencyCheck(BaseModel):
+    """Outcome of one readiness check"""
+
+    name: str
+    ok: bool
+    detail: Optional[str] = None
+
+
+class ReadinessResponse(BaseModel):
+    """Response model for the readiness endpoint"""
+
+    status: str  # "ready" or "degraded"
+    checked_at: datetime
+    age_seconds: float  # Since the checks last ran
+    checks: List[DependencyCheck]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "status": "ready",
+                "checked_at": "2024-01-01T00:00:00Z",
+                "age_seconds": 3.2,
+                "checks": [
+                    {"name": "main.database", "ok": True, "detail": "1.2ms"},
+                    {"name": "main.pool", "ok": True, "detail": "1/15 in use"},
+                    {
+                        "name": "main.migrations",
+                        "ok": True,
+                        "detail": "9a4c6e8b1d3f (head)",
+                    },
+                    {"name": "main.disk", "ok": True, "detail": "20480MB free"},
+                ],
+            }
+        }
+    )
@@ -1,12 +1,24 @@
 from datetime import datetime
-from typing import Optional
+from enum import Enum
+from functools import lru_cache
+from typing import List, Optional, Tuple, Type
 
-from pydantic import BaseModel, ConfigDict, EmailStr
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    TypeAdapter,
+    create_model,
+    field_validator,
+    model_validator,
+)
+
+from app.schemas.email import Email
 
 
 class UserBase(BaseModel):
     name: str
-    email: EmailStr
+    email: Email
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -16,15 +28,28 @@ class UserCreate(UserBase):
 
 
 class UserUpdate(BaseModel):
+    """Fields to change; omitted fields are left as they are."""
+
     name: Optional[str] = None
-    email: Optional[EmailStr] = None
+    email: Optional[Email] = None
 
     model_config = ConfigDict(from_attributes=True)
 
+    @field_validator("name", "email")
+    @classmethod
+    def check_not_null(cls, value: Optional[str]) -> str:
+        # Omitted fields default to None without validation, explicit nulls
+        # would clear required columns
+        if value is None:
+            raise ValueError("must not be null")
+        return value
+
 
 class User(UserBase):
     id: int
     created_at: datetime
+    # Incremented by every update; sent as the ETag header, not in the body
+    version: int = Field(1, exclude=True)
 
     model_config = ConfigDict(
         from_attributes=True,
@@ -37,3 +62,239 @@ class User(UserBase):
             }
         },
     )
+
+
+# Built once, to validate ORM rows and dump them to JSON bytes in one pass
+user_adapter = TypeAdapter(User)
+user_list_adapter = TypeAdapter(List[User])
+
+
+class UserBatchGet(BaseModel):
+    """Request model for fetching many users at once by ID and/or email"""
+
+    ids: List[int] = Field(default_factory=list)
+    emails: List[Email] = Field(default_factory=list)
+
+    model_config = ConfigDict(
+        json_schema_extra={"example": {"ids": [1, 2], "emails": ["john@example.com"]}}
+    )
+
+    @model_validator(mode="after")
+    def check_not_empty(self) -> "UserBatchGet":
+        if not self.ids and not self.emails:
+            raise ValueError("At least one id or email is required")
+        return self
+
+
+class UserBatchResult(BaseModel):
+    """Response model for a multi-get request"""
+
+    users: List[User]
+    missing_ids: List[int]
+    missing_emails: List[str]
+
+
+class UserFilter(BaseModel):
+    """Criteria selecting the users affected by a bulk operation.
+
+    All given criteria must match. At least one is required, so a bulk
+    operation can never target every user by accident.
+    """
+
+    ids: Optional[List[int]] = Field(None, min_length=1)
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    email_domain: Optional[str] = Field(
+        None, pattern=r"^[A-Za-z0-9-]+(\.[A-Za-z0-9-]+)+$", examples=["example.com"]
+    )
+
+    @model_validator(mode="after")
+    def check_criteria(self) -> "UserFilter":
+        criteria = (
+            self.ids,
+            self.created_after,
+            self.created_before,
+            self.email_domain,
+        )
+        if all(criterion is None for criterion in criteria):
+            raise ValueError("At least one filter criterion is required")
+        if (
+            self.created_after
+            and self.created_before
+            and self.created_after >= self.created_before
+        ):
+            raise ValueError("created_after must be before created_before")
+        return self
+
+
+class UserBulkChanges(BaseModel):
+    """Values set on every user matched by a bulk update.
+
+    Emails are unique, so they cannot be bulk updated.
+    """
+
+    name: str = Field(..., min_length=1)
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class UserBulkUpdate(BaseModel):
+    """Request model for updating all users matching a filter"""
+
+    filter: UserFilter
+    changes: UserBulkChanges
+    dry_run: bool = False
+    return_ids: bool = False
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "filter": {"email_domain": "example.com"},
+                "changes": {"name": "Deactivated"},
+                "dry_run": True,
+                "return_ids": True,
+            }
+        }
+    )
+
+
+class UserBulkDelete(BaseModel):
+    """Request model for deleting all users matching a filter"""
+
+    filter: UserFilter
+    dry_run: bool = False
+    return_ids: bool = False
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "filter": {"created_before": "2020-01-01T00:00:00"},
+                "dry_run": True,
+            }
+        }
+    )
+
+
+class BulkOperationResult(BaseModel):
+    """Outcome of a bulk update or delete"""
+
+    affected: int
+    ids: Optional[List[int]] = None
+    dry_run: bool
+
+
+class ImportFormat(str, Enum):
+    """Supported file formats for bulk user imports"""
+
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+class UserImportResult(BaseModel):
+    """Summary of a bulk user import"""
+
+    import_id: str
+    total_rows: int
+    imported: int
+    failed: int
+    error_report: Optional[str] = None
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "import_id": "3f2b8c1e9a7d4f60b5e2c8d1a4f7e903",
+                "total_rows": 10000,
+                "imported": 9998,
+                "failed": 2,
+                "error_report": "data/imports/3f2b8c1e9a7d4f60b5e2c8d1a4f7e903.csv",
+            }
+        }
+    )
+
+
+class UserChangeOperation(str, Enum):
+    """Kinds of writes recorded in the user change log"""
+
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+class UserChange(BaseModel):
+    """A write to a user, as recorded in the change log"""
+
+    seq: int
+    operation: UserChangeOperation
+    user_id: int
+    user: Optional[User] = None  # State after the change, None for deletes
+    changed_at: datetime
+
+
+class UserChangesPage(BaseModel):
+    """Changes after a cursor, and the cursor to resume from"""
+
+    changes: List[UserChange]
+    next_since: int
+    has_more: bool
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "changes": [
+                    {
+                        "seq": 42,
+                        "operation": "update",
+                        "user_id": 1,
+                        "user": {
+                            "id": 1,
+                            "name": "John Doe",
+                            "email": "john@example.com",
+                            "created_at": "2024-01-01T00:00:00",
+                        },
+                        "changed_at": "2024-01-02T00:00:00",
+                    }
+                ],
+                "next_since": 42,
+                "has_more": False,
+            }
+        }
+    )
+
+
+USER_FIELDS: Tuple[str, ...] = tuple(
+    name for name, field in User.model_fields.items() if not field.exclude
+)
+
+
+def parse_user_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Parse a comma separated ``fields`` value into known ``User`` field names.
+
+    Returns None when no restriction was requested. Fields are returned in
+    schema order with duplicates removed, so equivalent requests share the
+    same projection.
+
+    Raises:
+        ValueError: If the value is empty or names an unknown field
+    """
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    if not requested:
+        raise ValueError("fields must name at least one field")
+    unknown = requested.difference(USER_FIELDS)
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s): {', '.join(sorted(unknown))}. "
+            f"Allowed fields: {', '.join(USER_FIELDS)}"
+        )
+    return tuple(name for name in USER_FIELDS if name in requested)
+
+
+@lru_cache(maxsize=64)
+def get_user_projection(fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """Build (once per field set) a model holding a subset of ``User`` fields."""
+    return create_model(
+        f"User[{','.join(fields)}]",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (User.model_fields[name].annotation, ...) for name in fields},
+    )
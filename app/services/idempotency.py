@@ -0,0 +1,162 @@
+import hashlib
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterator, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.deadlines import DeadlineExceededError, current_deadline, no_deadline
+from app.core.metrics import metrics
+from app.core.singleflight import SingleFlight
+from app.repositories.idempotency_repository import IdempotencyRepository
+
+# Status code and body of a response
+StoredResponse = Tuple[int, bytes]
+
+# Shared by all service instances so concurrent duplicates wait for each other
+idempotent_requests = SingleFlight("idempotency")
+
+# How often to check on a key whose request is in flight in another process
+POLL_INTERVAL_SECONDS = 0.05
+
+
+class IdempotencyKeyMismatchError(Exception):
+    """Raised when a key is reused for a different request."""
+
+
+class IdempotencyKeyInProgressError(Exception):
+    """Raised when a key's first request is still in flight after waiting."""
+
+
+def request_hash(method: str, path: str, body: bytes) -> str:
+    """Fingerprint of a request, to tell retries from other uses of a key."""
+    digest = hashlib.sha256()
+    for part in (method.encode(), path.encode(), body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class IdempotencyService:
+    """Run requests carrying an ``Idempotency-Key`` at most once.
+
+    The first request with a key claims it in the ``idempotency_keys`` table,
+    runs, and stores its response for ``IDEMPOTENCY_KEY_TTL_HOURS``. Retries
+    with the same key and request get the stored response without running
+    again. Duplicates sent while the first request is in flight wait for it:
+    in this process through a single-flight call, in other processes by
+    polling the table for up to ``IDEMPOTENCY_WAIT_SECONDS``.
+
+    Server errors (exceptions and 5xx responses) are not stored: the key is
+    released so the request can be retried. The outcome is recorded on a
+    session of its own and without deadline, so that requests aborted by
+    their deadline release their key too. Keys whose request was lost (e.g.
+    its process crashed) are taken over by a retry once their claim is older
+    than ``IDEMPOTENCY_LOCK_SECONDS``.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        ttl: Optional[timedelta] = None,
+        wait: Optional[float] = None,
+        lock: Optional[timedelta] = None,
+    ):
+        self.repository = IdempotencyRepository(db)
+        self.ttl = ttl or timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+        self.wait = settings.IDEMPOTENCY_WAIT_SECONDS if wait is None else wait
+        self.lock = lock or timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS)
+
+    def run(
+        self, key: str, fingerprint: str, execute: Callable[[], StoredResponse]
+    ) -> Tuple[StoredResponse, bool]:
+        """Run ``execute`` once per key, returning its response and whether it
+        was replayed (run for an earlier request) rather than run now.
+
+        Raises:
+            IdempotencyKeyMismatchError: If the key was used for another request
+            IdempotencyKeyInProgressError: If the key's first request did not
+                finish within the wait
+            DeadlineExceededError: If the request's deadline passed while it
+                waited on the same request in flight in this process
+        """
+        ran = False
+
+        def run_once() -> Tuple[StoredResponse, bool]:
+            nonlocal ran
+            ran = True
+            return self._run(key, fingerprint, execute)
+
+        # Wait on the same request in flight here no longer than our deadline
+        deadline = current_deadline.get()
+        try:
+            response, executed = idempotent_requests.do(
+                (key, fingerprint),
+                run_once,
+                timeout=None if deadline is None else deadline.remaining,
+            )
+        except TimeoutError:
+            deadline.check()
+            raise DeadlineExceededError(
+                f"Request deadline of {deadline.timeout:g}s exceeded"
+            ) from None
+        replayed = not (ran and executed)
+        metrics.increment(f"idempotency.{'replayed' if replayed else 'executed'}")
+        return response, replayed
+
+    def _run(
+        self, key: str, fingerprint: str, execute: Callable[[], StoredResponse]
+    ) -> Tuple[StoredResponse, bool]:
+        deadline = time.monotonic() + self.wait
+        while True:
+            now = datetime.now(timezone.utc)
+            record = self.repository.get_key(key, now)
+            if record is None:
+                if self.repository.claim(
+                    key, fingerprint, now, now + self.ttl, now + self.lock
+                ):
+                    break
+                continue  # Claimed meanwhile by another request
+            if record.request_hash != fingerprint:
+                raise IdempotencyKeyMismatchError(
+                    "Idempotency-Key was already used for a different request"
+                )
+            if record.status_code is not None:
+                return (record.status_code, record.body), False
+            # Dates are stored naive, in UTC
+            if (
+                record.locked_until is None
+                or record.locked_until <= now.replace(tzinfo=None)
+            ) and self.repository.take_over(key, fingerprint, now, now + self.lock):
+                metrics.increment("idempotency.taken_over")
+                break
+            if time.monotonic() >= deadline:
+                raise IdempotencyKeyInProgressError(
+                    "A request with this Idempotency-Key is still in progress"
+                )
+            time.sleep(POLL_INTERVAL_SECONDS)
+
+        try:
+            status_code, body = execute()
+        except BaseException:
+            # Let go of the failed transaction (and its database locks) first
+            self.repository.rollback()
+            with self._outcome_repository() as repository:
+                repository.release(key)
+            raise
+        with self._outcome_repository() as repository:
+            if status_code >= 500:
+                repository.release(key)
+            else:
+                repository.complete(key, status_code, body)
+        return (status_code, body), True
+
+    @contextmanager
+    def _outcome_repository(self) -> Iterator[IdempotencyRepository]:
+        """Repository recording the outcome of a request, on a session of its
+        own and without deadline: the request's session may have failed, and
+        its deadline passed."""
+        with no_deadline(), Session(bind=self.repository.db.get_bind()) as db:
+            yield IdempotencyRepository(db)
@@ -0,0 +1,270 @@
+import logging
+import os
+import queue
+import threading
+import uuid
+from typing import Any, Callable, Dict, Optional, Set
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db import SessionLocal
+from app.models.job import Job
+from app.repositories.job_repository import JobRepository
+from app.schemas.job import JobCreate, JobStatus
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[["JobContext", Dict[str, Any]], Any]
+PayloadValidator = Callable[[Dict[str, Any]], None]
+
+# Registered job types, see register_job_handler
+job_handlers: Dict[str, JobHandler] = {}
+job_payload_validators: Dict[str, PayloadValidator] = {}
+
+
+def register_job_handler(
+    job_type: str, validate_payload: Optional[PayloadValidator] = None
+) -> Callable[[JobHandler], JobHandler]:
+    """Register the decorated function as the handler of a job type.
+
+    Handlers are called as ``handler(context, payload)`` from a worker thread
+    and return a JSON serializable result. They should call
+    ``context.report_progress`` regularly, which also raises ``JobCancelledError``
+    once a cancellation was requested.
+
+    ``validate_payload`` is called with the payload of submitted jobs, and
+    raises ``ValueError`` to reject them.
+    """
+
+    def decorator(handler: JobHandler) -> JobHandler:
+        job_handlers[job_type] = handler
+        if validate_payload is not None:
+            job_payload_validators[job_type] = validate_payload
+        return handler
+
+    return decorator
+
+
+class JobCancelledError(Exception):
+    """Raised inside a job handler when the job has been cancelled."""
+
+
+class JobContext:
+    """What a running job handler gets to work with."""
+
+    def __init__(self, job: Job, db: Session, repository: JobRepository):
+        self.job_id = job.id
+        self.attempt = job.attempts
+        self.db = db  # Session dedicated to the handler's own work
+        self._repository = repository
+
+    def report_progress(self, progress: float) -> None:
+        """Store the job's progress (0 to 1) and stop if it was cancelled."""
+        if not self._repository.report_progress(self.job_id, min(max(progress, 0), 1)):
+            raise JobCancelledError()
+
+
+class JobRunner:
+    """In-process runner for long operations persisted in the ``jobs`` table.
+
+    Submitted jobs are stored as queued and handed to a fixed pool of worker
+    threads, bounding how many run at once. Failed jobs are retried with
+    exponential backoff until ``max_attempts`` is reached. A heartbeat thread
+    keeps running jobs alive and periodically rescans the table, so jobs queued
+    by other processes, or left behind by a process that died, are resumed.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        workers: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.workers = workers or settings.JOB_WORKERS
+        self.runner_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._queue: queue.Queue = queue.Queue()
+        self._pending: Set[int] = set()
+        self._running: Set[int] = set()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._threads = []
+
+    @property
+    def started(self) -> bool:
+        return bool(self._threads)
+
+    def _session(self) -> Session:
+        return (self.session_factory or SessionLocal)()
+
+    def stats(self) -> Dict[str, float]:
+        """Number of jobs waiting for a worker and currently running."""
+        with self._lock:
+            return {
+                "jobs.pending": len(self._pending),
+                "jobs.running": len(self._running),
+            }
+
+    def start(self) -> None:
+        """Start the workers and resume the jobs left in the queue."""
+        if self.started:
+            return
+        self._stopping.clear()
+        for i in range(self.workers):
+            self._start_thread(self._work, f"job-worker-{i}")
+        self._start_thread(self._heartbeat, "job-heartbeat")
+        self._rescan(requeue_stale=True)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the workers, waiting up to ``timeout`` for running jobs.
+
+        Jobs still running afterwards are resumed by the next runner once
+        their heartbeat is stale.
+        """
+        self._stopping.set()
+        for _ in range(self.workers):
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._queue = queue.Queue()
+        self._pending.clear()
+
+    def submit(self, db: Session, job: JobCreate) -> Job:
+        """Persist a new queued job and schedule it.
+
+        Raises:
+            ValueError: If the job type is unknown or its payload invalid
+        """
+        if job.type not in job_handlers:
+            raise ValueError(f"Unknown job type: {job.type}")
+        validate_payload = job_payload_validators.get(job.type)
+        if validate_payload is not None:
+            validate_payload(job.payload)
+        db_job = JobRepository(db).create(job)
+        metrics.increment("jobs.submitted")
+        self.enqueue(db_job.id)
+        return db_job
+
+    def cancel(self, db: Session, job_id: int) -> Optional[Job]:
+        """Cancel a queued job or ask a running one to stop."""
+        return JobRepository(db).request_cancel(job_id)
+
+    def enqueue(self, job_id: int) -> None:
+        """Hand a queued job to the workers, unless it is already waiting."""
+        if not self.started or self._stopping.is_set():
+            return
+        with self._lock:
+            if job_id in self._pending or job_id in self._running:
+                return
+            self._pending.add(job_id)
+        self._queue.put(job_id)
+
+    def _start_thread(self, target: Callable[[], None], name: str) -> None:
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def _rescan(self, requeue_stale: bool = False) -> None:
+        db = self._session()
+        try:
+            repository = JobRepository(db)
+            if requeue_stale:
+                resumed = repository.requeue_stale(settings.JOB_STALE_SECONDS)
+                if resumed:
+                    logger.info("Resuming %d interrupted job(s)", resumed)
+            queued = repository.queued_ids()
+        except SQLAlchemyError:
+            logger.exception("Unable to scan the jobs table")
+            return
+        finally:
+            db.close()
+        for job_id in queued:
+            self.enqueue(job_id)
+
+    def _heartbeat(self) -> None:
+        while not self._stopping.wait(settings.JOB_HEARTBEAT_SECONDS):
+            with self._lock:
+                running = list(self._running)
+            db = self._session()
+            try:
+                JobRepository(db).heartbeat(running)
+            except SQLAlchemyError:
+                logger.exception("Unable to record job heartbeats")
+            finally:
+                db.close()
+            self._rescan(requeue_stale=True)
+
+    def _work(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            with self._lock:
+                self._pending.discard(job_id)
+                self._running.add(job_id)
+            try:
+                self._run(job_id)
+            except Exception:
+                logger.exception("Job %s crashed the worker", job_id)
+            finally:
+                with self._lock:
+                    self._running.discard(job_id)
+
+    def _run(self, job_id: int) -> None:
+        db = self._session()
+        handler_db = self._session()
+        repository = JobRepository(db)
+        try:
+            if not repository.claim(job_id, self.runner_id):
+                return  # Cancelled, or claimed by another runner
+            job = repository.get(job_id)
+            db.refresh(job)
+            handler = job_handlers.get(job.type)
+            if handler is None or job.attempts > job.max_attempts:
+                error = "Unknown job type" if handler is None else "Too many attempts"
+                repository.finish(job_id, JobStatus.FAILED, error=error)
+                metrics.increment("jobs.failed")
+                return
+            metrics.increment("jobs.started")
+            try:
+                result = handler(JobContext(job, handler_db, repository), job.payload)
+            except JobCancelledError:
+                handler_db.rollback()
+                repository.finish(job_id, JobStatus.CANCELLED)
+                metrics.increment("jobs.cancelled")
+            except Exception as e:
+                handler_db.rollback()
+                self._handle_failure(repository, job, e)
+            else:
+                repository.finish(job_id, JobStatus.SUCCEEDED, result=result)
+                metrics.increment("jobs.succeeded")
+        finally:
+            handler_db.close()
+            db.close()
+
+    def _handle_failure(
+        self, repository: JobRepository, job: Job, error: Exception
+    ) -> None:
+        message = f"{type(error).__name__}: {error}"
+        if job.attempts < job.max_attempts and not self._stopping.is_set():
+            logger.warning("Job %s failed, retrying: %s", job.id, message)
+            delay = settings.JOB_RETRY_DELAY_SECONDS * 2 ** (job.attempts - 1)
+            repository.retry(job.id, message, delay)
+            metrics.increment("jobs.retried")
+            # The job cannot be claimed before its backoff (see not_before), even
+            # by rescans; the timer only hands it to the workers once it is due
+            timer = threading.Timer(delay, self.enqueue, args=(job.id,))
+            timer.daemon = True
+            timer.start()
+        else:
+            logger.error("Job %s failed: %s", job.id, message)
+            repository.finish(job.id, JobStatus.FAILED, error=message)
+            metrics.increment("jobs.failed")
+
+
+# Create global job runner, started from the application lifespan
+job_runner = JobRunner()
+metrics.register_collector(job_runner.stats)
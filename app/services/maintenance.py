@@ -0,0 +1,228 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from datetime import time as dt_time
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db import get_engine
+from app.repositories.user_change_repository import UserChangeRepository
+from app.schemas.maintenance import DatabaseMaintenance, MaintenanceReport
+
+logger = logging.getLogger(__name__)
+
+Window = Tuple[dt_time, dt_time]
+
+
+class MaintenanceInProgressError(Exception):
+    """Raised when maintenance is requested while a run is in progress."""
+
+
+def parse_window(window: Optional[str]) -> Optional[Window]:
+    """Parse a ``"HH:MM-HH:MM"`` daily window, which may span midnight.
+
+    Raises:
+        ValueError: If the window is malformed
+    """
+    if not window:
+        return None
+    try:
+        start, end = (dt_time.fromisoformat(part.strip()) for part in window.split("-"))
+    except ValueError as e:
+        raise ValueError(
+            f"Invalid maintenance window {window!r}, use HH:MM-HH:MM"
+        ) from e
+    return start, end
+
+
+def in_window(now: dt_time, window: Optional[Window]) -> bool:
+    """Whether ``now`` falls within the window (always true without one)."""
+    if window is None:
+        return True
+    start, end = window
+    if start <= end:
+        return start <= now < end
+    return now >= start or now < end
+
+
+def default_engines() -> List[Tuple[str, Engine]]:
+    """The application database and the user shards, with their metric labels."""
+    engines = [("main", get_engine())]
+    engines += [
+        (f"shard{i}", get_engine(url)) for i, url in enumerate(settings.USER_SHARD_URLS)
+    ]
+    return engines
+
+
+def _pragma(conn: Connection, name: str):
+    return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+
+def maintain_database(
+    engine: Engine, vacuum_pages: int, compact_before: Optional[datetime] = None
+) -> DatabaseMaintenance:
+    """Refresh the planner statistics and reclaim free pages of a SQLite database.
+
+    Drops the user changes made before ``compact_before`` (if given and the
+    database has a change log). Then runs ``ANALYZE`` (bounded by
+    ``analysis_limit``) and ``PRAGMA optimize``, then ``incremental_vacuum`` of
+    up to ``vacuum_pages`` pages (0: all) when the database uses
+    ``auto_vacuum=INCREMENTAL``, and a WAL checkpoint when it is in WAL mode.
+    """
+    start = time.perf_counter()
+    compacted = 0
+    if compact_before is not None and inspect(engine).has_table("user_changes"):
+        with Session(engine) as db:
+            compacted = UserChangeRepository(db).compact(compact_before)
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        page_size = _pragma(conn, "page_size")
+        size_before = _pragma(conn, "page_count") * page_size
+        free_before = _pragma(conn, "freelist_count")
+
+        conn.exec_driver_sql("PRAGMA analysis_limit = 1000")
+        conn.exec_driver_sql("ANALYZE")
+        conn.exec_driver_sql("PRAGMA optimize")
+
+        if _pragma(conn, "auto_vacuum") == 2:  # INCREMENTAL
+            # Must be stepped to completion, which executescript does
+            pages = f"({vacuum_pages})" if vacuum_pages else ""
+            conn.connection.driver_connection.executescript(
+                f"PRAGMA incremental_vacuum{pages};"
+            )
+        checkpointed = _pragma(conn, "journal_mode") == "wal"
+        if checkpointed:
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        free_after = _pragma(conn, "freelist_count")
+        size_after = _pragma(conn, "page_count") * page_size
+
+    return DatabaseMaintenance(
+        database=engine.url.database or "",
+        file_size_before=size_before,
+        file_size_after=size_after,
+        freelist_pages_before=free_before,
+        freelist_pages_after=free_after,
+        vacuumed_pages=max(free_before - free_after, 0),
+        wal_checkpointed=checkpointed,
+        compacted_changes=compacted,
+        seconds=time.perf_counter() - start,
+    )
+
+
+class MaintenanceScheduler:
+    """Periodically maintain the SQLite databases during low-traffic hours.
+
+    Every ``interval`` seconds, if the local time is within the configured
+    window, each database is analyzed, vacuumed and checkpointed (see
+    ``maintain_database``), dropping the user changes older than
+    ``USER_CHANGES_RETENTION_HOURS``. Runs can also be triggered manually; only
+    one runs at a time.
+    """
+
+    def __init__(
+        self,
+        engines: Optional[Callable[[], List[Tuple[str, Engine]]]] = None,
+        interval: Optional[float] = None,
+        window: Optional[str] = None,
+        vacuum_pages: Optional[int] = None,
+    ):
+        self.engines = engines or default_engines
+        self.interval = interval or settings.MAINTENANCE_INTERVAL_SECONDS
+        self.window = parse_window(window or settings.MAINTENANCE_WINDOW)
+        self.vacuum_pages = (
+            settings.MAINTENANCE_VACUUM_PAGES if vacuum_pages is None else vacuum_pages
+        )
+        self.last_report: Optional[MaintenanceReport] = None
+        self._run_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the scheduling thread."""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="db-maintenance", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the scheduling thread, letting a run in progress finish."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run(self) -> MaintenanceReport:
+        """Maintain every database now.
+
+        Raises:
+            MaintenanceInProgressError: If a run is already in progress
+        """
+        if not self._run_lock.acquire(blocking=False):
+            raise MaintenanceInProgressError("Database maintenance already running")
+        try:
+            return self._run()
+        finally:
+            self._run_lock.release()
+
+    def _run(self) -> MaintenanceReport:
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        results = []
+        compact_before = datetime.now(timezone.utc) - timedelta(
+            hours=settings.USER_CHANGES_RETENTION_HOURS
+        )
+        for label, engine in self.engines():
+            if engine.dialect.name != "sqlite":
+                continue
+            try:
+                result = maintain_database(engine, self.vacuum_pages, compact_before)
+            except Exception:
+                metrics.increment("maintenance.failures")
+                raise
+            metrics.set_gauge(
+                f"maintenance.{label}.file_size_bytes", result.file_size_after
+            )
+            metrics.set_gauge(
+                f"maintenance.{label}.freelist_pages", result.freelist_pages_after
+            )
+            metrics.increment(
+                f"maintenance.{label}.vacuumed_pages", result.vacuumed_pages
+            )
+            metrics.increment(
+                f"maintenance.{label}.compacted_changes", result.compacted_changes
+            )
+            results.append(result)
+        seconds = time.perf_counter() - start
+        metrics.increment("maintenance.runs")
+        metrics.observe("maintenance.seconds", seconds)
+        self.last_report = MaintenanceReport(
+            started_at=started_at, seconds=seconds, databases=results
+        )
+        return self.last_report
+
+    def _loop(self) -> None:
+        while not self._stopping.wait(self.interval):
+            if not in_window(datetime.now().time(), self.window):
+                continue
+            try:
+                report = self.run()
+            except MaintenanceInProgressError:
+                continue
+            except Exception:
+                logger.exception("Database maintenance failed")
+                continue
+            logger.info("Database maintenance done in %.2fs", report.seconds)
+
+
+# Create global maintenance scheduler, started from the application lifespan
+maintenance_scheduler = MaintenanceScheduler()
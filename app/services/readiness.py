@@ -0,0 +1,198 @@
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.schemas.system import DependencyCheck, ReadinessResponse
+from app.services.maintenance import default_engines
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_DIR = Path(__file__).resolve().parents[2] / "alembic"
+
+
+def migration_heads() -> Tuple[str, ...]:
+    """The head revisions of the migration scripts."""
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    return tuple(ScriptDirectory.from_config(config).get_heads())
+
+
+def check_database(label: str, engine: Engine) -> DependencyCheck:
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    return DependencyCheck(
+        name=f"{label}.database",
+        ok=True,
+        detail=f"{(time.perf_counter() - start) * 1000:.1f}ms",
+    )
+
+
+def check_pool(label: str, engine: Engine, max_usage: float) -> DependencyCheck:
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return DependencyCheck(name=f"{label}.pool", ok=True, detail="not pooled")
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    in_use = pool.checkedout()
+    return DependencyCheck(
+        name=f"{label}.pool",
+        ok=in_use < capacity * max_usage,
+        detail=f"{in_use}/{capacity} in use",
+    )
+
+
+def check_migrations(
+    label: str, engine: Engine, heads: Tuple[str, ...]
+) -> DependencyCheck:
+    with engine.connect() as conn:
+        current = MigrationContext.configure(conn).get_current_heads()
+    ok = set(current) == set(heads)
+    return DependencyCheck(
+        name=f"{label}.migrations",
+        ok=ok,
+        detail=(
+            f"{', '.join(current) or 'none'}"
+            + (" (head)" if ok else f", head is {', '.join(heads)}")
+        ),
+    )
+
+
+def check_disk(label: str, engine: Engine, min_free_mb: int) -> DependencyCheck:
+    database = engine.url.database
+    if engine.dialect.name != "sqlite" or not database or database == ":memory:":
+        return DependencyCheck(name=f"{label}.disk", ok=True, detail="not a file")
+    free_mb = shutil.disk_usage(os.path.dirname(os.path.abspath(database))).free
+    free_mb //= 1024 * 1024
+    return DependencyCheck(
+        name=f"{label}.disk", ok=free_mb >= min_free_mb, detail=f"{free_mb}MB free"
+    )
+
+
+class ReadinessProber:
+    """Check the service's dependencies in the background and cache the result.
+
+    Every ``interval`` seconds, each database (the application database and
+    the user shards) is pinged, its connection pool usage compared to
+    ``max_pool_usage``, its migration revision compared to the head, and the
+    free space of its disk to ``min_free_disk_mb``. Readiness requests are
+    served from the last report, so probes cost the same however often they
+    come. When the prober is not running, reports older than ``interval`` are
+    refreshed on demand; when it is, reports older than three intervals mean
+    it is stuck, and count as degraded.
+    """
+
+    def __init__(
+        self,
+        engines: Optional[Callable[[], List[Tuple[str, Engine]]]] = None,
+        interval: Optional[float] = None,
+        max_pool_usage: Optional[float] = None,
+        min_free_disk_mb: Optional[int] = None,
+    ):
+        self.engines = engines or default_engines
+        self.interval = interval or settings.READINESS_PROBE_INTERVAL_SECONDS
+        self.max_pool_usage = max_pool_usage or settings.READINESS_MAX_POOL_USAGE
+        self.min_free_disk_mb = (
+            settings.READINESS_MIN_FREE_DISK_MB
+            if min_free_disk_mb is None
+            else min_free_disk_mb
+        )
+        self._heads: Optional[Tuple[str, ...]] = None
+        self._checks: List[DependencyCheck] = []
+        self._checked_at: Optional[datetime] = None
+        self._checked: float = 0.0  # time.monotonic() of the last probe
+        self._probe_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def probe(self) -> List[DependencyCheck]:
+        """Run all the checks now, and cache their results."""
+        with self._probe_lock:
+            if self._heads is None:
+                self._heads = migration_heads()
+            checks = []
+            for label, engine in self.engines():
+                for name, check, args in (
+                    ("database", check_database, ()),
+                    ("pool", check_pool, (self.max_pool_usage,)),
+                    ("migrations", check_migrations, (self._heads,)),
+                    ("disk", check_disk, (self.min_free_disk_mb,)),
+                ):
+                    try:
+                        checks.append(check(label, engine, *args))
+                    except Exception as e:
+                        checks.append(
+                            DependencyCheck(
+                                name=f"{label}.{name}", ok=False, detail=str(e)
+                            )
+                        )
+            self._checks = checks
+            self._checked_at = datetime.now(timezone.utc)
+            self._checked = time.monotonic()
+        ready = all(check.ok for check in checks)
+        metrics.increment("readiness.probes")
+        metrics.set_gauge("readiness.ready", 1 if ready else 0)
+        return checks
+
+    def report(self) -> ReadinessResponse:
+        """The last probe's results, probing first if they are missing or stale."""
+        age = time.monotonic() - self._checked
+        if self._checked_at is None or (self._thread is None and age > self.interval):
+            self.probe()
+            age = time.monotonic() - self._checked
+        checks = list(self._checks)
+        if self._thread is not None and age > 3 * self.interval:
+            checks.append(
+                DependencyCheck(
+                    name="prober", ok=False, detail=f"No probe for {age:.0f}s"
+                )
+            )
+        return ReadinessResponse(
+            status="ready" if all(check.ok for check in checks) else "degraded",
+            checked_at=self._checked_at,
+            age_seconds=age,
+            checks=checks,
+        )
+
+    def start(self) -> None:
+        """Start the probing thread."""
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="readiness-prober", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the probing thread."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                self.probe()
+            except Exception:
+                logger.exception("Readiness probe failed")
+            if self._stopping.wait(self.interval):
+                return
+
+
+# Create global readiness prober, started from the application lifespan
+readiness_prober = ReadinessProber()
@@ -0,0 +1,184 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import Settings, settings
+from app.core.metrics import metrics
+from app.core.settings_provider import settings_provider
+from app.db import get_engine
+
+T = TypeVar("T")
+
+
+class WriteQueueFullError(Exception):
+    """Raised when a write could not be queued before the timeout."""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Too many pending writes, try again later")
+        self.retry_after = retry_after
+
+
+class SingleWriter:
+    """Run all database writes on one dedicated thread and connection.
+
+    SQLite only allows one writer at a time, so concurrent writers from the
+    threadpool just contend for the file lock. Instead, writes are queued and
+    executed one after the other by a single thread holding its own
+    connection, while reads keep using the pooled connections in parallel.
+
+    The queue is bounded: when it stays full for ``timeout`` seconds callers
+    get ``WriteQueueFullError`` (served as a 503) instead of piling up. The
+    same goes for writes still queued after ``result_timeout`` seconds.
+
+    If the writer thread cannot connect (or its connection breaks), the
+    queued writes fail with the error, and the next write starts a new
+    thread.
+    """
+
+    def __init__(
+        self,
+        engine: Optional[Engine] = None,
+        max_queue_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        result_timeout: Optional[float] = None,
+    ):
+        self.engine = engine  # Default: the process's engine, resolved on start
+        self.timeout = timeout or settings.WRITE_QUEUE_TIMEOUT_SECONDS
+        self.result_timeout = result_timeout or settings.WRITE_RESULT_TIMEOUT_SECONDS
+        self._queue: queue.Queue = queue.Queue(
+            max_queue_size or settings.WRITE_QUEUE_MAX_SIZE
+        )
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def configure(self, settings: Settings) -> None:
+        """Apply the (reloaded) queue bound and timeouts."""
+        self.timeout = settings.WRITE_QUEUE_TIMEOUT_SECONDS
+        self.result_timeout = settings.WRITE_RESULT_TIMEOUT_SECONDS
+        with self._queue.mutex:
+            self._queue.maxsize = settings.WRITE_QUEUE_MAX_SIZE
+            self._queue.not_full.notify_all()
+
+    def stats(self) -> Dict[str, float]:
+        """Number of writes waiting for the writer thread."""
+        return {"single_writer.queue_depth": self._queue.qsize()}
+
+    def start(self) -> None:
+        """Start the writer thread (also done on writes, if it stopped)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._loop, name="single-writer", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Run the queued writes and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def run(self, operation: Callable[[Session], T]) -> T:
+        """Run ``operation(session)`` on the writer thread and return its result.
+
+        The operation must commit its own work. ORM objects it returns are
+        detached from the writer's session, with their loaded attributes.
+
+        Raises:
+            WriteQueueFullError: If the queue stayed full for the timeout, or
+                the write was still queued after the result timeout
+            FutureTimeoutError: If the write was still running
+                after the result timeout
+        """
+        self.start()
+        future: Future = Future()
+        try:
+            self._queue.put(
+                (operation, future, time.perf_counter()), timeout=self.timeout
+            )
+        except queue.Full:
+            metrics.increment("single_writer.rejected")
+            raise WriteQueueFullError(retry_after=self.timeout) from None
+        try:
+            return future.result(timeout=self.result_timeout)
+        except FutureTimeoutError:
+            if not future.cancel():
+                raise  # Already running, its outcome is unknown
+            metrics.increment("single_writer.rejected")
+            raise WriteQueueFullError(retry_after=self.timeout) from None
+
+    def _loop(self) -> None:
+        try:
+            connection = (self.engine or get_engine()).connect()
+        except Exception as e:
+            self._abort(e)
+            return
+        db = Session(bind=connection, autoflush=False, expire_on_commit=False)
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                operation, future, queued_at = item
+                if not future.set_running_or_notify_cancel():
+                    continue  # Its caller stopped waiting
+                start = time.perf_counter()
+                metrics.observe("single_writer.wait_seconds", start - queued_at)
+                self._execute(db, operation, future)
+                metrics.observe(
+                    "single_writer.run_seconds", time.perf_counter() - start
+                )
+        except Exception as e:  # The connection broke, e.g. on rollback
+            self._abort(e)
+        finally:
+            db.close()
+            connection.close()
+
+    def _abort(self, error: Exception) -> None:
+        """Fail the queued writes, as the writer thread cannot go on.
+
+        The thread is forgotten first, so that writes queued from now on start
+        a new one rather than wait for this one.
+        """
+        metrics.increment("single_writer.failures")
+        with self._lock:
+            if self._thread is threading.current_thread():
+                self._thread = None
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and item[1].set_running_or_notify_cancel():
+                item[1].set_exception(error)
+
+    def _execute(
+        self, db: Session, operation: Callable[[Session], Any], future: Future
+    ) -> None:
+        try:
+            result = operation(db)
+        except Exception as e:
+            future.set_exception(e)
+            db.rollback()
+            db.expunge_all()
+            return
+        # Leave the returned objects usable from the caller's thread, then
+        # never keep a transaction (and the write lock) open between writes
+        db.expunge_all()
+        if db.in_transaction():
+            db.rollback()
+        future.set_result(result)
+
+
+# Create global single writer, used by UserService when SINGLE_WRITER_ENABLED
+single_writer = SingleWriter()
+metrics.register_collector(single_writer.stats)
+settings_provider.subscribe(lambda settings, _: single_writer.configure(settings))
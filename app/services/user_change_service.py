@@ -0,0 +1,67 @@
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.user_change import UserChange as UserChangeModel
+from app.repositories.user_change_repository import UserChangeRepository
+from app.schemas.user import User, UserChange, UserChangeOperation, UserChangesPage
+
+
+class ResyncRequiredError(Exception):
+    """Raised when a client's cursor is older than the retained change log."""
+
+
+def to_schema(change: UserChangeModel) -> UserChange:
+    """Convert a logged change, holding the user's new state inline."""
+    operation = UserChangeOperation(change.operation)
+    user = None
+    if operation != UserChangeOperation.DELETE:
+        user = User(
+            id=change.user_id,
+            name=change.name,
+            email=change.email,
+            created_at=change.created_at,
+        )
+    return UserChange(
+        seq=change.seq,
+        operation=operation,
+        user_id=change.user_id,
+        user=user,
+        changed_at=change.changed_at,
+    )
+
+
+class UserChangeService:
+    """Service serving the user change log to clients mirroring the users."""
+
+    def __init__(self, repository: UserChangeRepository = None, db: Session = None):
+        self.repository = repository or UserChangeRepository(db)
+
+    def get_changes(self, since: Optional[int], limit: int) -> UserChangesPage:
+        """Get up to ``limit`` changes after the ``since`` cursor.
+
+        Without a cursor no changes are returned, only the latest sequence:
+        clients take it before fetching all users, then follow the changes
+        from there.
+
+        Raises:
+            ResyncRequiredError: If changes after the cursor were compacted
+                away, or the cursor is ahead of the log
+        """
+        oldest, latest = self.repository.bounds()
+        if since is None:
+            return UserChangesPage(changes=[], next_since=latest or 0, has_more=False)
+        if since > (latest or 0) or (oldest is not None and since < oldest - 1):
+            raise ResyncRequiredError(
+                "Changes after this cursor are no longer available, "
+                "fetch all users again"
+            )
+
+        changes = self.repository.get_since(since, limit + 1)
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        return UserChangesPage(
+            changes=[to_schema(change) for change in changes],
+            next_since=changes[-1].seq if changes else since,
+            has_more=has_more,
+        )
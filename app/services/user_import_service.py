@@ -0,0 +1,241 @@
+import csv
+import json
+import uuid
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.repositories.sharded_user_repository import (
+    PartialCommitError,
+    get_user_repository,
+)
+from app.repositories.user_repository import UserRepository
+from app.schemas.user import ImportFormat, UserCreate, UserImportResult
+from app.services.job_runner import JobContext, register_job_handler
+
+# (line number, parsed row or None, parse error or None)
+RawRow = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+def iter_lines(stream: IO[bytes]) -> Iterator[str]:
+    """Decode a binary stream line by line, dropping a leading UTF-8 BOM."""
+    for line_number, line in enumerate(stream):
+        yield line.decode("utf-8-sig" if line_number == 0 else "utf-8")
+
+
+def iter_rows(stream: IO[bytes], file_format: ImportFormat) -> Iterator[RawRow]:
+    """Lazily parse a binary CSV or NDJSON stream, one row at a time."""
+    text = iter_lines(stream)
+    if file_format == ImportFormat.CSV:
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, row, None
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """Flatten a pydantic validation error into a single report line."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}"
+        for e in error.errors()
+    )
+
+
+class ErrorReport:
+    """CSV file of rows that could not be imported, created on first error."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def add(self, line: int, row: Optional[Dict[str, Any]], error: str) -> None:
+        if self._writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("w", newline="", encoding="utf-8")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(["line", "email", "error"])
+        email = row.get("email") if row else None
+        self._writer.writerow([line, email or "", error])
+        self.count += 1
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+
+class UserImportService:
+    """Service for importing users from large CSV/NDJSON files.
+
+    Rows are parsed incrementally and handled in chunks: each chunk is
+    validated with ``UserCreate``, checked for duplicate emails with one query
+    and inserted with one statement in its own transaction. Memory use is
+    bounded by the chunk size rather than the file size. Rows that fail are
+    written to a per-import CSV error report.
+    """
+
+    def __init__(
+        self,
+        repository: UserRepository = None,
+        db: Session = None,
+        chunk_size: Optional[int] = None,
+    ):
+        """Initialize the service with a repository instance."""
+        self.repository = repository or get_user_repository(db)
+        self.chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+
+    def import_users(
+        self,
+        stream: IO[bytes],
+        file_format: ImportFormat,
+        report_dir: Optional[str] = None,
+        import_id: Optional[str] = None,
+        on_chunk: Optional[Callable[[], None]] = None,
+    ) -> UserImportResult:
+        """Import all rows of ``stream``, returning a summary of the import.
+
+        ``on_chunk`` is called after each chunk is committed, e.g. to report
+        progress from a background job.
+        """
+        import_id = import_id or uuid.uuid4().hex
+        report = ErrorReport(
+            Path(report_dir or settings.IMPORT_REPORT_DIR) / f"{import_id}.csv"
+        )
+        total = imported = 0
+        chunk: List[Tuple[int, Dict[str, Any]]] = []
+        try:
+            for line, row, error in iter_rows(stream, file_format):
+                total += 1
+                if error:
+                    report.add(line, row, error)
+                    continue
+                chunk.append((line, row))
+                if len(chunk) >= self.chunk_size:
+                    imported += self._import_chunk(chunk, report)
+                    chunk = []
+                    if on_chunk:
+                        on_chunk()
+            imported += self._import_chunk(chunk, report)
+        finally:
+            report.close()
+
+        return UserImportResult(
+            import_id=import_id,
+            total_rows=total,
+            imported=imported,
+            failed=report.count,
+            error_report=str(report.path) if report.count else None,
+        )
+
+    def _import_chunk(
+        self, chunk: List[Tuple[int, Dict[str, Any]]], report: ErrorReport
+    ) -> int:
+        """Validate and insert one chunk of rows, returning how many were added."""
+        valid: List[Tuple[int, Dict[str, Any], UserCreate]] = []
+        for line, row in chunk:
+            try:
+                valid.append((line, row, UserCreate.model_validate(row)))
+            except ValidationError as e:
+                report.add(line, row, format_validation_error(e))
+
+        existing = {
+            user.email
+            for user in self.repository.get_many_by_email(
+                [user.email for _, _, user in valid], fields=("email",)
+            )
+        }
+        to_insert = []
+        for line, row, user in valid:
+            if user.email in existing:
+                report.add(line, row, f"Email {user.email} already registered")
+                continue
+            existing.add(user.email)
+            to_insert.append((line, row, user))
+
+        try:
+            return self.repository.create_many([user for _, _, user in to_insert])
+        except IntegrityError:
+            # Someone else registered one of the emails meanwhile: fall back to
+            # row-by-row inserts so only the conflicting rows are rejected.
+            self.repository.rollback()
+            return self._import_one_by_one(to_insert, report)
+        except PartialCommitError as e:
+            # Sharded storage: the shards committed keep their rows
+            failed = {id(user) for user in e.failed}
+            for line, row, user in to_insert:
+                if id(user) in failed:
+                    report.add(line, row, str(e).splitlines()[0])
+            return len(e.committed)
+
+    def _import_one_by_one(
+        self, rows: List[Tuple[int, Dict[str, Any], UserCreate]], report: ErrorReport
+    ) -> int:
+        imported = 0
+        for line, row, user in rows:
+            try:
+                self.repository.create(user)
+                imported += 1
+            except (ValueError, IntegrityError) as e:
+                self.repository.rollback()
+                report.add(line, row, str(e).splitlines()[0])
+        return imported
+
+
+def resolve_import_path(payload: Dict[str, Any]) -> Path:
+    """Resolve the file of an import job, which must be in IMPORT_UPLOAD_DIR.
+
+    Symbolic links and ``..`` are resolved first, so they cannot lead out.
+
+    Raises:
+        ValueError: If the path is missing or outside of IMPORT_UPLOAD_DIR
+    """
+    path = payload.get("path")
+    if not isinstance(path, str) or not path:
+        raise ValueError("payload.path is required")
+    root = Path(settings.IMPORT_UPLOAD_DIR).resolve()
+    resolved = Path(path).resolve()
+    if not resolved.is_relative_to(root):
+        raise ValueError(f"payload.path must be within {settings.IMPORT_UPLOAD_DIR}")
+    return resolved
+
+
+@register_job_handler("users.import", validate_payload=resolve_import_path)
+def import_users_job(context: JobContext, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Background job importing a CSV/NDJSON file already stored on disk.
+
+    Payload:
+        path: Path of the file to import, within IMPORT_UPLOAD_DIR
+        format: "csv" or "ndjson" (default: guessed from the extension)
+        chunk_size: Rows per transaction (default: IMPORT_CHUNK_SIZE)
+    """
+    path = resolve_import_path(payload)
+    file_format = ImportFormat(
+        payload.get("format") or ("csv" if path.suffix.lower() == ".csv" else "ndjson")
+    )
+    size = path.stat().st_size or 1
+    service = UserImportService(db=context.db, chunk_size=payload.get("chunk_size"))
+    with path.open("rb") as stream:
+        result = service.import_users(
+            stream,
+            file_format,
+            on_chunk=lambda: context.report_progress(stream.tell() / size),
+        )
+    return result.model_dump()
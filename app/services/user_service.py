@@ -1,38 +1,215 @@
-from typing import List
+import json
+from typing import Any, Callable, Hashable, List, Optional, Sequence, TypeVar
 
 from sqlalchemy.orm import Session
 
+from app.core.broadcast import Broadcaster
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.core.tracing import trace_methods
+from app.repositories.sharded_user_repository import get_user_repository
 from app.repositories.user_repository import UserRepository
-from app.schemas.user import User, UserCreate, UserUpdate
+from app.schemas.user import (
+    BulkOperationResult,
+    User,
+    UserBulkChanges,
+    UserCreate,
+    UserFilter,
+    UserUpdate,
+)
+from app.services.single_writer import SingleWriter
+from app.services.write_batcher import WriteBatcher
 
+T = TypeVar("T")
 
+# Shared by all service instances so concurrent requests coalesce their lookups
+user_lookups = SingleFlight("user_lookup")
+
+# Notified after every committed user write, streamed to subscribers over SSE
+user_events = Broadcaster(
+    "user_events",
+    queue_size=settings.SSE_SUBSCRIBER_QUEUE_SIZE,
+    history_size=settings.SSE_HISTORY_SIZE,
+)
+
+
+@trace_methods
 class UserService:
     """Service for handling user-related operations."""
 
-    def __init__(self, repository: UserRepository = None, db: Session = None):
-        """Initialize the service with a repository instance."""
+    def __init__(
+        self,
+        repository: UserRepository = None,
+        db: Session = None,
+        write_batcher: Optional[WriteBatcher] = None,
+        writer: Optional[SingleWriter] = None,
+        events: Optional[Broadcaster] = None,
+        coalesce_lookups: Optional[bool] = None,
+    ):
+        """Initialize the service with a repository instance.
+
+        When a write batcher is given, creates and updates go through it and
+        are committed together with other concurrent writes. When a single
+        writer is given, all other writes run on its dedicated connection.
+        Committed writes are published to ``events`` (default: ``user_events``).
+        Concurrent identical lookups are coalesced if ``coalesce_lookups``
+        (default: ``USER_LOOKUP_COALESCING``).
+        """
         if repository:
             self.repository = repository
         else:
-            self.repository = UserRepository(db)
+            self.repository = get_user_repository(db)
         self.db = db
+        self.write_batcher = write_batcher
+        self.writer = writer
+        self.events = events or user_events
+        self.coalesce_lookups = (
+            settings.USER_LOOKUP_COALESCING
+            if coalesce_lookups is None
+            else coalesce_lookups
+        )
+
+    def _write(self, operation: Callable[[UserRepository], T]) -> T:
+        """Run a mutating repository call, on the single writer if there is one."""
+        if self.writer:
+            return self.writer.run(lambda db: operation(UserRepository(db)))
+        return operation(self.repository)
+
+    def _publish(self, event_type: str, data: Any) -> None:
+        """Publish a committed write, with a ``User`` or a JSON-able payload."""
+        if isinstance(data, self.repository.model):
+            data = User.model_validate(data)
+        self.events.publish(
+            event_type,
+            data.model_dump_json() if isinstance(data, User) else json.dumps(data),
+        )
+
+    def get_all_users(self, fields: Optional[Sequence[str]] = None) -> List[Any]:
+        """Get all users, optionally loading only the given fields."""
+        return self.repository.get_all(fields=fields)
+
+    def _lookup(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        """Run a single-row lookup, sharing it with identical in-flight lookups.
+
+        The shared result must not be tied to the leader's session, so whole
+        entities are converted to ``User`` schemas (partial rows already are
+        plain immutable tuples).
+        """
+        if not self.coalesce_lookups:
+            return fetch()
+
+        def fetch_detached():
+            result = fetch()
+            if isinstance(result, self.repository.model):
+                return User.model_validate(result)
+            return result
+
+        return user_lookups.do(key, fetch_detached)
+
+    def get_user(self, user_id: int, fields: Optional[Sequence[str]] = None) -> Any:
+        """Get a specific user by ID, optionally loading only the given fields."""
+        return self._lookup(
+            ("id", user_id, tuple(fields or ())),
+            lambda: self.repository.get(user_id, fields=fields),
+        )
 
-    def get_all_users(self) -> List[User]:
-        """Get all users from the database."""
-        return self.repository.get_all()
+    def get_user_by_email(
+        self, email: str, fields: Optional[Sequence[str]] = None
+    ) -> Any:
+        """Get a specific user by email, optionally loading only the given fields."""
+        return self._lookup(
+            ("email", email, tuple(fields or ())),
+            lambda: self.repository.get_by_email(email, fields=fields),
+        )
 
-    def get_user(self, user_id: int) -> User:
-        """Get a specific user by ID."""
-        return self.repository.get(user_id)
+    def get_users_by_ids(
+        self, user_ids: Sequence[int], fields: Optional[Sequence[str]] = None
+    ) -> List[Any]:
+        """Get the users with the given IDs in one query, in requested order."""
+        return self.repository.get_many(user_ids, fields=fields)
+
+    def get_users_by_emails(
+        self, emails: Sequence[str], fields: Optional[Sequence[str]] = None
+    ) -> List[Any]:
+        """Get the users with the given emails in one query, in requested order."""
+        return self.repository.get_many_by_email(emails, fields=fields)
 
     def create_user(self, user: UserCreate) -> User:
         """Create a new user."""
-        return self.repository.create(user)
+        if self.write_batcher:
+            created = self.write_batcher.create(user)
+        else:
+            created = self._write(lambda repository: repository.create(user))
+        self._publish("user.created", created)
+        return created
+
+    def update_user(
+        self, user_id: int, user: UserUpdate, expected_version: Optional[int] = None
+    ) -> User:
+        """Update an existing user, if still at ``expected_version`` when given.
 
-    def update_user(self, user_id: int, user: UserUpdate) -> User:
-        """Update an existing user."""
-        return self.repository.update(user_id, user)
+        Conditional updates are not batched, so a conflict fails only them.
+
+        Raises:
+            VersionMismatchError: If the user is not at ``expected_version``
+        """
+        if self.write_batcher and expected_version is None:
+            updated = self.write_batcher.update(user_id, user)
+        else:
+            updated = self._write(
+                lambda repository: repository.update(user_id, user, expected_version)
+            )
+        if updated is not None:
+            self._publish("user.updated", updated)
+        return updated
 
     def delete_user(self, user_id: int) -> bool:
         """Delete a user."""
-        return self.repository.delete(user_id)
+        deleted = self._write(lambda repository: repository.delete(user_id))
+        if deleted:
+            self._publish("user.deleted", {"id": user_id})
+        return deleted
+
+    def bulk_update_users(
+        self,
+        user_filter: UserFilter,
+        changes: UserBulkChanges,
+        dry_run: bool = False,
+        return_ids: bool = False,
+    ) -> BulkOperationResult:
+        """Update all users matching a filter in a single statement."""
+
+        def bulk_update(repository: UserRepository):
+            return repository.bulk_update(
+                repository.filter_criteria(user_filter),
+                changes.model_dump(exclude_unset=True),
+                return_ids=return_ids,
+                dry_run=dry_run,
+            )
+
+        # A dry run only reads, so it does not need to wait for the writer
+        affected, ids = (
+            bulk_update(self.repository) if dry_run else self._write(bulk_update)
+        )
+        if affected and not dry_run:
+            self._publish("users.bulk_updated", {"affected": affected, "ids": ids})
+        return BulkOperationResult(affected=affected, ids=ids, dry_run=dry_run)
+
+    def bulk_delete_users(
+        self, user_filter: UserFilter, dry_run: bool = False, return_ids: bool = False
+    ) -> BulkOperationResult:
+        """Delete all users matching a filter in a single statement."""
+
+        def bulk_delete(repository: UserRepository):
+            return repository.bulk_delete(
+                repository.filter_criteria(user_filter),
+                return_ids=return_ids,
+                dry_run=dry_run,
+            )
+
+        affected, ids = (
+            bulk_delete(self.repository) if dry_run else self._write(bulk_delete)
+        )
+        if affected and not dry_run:
+            self._publish("users.bulk_deleted", {"affected": affected, "ids": ids})
+        return BulkOperationResult(affected=affected, ids=ids, dry_run=dry_run)
@@ -0,0 +1,201 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db import SessionLocal
+from app.models.user import User as UserModel
+from app.repositories.user_repository import UserRepository, is_email_conflict
+from app.schemas.user import User, UserCreate, UserUpdate
+
+logger = logging.getLogger(__name__)
+
+
+class _Write:
+    """A pending create (user_id is None) or update and its caller's future."""
+
+    def __init__(self, schema: Any, user_id: Optional[int] = None):
+        self.schema = schema
+        self.user_id = user_id
+        self.future: Future = Future()
+
+
+class WriteBatcher:
+    """Group commit for concurrent user writes.
+
+    Callers block while their write waits in a queue. A single thread collects
+    the writes arriving within ``window_ms`` of the first one (up to
+    ``max_batch``), applies them in one transaction and commits once, so one
+    fsync is shared by the whole batch. Each caller gets its own result, or its
+    own error: email conflicts are detected per item and only fail that item.
+    If the commit still hits a constraint (a concurrent write from outside the
+    batcher), the batch is replayed item by item.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[..., Session]] = None,
+        window_ms: Optional[float] = None,
+        max_batch: Optional[int] = None,
+    ):
+        self.session_factory = session_factory or SessionLocal
+        self.window = (window_ms or settings.WRITE_BATCH_WINDOW_MS) / 1000
+        self.max_batch = max_batch or settings.WRITE_BATCH_MAX_SIZE
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the batching thread (also done on the first write)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name="write-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Commit the queued writes and stop the batching thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def create(self, schema: UserCreate) -> User:
+        """Create a user as part of the next batch.
+
+        Raises:
+            ValueError: If the email is already registered
+        """
+        return self._submit(_Write(schema))
+
+    def update(self, user_id: int, schema: UserUpdate) -> Optional[User]:
+        """Update a user as part of the next batch, None if it does not exist.
+
+        Raises:
+            ValueError: If the new email is already registered
+        """
+        return self._submit(_Write(schema, user_id))
+
+    def _submit(self, write: _Write) -> Any:
+        self.start()
+        self._queue.put(write)
+        return write.future.result()
+
+    def _loop(self) -> None:
+        while True:
+            write = self._queue.get()
+            if write is None:
+                return
+            batch = [write]
+            deadline = time.monotonic() + self.window
+            stopping = False
+            while len(batch) < self.max_batch:
+                try:
+                    write = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if write is None:
+                    stopping = True
+                    break
+                batch.append(write)
+            self._flush(batch)
+            if stopping:
+                return
+
+    def _flush(self, batch: List[_Write]) -> None:
+        start = time.perf_counter()
+        db = self.session_factory(expire_on_commit=False)
+        try:
+            self._commit(db, batch)
+        except Exception as e:
+            logger.exception("Write batch failed")
+            for write in batch:
+                if not write.future.done():
+                    write.future.set_exception(e)
+        finally:
+            db.close()
+        metrics.observe("write_batcher.batch_size", len(batch))
+        metrics.observe("write_batcher.flush_seconds", time.perf_counter() - start)
+
+    def _commit(self, db: Session, batch: List[_Write]) -> None:
+        """Apply the writes in one transaction, then resolve their futures."""
+        try:
+            results = self._apply(db, batch)
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            if len(batch) == 1:
+                if is_email_conflict(e):
+                    error: Exception = ValueError("Email already registered")
+                else:
+                    error = e
+                batch[0].future.set_exception(error)
+                return
+            metrics.increment("write_batcher.replays")
+            for write in batch:
+                self._commit(db, [write])
+            return
+        metrics.increment("write_batcher.commits")
+        for write, result in zip(batch, results):
+            if isinstance(result, Exception):
+                write.future.set_exception(result)
+            else:
+                write.future.set_result(
+                    None if result is None else User.model_validate(result)
+                )
+
+    def _apply(self, db: Session, batch: List[_Write]) -> List[Any]:
+        """Stage the writes, returning each one's entity, None or error."""
+        repository = UserRepository(db)
+        emails = {w.schema.email for w in batch if w.schema.email is not None}
+        owners: Dict[str, Optional[int]] = {
+            row.email: row.id
+            for row in repository.get_many_by_email(list(emails), fields=("id",))
+        }
+        updated = {
+            user.id: user
+            for user in repository.get_many([w.user_id for w in batch if w.user_id])
+        }
+
+        results: List[Any] = []
+        for write in batch:
+            email = write.schema.email
+            if write.user_id is None:
+                if email in owners:
+                    results.append(ValueError(f"Email {email} already registered"))
+                    continue
+                user = UserModel(**write.schema.model_dump())
+                db.add(user)
+                owners[email] = None  # Taken by a user of this batch
+            else:
+                user = updated.get(write.user_id)
+                if user is None:
+                    results.append(None)
+                    continue
+                if email is not None and owners.get(email, user.id) != user.id:
+                    results.append(ValueError(f"Email {email} already registered"))
+                    continue
+                if email is not None:
+                    owners.pop(user.email, None)
+                    owners[email] = user.id
+                for key, value in write.schema.model_dump(exclude_unset=True).items():
+                    setattr(user, key, value)
+                user.updated_at = datetime.now(timezone.utc)
+                user.version += 1
+            results.append(user)
+        db.flush()
+        return results
+
+
+# Create global write batcher, used by UserService when WRITE_BATCHING_ENABLED
+write_batcher = WriteBatcher()
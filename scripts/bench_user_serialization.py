@@ -0,0 +1,76 @@
+"""Benchmark serializing user lists: response_model vs. the precompiled adapters.
+
+Both routes return the same ORM rows; one lets FastAPI validate and encode
+them through ``response_model=List[User]``, the other returns
+``users_response`` (validate and dump to JSON bytes in one pass).
+
+Usage: python -m scripts.bench_user_serialization [rows ...]
+"""
+
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.models.user import User as UserModel
+from app.routers.users import users_response
+from app.schemas.user import User
+
+ROUNDS = 20
+
+
+def make_rows(count: int) -> List[UserModel]:
+    created_at = datetime(2024, 1, 1)
+    return [
+        UserModel(
+            id=i, name=f"User {i}", email=f"user{i}@example.com", created_at=created_at
+        )
+        for i in range(count)
+    ]
+
+
+def make_app(rows: List[UserModel]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/response-model", response_model=List[User])
+    def response_model():
+        return rows
+
+    @app.get("/adapter", response_model=List[User])
+    def adapter():
+        return users_response(rows)
+
+    return app
+
+
+def bench(client: TestClient, path: str) -> float:
+    """Best time of a request, in milliseconds."""
+    body = client.get(path).content  # Warm up
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        assert client.get(path).content == body
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(counts: List[int]) -> None:
+    print(f"{'rows':>8} {'response_model':>16} {'adapter':>10} {'speedup':>8}")
+    for count in counts:
+        with TestClient(make_app(make_rows(count))) as client:
+            assert (
+                client.get("/response-model").content == client.get("/adapter").content
+            )
+            baseline = bench(client, "/response-model")
+            adapter = bench(client, "/adapter")
+        print(
+            f"{count:>8} {baseline:>14.1f}ms {adapter:>8.1f}ms "
+            f"{baseline / adapter:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000])
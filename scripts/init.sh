@@ -21,6 +21,8 @@ python -m alembic upgrade head || {
 
 echo "Migrations completed successfully"
 
-# Start the application
-echo "Starting FastAPI application..."
-exec uvicorn app.main:app --host 0.0.0.0 --port 8000 
\ No newline at end of file
+# Start the application, with one worker process per WEB_CONCURRENCY
+# (each worker creates its own database engine and background services)
+echo "Starting FastAPI application with ${WEB_CONCURRENCY:-1} worker(s)..."
+exec uvicorn app.main:create_app --factory --host 0.0.0.0 --port 8000 \
+    --workers "${WEB_CONCURRENCY:-1}" 
\ No newline at end of file
@@ -4,10 +4,11 @@ from pathlib import Path
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from app.core.config import settings
 from app.db import Base, get_db
 from app.main import app
 from app.models.user import User
@@ -20,6 +21,42 @@ def unique_email() -> str:
     return f"test_{uuid.uuid4().hex[:8]}@example.com"
 
 
+@pytest.fixture(scope="session", autouse=True)
+def disable_background_services():
+    """Keep the application's background workers off during tests.
+
+    They would otherwise run against the development database. Tests of a
+    background service start their own instance against a test database.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(settings, "JOBS_ENABLED", False)
+        mp.setattr(settings, "MAINTENANCE_ENABLED", False)
+        mp.setattr(settings, "READINESS_PROBE_ENABLED", False)
+        mp.setattr(settings, "SETTINGS_RELOAD_ENABLED", False)
+        yield
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    """Fixture that provides an engine for a temporary SQLite file.
+
+    Unlike the in-memory test database, it can be shared by several threads
+    each using their own connection, as the background services do.
+    """
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def file_session_factory(file_engine):
+    """Fixture that provides a session factory for a temporary SQLite file."""
+    return sessionmaker(bind=file_engine)
+
+
 @pytest.fixture(scope="session")
 def engine():
     """Create a test database engine and create all tables."""
@@ -28,6 +65,17 @@ def engine():
         connect_args={"check_same_thread": False},
         poolclass=StaticPool,  # Ensures all connections share the same in-memory DB
     )
+
+    # Let SQLAlchemy emit BEGIN itself, so that the savepoints of db_session work
+    # (https://docs.sqlalchemy.org/en/20/dialects/sqlite.html#pysqlite-serializable)
+    @event.listens_for(engine, "connect")
+    def disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
     # Create all tables
     Base.metadata.create_all(bind=engine)
     yield engine
@@ -47,7 +95,10 @@ def connection(engine):
 def db_session(connection):
     """Create a new database session for a test."""
     transaction = connection.begin()
-    session_maker = sessionmaker(bind=connection)
+    # Commits and rollbacks of the session stay within the test's transaction
+    session_maker = sessionmaker(
+        bind=connection, join_transaction_mode="create_savepoint"
+    )
     session = session_maker()
     yield session
     session.close()
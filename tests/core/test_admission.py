@@ -0,0 +1,234 @@
+import asyncio
+import gc
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from app.core.admission import (
+    AdmissionControlMiddleware,
+    ConcurrencyLimiter,
+    QueueFullError,
+    TokenBucket,
+    admission_stats,
+)
+from app.core.config import Settings
+from app.core.metrics import metrics
+from app.core.settings_provider import settings_provider
+from app.main import create_app
+
+
+def make_settings(**overrides) -> Settings:
+    values = {
+        "ADMISSION_CONTROL_ENABLED": True,
+        "JOBS_ENABLED": False,
+        "MAINTENANCE_ENABLED": False,
+    }
+    return Settings(**{**values, **overrides})
+
+
+class SlowApp:
+    """ASGI app whose requests complete when ``release`` is set."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.started = 0
+
+    async def __call__(self, scope, receive, send):
+        self.started += 1
+        await self.release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def request(middleware, path="/api/v1/users/", client="1.2.3.4"):
+    """Send a request through the middleware, returning status and headers."""
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "headers": [],
+        "client": (client, 1234),
+    }
+    response = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {
+                k.decode(): v.decode() for k, v in message["headers"]
+            }
+
+    await middleware(scope, receive, send)
+    return response
+
+
+def test_token_bucket():
+    """Test that a bucket allows bursts and then refills at its rate."""
+    now = 100.0
+    bucket = TokenBucket(rate=2, burst=2, now=now)
+    assert bucket.take(now) == 0
+    assert bucket.take(now) == 0
+    assert bucket.take(now) == pytest.approx(0.5)
+    assert bucket.take(now + 0.5) == 0
+
+
+def test_concurrency_limiter_hands_over_slots():
+    """Test that released slots go to waiters in order and the queue is bounded."""
+
+    async def main():
+        limiter = ConcurrencyLimiter(limit=1, queue_size=1)
+        assert await limiter.acquire(1) == 0
+        waiter = asyncio.ensure_future(limiter.acquire(1))
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFullError):
+            await limiter.acquire(1)
+        limiter.release()
+        assert await waiter > 0
+        assert limiter.in_flight == 1
+        with pytest.raises(asyncio.TimeoutError):
+            await limiter.acquire(0.01)
+        limiter.release()
+        assert limiter.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_rate_limit_per_client():
+    """Test that clients over their rate get 429 without affecting others."""
+    middleware = AdmissionControlMiddleware(
+        SlowApp(), make_settings(RATE_LIMIT_PER_SECOND=0.1, RATE_LIMIT_BURST=2)
+    )
+    middleware.app.release.set()
+    rejected = metrics.get("admission.rejected.rate_limited")
+
+    async def main():
+        return [await request(middleware) for _ in range(3)] + [
+            await request(middleware, client="5.6.7.8")
+        ]
+
+    responses = asyncio.run(main())
+    assert [r["status"] for r in responses] == [200, 200, 429, 200]
+    assert responses[2]["headers"]["retry-after"] == "10"
+    assert metrics.get("admission.rejected.rate_limited") == rejected + 1
+
+
+def test_in_flight_cap_and_shedding():
+    """
+    Test that requests beyond the in-flight cap:
+    - Wait for a slot, up to the latency target
+    - Are shed with 503 when the queue is full
+    """
+    app = SlowApp()
+    middleware = AdmissionControlMiddleware(
+        app,
+        make_settings(
+            MAX_IN_FLIGHT_REQUESTS=1,
+            ADMISSION_QUEUE_SIZE=1,
+            ADMISSION_MAX_WAIT_MS=1000,
+        ),
+    )
+
+    async def main():
+        first = asyncio.ensure_future(request(middleware))
+        queued = asyncio.ensure_future(request(middleware))
+        await asyncio.sleep(0.01)
+        assert app.started == 1
+        shed = await request(middleware)
+        app.release.set()
+        return await first, await queued, shed
+
+    first, queued, shed = asyncio.run(main())
+    assert first["status"] == queued["status"] == 200
+    assert shed["status"] == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert shed["headers"]["retry-after"] == "1"
+    assert middleware.global_limiter.in_flight == 0
+
+
+def test_queue_wait_timeout_and_adaptive_shedding():
+    """Test that waits past the max wait are shed, and once the average wait
+    exceeds the latency target, new arrivals no longer queue at all."""
+    app = SlowApp()
+    middleware = AdmissionControlMiddleware(
+        app,
+        make_settings(
+            MAX_IN_FLIGHT_REQUESTS=1,
+            ADMISSION_MAX_WAIT_MS=20,
+            ADMISSION_LATENCY_TARGET_MS=10,
+        ),
+    )
+    shed = metrics.get("admission.rejected.shed")
+
+    async def main():
+        first = asyncio.ensure_future(request(middleware))
+        await asyncio.sleep(0)
+        timed_out = [await request(middleware) for _ in range(10)]
+        app.release.set()
+        await first
+        return timed_out
+
+    responses = asyncio.run(main())
+    assert {r["status"] for r in responses} == {503}
+    assert metrics.get("admission.rejected.shed") > shed
+
+
+def test_route_limit_and_exempt_paths():
+    """Test per-route caps by path prefix, and paths exempt from admission."""
+    app = SlowApp()
+    middleware = AdmissionControlMiddleware(
+        app,
+        make_settings(
+            ROUTE_MAX_IN_FLIGHT={"/api/v1/users/import": 1},
+            ADMISSION_QUEUE_SIZE=0,
+        ),
+    )
+
+    async def main():
+        first = asyncio.ensure_future(request(middleware, "/api/v1/users/import"))
+        await asyncio.sleep(0)
+        limited = await request(middleware, "/api/v1/users/import")
+        other = asyncio.ensure_future(request(middleware, "/api/v1/users/1"))
+        health = asyncio.ensure_future(request(middleware, "/api/v1/system/health"))
+        await asyncio.sleep(0)
+        app.release.set()
+        return limited, await first, await other, await health
+
+    limited, *others = asyncio.run(main())
+    assert limited["status"] == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert [r["status"] for r in others] == [200, 200, 200]
+
+
+def test_create_app_installs_admission_control():
+    """Test that the app factory installs the middleware when enabled."""
+    app = create_app(make_settings(RATE_LIMIT_PER_SECOND=0.01, RATE_LIMIT_BURST=1))
+    with TestClient(app) as client:
+        assert client.get("/api/v1/system/config").status_code == 200
+        response = client.get("/api/v1/system/config")
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert "retry-after" in response.headers
+        # Health checks are exempt
+        assert client.get("/api/v1/system/health").status_code == 200
+
+
+def test_apps_do_not_accumulate_listeners():
+    """
+    Test that creating apps registers no metrics collector or settings
+    listener per app, and that dropped apps stop being reported.
+    """
+    collectors = len(metrics._collectors)
+    listeners = len(settings_provider._listeners)
+
+    def serve():
+        with TestClient(create_app(make_settings())) as client:
+            assert client.get("/api/v1/system/health").status_code == 200
+
+    for _ in range(3):
+        serve()
+    gc.collect()
+
+    assert len(metrics._collectors) == collectors
+    assert len(settings_provider._listeners) == listeners
+    assert admission_stats() == {}
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.broadcast import Broadcaster, SlowConsumerError
+from app.core.metrics import metrics
+
+
+def test_publish_from_threads_fans_out():
+    """Test that events published from other threads reach every subscriber."""
+    broadcaster = Broadcaster("test_fan_out")
+
+    async def main():
+        subscriptions = [broadcaster.subscribe() for _ in range(3)]
+        assert broadcaster.subscriber_count == 3
+        thread = threading.Thread(target=broadcaster.publish, args=("created", "{}"))
+        thread.start()
+        events = [await s.get(timeout=1) for s in subscriptions]
+        thread.join()
+        for subscription in subscriptions:
+            subscription.close()
+        return events
+
+    events = asyncio.run(main())
+    assert {(e.type, e.data) for e in events} == {("created", "{}")}
+    assert broadcaster.subscriber_count == 0
+
+
+def test_idle_subscriber_times_out():
+    """Test that waiting returns None on timeout, for heartbeats."""
+    broadcaster = Broadcaster("test_idle")
+
+    async def main():
+        subscription = broadcaster.subscribe()
+        return await subscription.get(timeout=0.01)
+
+    assert asyncio.run(main()) is None
+
+
+def test_slow_consumer_is_evicted():
+    """Test that a subscriber whose queue overflows is dropped."""
+    broadcaster = Broadcaster("test_evict", queue_size=2)
+    evicted = metrics.get("broadcast.test_evict.evicted")
+
+    async def main():
+        slow = broadcaster.subscribe()
+        for i in range(3):
+            broadcaster.publish("created", str(i))
+        await asyncio.sleep(0.01)  # Let the deliveries run
+        assert broadcaster.subscriber_count == 0
+        with pytest.raises(SlowConsumerError):
+            await slow.get(timeout=1)
+
+    asyncio.run(main())
+    assert metrics.get("broadcast.test_evict.evicted") == evicted + 1
+
+
+def test_resume_from_last_event_id():
+    """
+    Test resuming a subscription:
+    - Replays the events after the given id, without duplicates
+    - Asks to resync for unknown ids, ids past the history, or too many events
+    """
+    broadcaster = Broadcaster("test_resume", queue_size=3, history_size=4)
+    first, second = (broadcaster.publish("created", str(i)) for i in range(2))
+
+    async def main():
+        resumed = broadcaster.subscribe(first.id)
+        third = broadcaster.publish("created", "2")
+        events = [await resumed.get(timeout=1) for _ in range(2)]
+        assert await resumed.get(timeout=0.01) is None
+        assert not resumed.resync
+        assert broadcaster.subscribe("other-1").resync
+        for i in range(4):
+            broadcaster.publish("created", str(i))
+        assert broadcaster.subscribe(first.id).resync  # Out of the history
+        assert broadcaster.subscribe(third.id).resync  # More than the queue
+        return events
+
+    events = asyncio.run(main())
+    assert [e.data for e in events] == ["1", "2"]
+    assert events[0].id == second.id
@@ -0,0 +1,71 @@
+import time
+
+from sqlalchemy import create_engine, text
+
+from app.core.cache_versions import CacheVersionWatcher
+from app.core.response_cache import CachedResponse, ResponseCache
+
+
+def users_version(engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT version FROM cache_versions WHERE name = 'users'")
+        ).scalar()
+
+
+def test_triggers_bump_version(file_engine):
+    """Test that every insert, update and delete of users bumps their version."""
+    with file_engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (name, email) VALUES ('A', 'a@x.com')"))
+    assert users_version(file_engine) == 1
+    with file_engine.begin() as conn:
+        conn.execute(text("UPDATE users SET name = 'B'"))
+        conn.execute(text("DELETE FROM users"))
+    assert users_version(file_engine) == 3
+
+
+def test_poll_notices_writes_of_other_processes(file_engine):
+    """Test that a write through another connection (as another worker would
+    make) invalidates the caches listening to the table."""
+    cache = ResponseCache(ttl=60, stale=0)
+    watcher = CacheVersionWatcher(lambda: [file_engine], interval=1, max_lag=1)
+    watcher.subscribe("users", cache.invalidate)
+    key = ("/api/v1/users/", b"", ())
+    cache.set(key, CachedResponse(200, [], b"[]"), cache.generation)
+
+    assert watcher.poll() == set()  # Only records the versions
+    other_worker = create_engine(file_engine.url)
+    with other_worker.begin() as conn:
+        conn.execute(text("INSERT INTO users (name, email) VALUES ('A', 'a@x.com')"))
+    other_worker.dispose()
+    assert cache.get(key)[0] is not None
+
+    assert watcher.poll() == {"users"}
+    assert cache.get(key)[0] is None
+    assert watcher.poll() == set()
+
+
+def test_is_current_only_while_polling_succeeds(file_engine):
+    """Test that caches are told not to serve when polling stalls."""
+
+    def broken_engines():
+        raise RuntimeError("database is locked")
+
+    watcher = CacheVersionWatcher(lambda: [file_engine], interval=0.01, max_lag=1)
+    assert watcher.is_current()  # Not started: nothing to watch
+    watcher.start()
+    try:
+        deadline = time.monotonic() + 2
+        while not watcher.last_polled and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert watcher.is_current()
+    finally:
+        watcher.stop()
+
+    watcher = CacheVersionWatcher(broken_engines, interval=0.01, max_lag=0.05)
+    watcher.start()
+    try:
+        time.sleep(0.1)
+        assert not watcher.is_current()
+    finally:
+        watcher.stop()
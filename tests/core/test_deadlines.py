@@ -0,0 +1,140 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.config import Settings
+from app.core.deadlines import (
+    DeadlineExceededError,
+    DeadlineMiddleware,
+    current_deadline,
+    deadline,
+)
+from app.core.metrics import metrics
+from app.db import create_db_engine
+from app.main import create_app
+
+# Counts to a large number, taking seconds unless interrupted
+SLOW_QUERY = text(
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 1e9) "
+    "SELECT count(*) FROM c"
+)
+
+
+@pytest.fixture
+def deadline_engine(tmp_path):
+    """Fixture that provides an engine with the deadline handler installed."""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'deadlines.db'}")
+    yield engine
+    engine.dispose()
+
+
+def test_query_interrupted_at_deadline(deadline_engine):
+    """Test that a running statement is aborted once the deadline passes."""
+    interrupted = metrics.get("deadlines.interrupted_queries")
+    start = time.monotonic()
+    with deadline_engine.connect() as conn, deadline(0.05):
+        with pytest.raises(DeadlineExceededError, match=r"0\.05s exceeded"):
+            conn.execute(SLOW_QUERY)
+    assert time.monotonic() - start < 2
+    assert metrics.get("deadlines.interrupted_queries") == interrupted + 1
+
+    # The connection remains usable, and queries without deadline are unaffected
+    with deadline_engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+
+
+def test_query_not_started_after_deadline(deadline_engine):
+    """Test that no statement is started once the deadline passed or was cancelled."""
+    with deadline_engine.connect() as conn:
+        with deadline(10) as value:
+            value.cancel()
+            with pytest.raises(DeadlineExceededError, match="disconnected"):
+                conn.execute(text("SELECT 1"))
+        with deadline(0):
+            with pytest.raises(DeadlineExceededError):
+                conn.execute(text("SELECT 1"))
+    assert current_deadline.get() is None
+
+
+async def call(middleware, headers=(), path="/api/v1/users/", disconnect=False):
+    """Send a request through the middleware, returning the deadline it got."""
+    scope = {
+        "type": "http",
+        "path": path,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+    }
+    seen = {}
+
+    async def receive():
+        if disconnect:
+            return {"type": "http.disconnect"}
+        await asyncio.sleep(10)
+
+    async def app(scope, receive, send):
+        seen["deadline"] = current_deadline.get()
+        await asyncio.sleep(0.01)
+
+    middleware.app = app
+    await middleware(scope, receive, None)
+    return seen["deadline"]
+
+
+def test_middleware_sets_deadline():
+    """
+    Test the deadline of requests:
+    - Defaults to REQUEST_TIMEOUT_SECONDS
+    - Can be overridden by header, up to REQUEST_TIMEOUT_MAX_SECONDS
+    - Ignores headers that are not positive finite numbers
+    - Is not set for exempt paths
+    - Is cancelled when the client disconnects
+    """
+    middleware = DeadlineMiddleware(
+        None,
+        Settings(
+            REQUEST_TIMEOUT_SECONDS=5,
+            REQUEST_TIMEOUT_MAX_SECONDS=20,
+            REQUEST_TIMEOUT_EXEMPT_PATHS=["/api/v1/users/import"],
+        ),
+    )
+
+    async def main():
+        return (
+            await call(middleware),
+            await call(middleware, [("X-Request-Timeout", "2.5")]),
+            await call(middleware, [("X-Request-Timeout", "600")]),
+            await call(middleware, [("X-Request-Timeout", "soon")]),
+            await call(middleware, path="/api/v1/users/import"),
+            await call(middleware, disconnect=True),
+            [
+                await call(middleware, [("X-Request-Timeout", value)])
+                for value in ("nan", "inf", "-inf", "0", "-1")
+            ],
+        )
+
+    default, header, capped, invalid, exempt, disconnected, ignored = asyncio.run(
+        main()
+    )
+    assert [d.timeout for d in (default, header, capped, invalid)] == [5, 2.5, 20, 5]
+    assert [d.timeout for d in ignored] == [5] * 5
+    assert not default.cancelled
+    assert exempt is None
+    assert disconnected.cancelled and disconnected.expired
+
+
+def test_deadline_exceeded_returns_504(deadline_engine):
+    """Test that requests aborted by their deadline are answered with 504."""
+    app = create_app(Settings(JOBS_ENABLED=False, MAINTENANCE_ENABLED=False))
+
+    @app.get("/slow")
+    def slow():
+        with deadline_engine.connect() as conn:
+            return conn.execute(SLOW_QUERY).scalar()
+
+    with TestClient(app) as client:
+        response = client.get("/slow", headers={"X-Request-Timeout": "0.05"})
+    assert response.status_code == status.HTTP_504_GATEWAY_TIMEOUT
+    assert "exceeded" in response.json()["detail"]
@@ -0,0 +1,24 @@
+from app.core.metrics import Metrics
+
+
+def test_counters_and_gauges():
+    """Test that counters accumulate and gauges keep the last value."""
+    registry = Metrics()
+    registry.increment("requests")
+    registry.increment("requests", 2)
+    registry.set_gauge("queue.depth", 5)
+    registry.set_gauge("queue.depth", 1)
+    assert registry.snapshot() == {"queue.depth": 1, "requests": 3}
+
+
+def test_observe_and_collectors():
+    """Test that samples track count/sum/max and collectors add values."""
+    registry = Metrics()
+    registry.observe("latency", 0.5)
+    registry.observe("latency", 0.1)
+    registry.register_collector(lambda: {"pool.size": 4})
+    snapshot = registry.snapshot()
+    assert snapshot["latency.count"] == 2
+    assert snapshot["latency.sum"] == 0.6
+    assert snapshot["latency.max"] == 0.5
+    assert snapshot["pool.size"] == 4
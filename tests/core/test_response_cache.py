@@ -0,0 +1,217 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.core.config import Settings
+from app.core.metrics import metrics
+from app.core.response_cache import (
+    CachedResponse,
+    ResponseCache,
+    ResponseCacheMiddleware,
+    response_cache,
+)
+from app.db import get_db
+from app.main import create_app
+
+
+def make_settings(**overrides) -> Settings:
+    values = {
+        "RESPONSE_CACHE_ENABLED": True,
+        "CACHE_VERSION_POLL_INTERVAL_MS": 0,
+        "JOBS_ENABLED": False,
+        "MAINTENANCE_ENABLED": False,
+    }
+    return Settings(**{**values, **overrides})
+
+
+class CountingApp:
+    """ASGI app answering each request with its sequence number."""
+
+    def __init__(self, status=200, headers=None):
+        self.calls = 0
+        self.status = status
+        self.headers = headers or []
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status if scope["method"] == "GET" else 201,
+                "headers": self.headers,
+            }
+        )
+        await send({"type": "http.response.body", "body": str(self.calls).encode()})
+
+
+def make_middleware(app=None, cache=None, **overrides):
+    return ResponseCacheMiddleware(
+        app or CountingApp(),
+        make_settings(**overrides),
+        cache or ResponseCache(ttl=60, stale=0),
+    )
+
+
+async def request(middleware, path="/api/v1/users/", method="GET", headers=()):
+    """Send a request through the middleware, returning body and headers."""
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path.split("?")[0],
+        "query_string": path.partition("?")[2].encode(),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+    }
+    response = {"body": b""}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {
+                k.decode(): v.decode() for k, v in message["headers"]
+            }
+        else:
+            response["body"] += message.get("body", b"")
+
+    await middleware(scope, receive, send)
+    return response
+
+
+def test_hits_and_keys():
+    """Test that identical GETs are served from the cache, keyed by path, query
+    and the vary headers, and that other paths are not cached."""
+    middleware = make_middleware()
+
+    async def main():
+        return [
+            await request(middleware),
+            await request(middleware),
+            await request(middleware, "/api/v1/users/?limit=5"),
+            await request(middleware, headers=[("Accept", "text/plain")]),
+            await request(middleware, headers=[("Cache-Control", "no-cache")]),
+            await request(middleware, "/api/v1/system/config"),
+            await request(middleware, "/api/v1/system/config"),
+        ]
+
+    responses = asyncio.run(main())
+    assert [r["body"] for r in responses] == [b"1", b"1", b"2", b"3", b"4", b"5", b"6"]
+    assert responses[0]["headers"]["x-cache"] == "MISS"
+    assert responses[1]["headers"]["x-cache"] == "HIT"
+    assert middleware.app.calls == 6
+
+
+def test_uncacheable_responses():
+    """Test that errors and no-store responses are not cached."""
+
+    async def main(middleware):
+        return [(await request(middleware))["body"] for _ in range(2)]
+
+    assert asyncio.run(main(make_middleware(CountingApp(status=404)))) == [b"1", b"2"]
+    no_store = CountingApp(headers=[(b"cache-control", b"no-store")])
+    assert asyncio.run(main(make_middleware(no_store))) == [b"1", b"2"]
+
+
+def test_stale_while_revalidate():
+    """Test that stale entries are served while refreshed in the background."""
+    middleware = make_middleware(cache=ResponseCache(ttl=0, stale=60))
+
+    async def main():
+        first = await request(middleware)
+        stale = await request(middleware)
+        await asyncio.gather(*middleware._tasks)
+        refreshed = await request(middleware)
+        return first, stale, refreshed
+
+    first, stale, refreshed = asyncio.run(main())
+    assert (first["body"], stale["body"], refreshed["body"]) == (b"1", b"1", b"2")
+    assert stale["headers"]["x-cache"] == "STALE"
+    assert middleware.app.calls == 3  # The refresh after the last one too
+
+
+def test_writes_invalidate():
+    """Test that successful writes under the users paths invalidate the cache,
+    unlike read-only POSTs and writes elsewhere."""
+    middleware = make_middleware()
+
+    async def main():
+        bodies = [(await request(middleware))["body"]]
+        await request(middleware, "/api/v1/users/batch-get", "POST")
+        await request(middleware, "/api/v1/system/jobs", "POST")
+        bodies.append((await request(middleware))["body"])
+        await request(middleware, "/api/v1/admin/users/bulk-delete", "POST")
+        bodies.append((await request(middleware))["body"])
+        return bodies
+
+    assert asyncio.run(main()) == [b"1", b"1", b"5"]
+
+
+def test_bypassed_while_other_writes_may_be_missed():
+    """Test that the cache is not used while the version watcher lags behind."""
+
+    class LaggingWatcher:
+        def is_current(self):
+            return False
+
+    middleware = ResponseCacheMiddleware(
+        CountingApp(), make_settings(), ResponseCache(ttl=60, stale=0), LaggingWatcher()
+    )
+
+    async def main():
+        return [(await request(middleware))["body"] for _ in range(2)]
+
+    assert asyncio.run(main()) == [b"1", b"2"]
+
+
+def test_invalidation_discards_responses_in_flight():
+    """Test that a response computed before an invalidation is not stored."""
+    cache = ResponseCache(ttl=60, stale=0)
+    key = ("/api/v1/users/", b"", ())
+    generation = cache.generation
+    cache.invalidate()
+    assert not cache.set(key, CachedResponse(200, [], b"old"), generation)
+    assert cache.get(key) == (None, False)
+
+
+def test_size_bounds():
+    """Test that the least recently used entries are evicted beyond the bounds."""
+    cache = ResponseCache(ttl=60, stale=0, max_entries=2, max_bytes=10)
+    for key in ("a", "b", "c"):
+        cache.set((key, b"", ()), CachedResponse(200, [], b"1234"), cache.generation)
+    assert cache.get(("a", b"", ()))[0] is None
+    assert cache.get(("c", b"", ()))[0] is not None
+    assert not cache.set(
+        ("d", b"", ()), CachedResponse(200, [], b"x" * 11), cache.generation
+    )
+    cache.set(("e", b"", ()), CachedResponse(200, [], b"12345678"), cache.generation)
+    assert [key[0] for key in cache._entries] == ["e"]
+    assert cache.stats()["response_cache.bytes"] == 8
+
+
+def test_create_app_installs_response_cache(db_session):
+    """Test that the app factory installs the cache and reports hit ratios."""
+    app = create_app(make_settings())
+    app.dependency_overrides[get_db] = lambda: db_session
+    response_cache.invalidate()
+    with TestClient(app) as client:
+        first = client.get("/api/v1/users/")
+        second = client.get("/api/v1/users/")
+        assert first.headers["x-cache"] == "MISS"
+        assert second.headers["x-cache"] == "HIT"
+        assert second.json() == first.json()
+        assert 0 < metrics.snapshot()["response_cache.hit_ratio"] <= 1
+
+
+def test_configure_applies_reloaded_bounds():
+    """Test that reloaded settings change the lifetimes and evict over the bounds."""
+    cache = ResponseCache(ttl=60, stale=0, max_entries=3)
+    for key in ("a", "b", "c"):
+        cache.set((key, b"", ()), CachedResponse(200, [], b"1234"), cache.generation)
+
+    cache.configure(
+        make_settings(RESPONSE_CACHE_TTL_SECONDS=1, RESPONSE_CACHE_MAX_ENTRIES=1)
+    )
+
+    assert cache.ttl == 1
+    assert [key[0] for key in cache._entries] == ["c"]
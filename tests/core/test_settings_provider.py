@@ -0,0 +1,133 @@
+import gc
+import os
+
+import pytest
+
+from app.core import settings_provider as settings_provider_module
+from app.core.admission import AdmissionControlMiddleware
+from app.core.config import Settings
+from app.core.deadlines import DeadlineMiddleware
+from app.core.metrics import metrics
+from app.core.settings_provider import SettingsProvider
+
+
+def write_env(path, content):
+    """Write the .env file, moving its mtime forward so the change is seen."""
+    stamp = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(content)
+    os.utime(path, ns=(stamp + 10**9, stamp + 10**9))
+
+
+@pytest.fixture
+def env_file(tmp_path):
+    path = tmp_path / ".env"
+    write_env(path, "RESPONSE_CACHE_TTL_SECONDS=5\n")
+    return path
+
+
+@pytest.fixture
+def provider(env_file):
+    return SettingsProvider(Settings(_env_file=env_file), env_file=str(env_file))
+
+
+def test_env_file_is_parsed_once_until_changed(provider, env_file, monkeypatch):
+    """Test that the parsed .env is served from cache until the file changes."""
+    parses = []
+    dotenv_values = settings_provider_module.dotenv_values
+    monkeypatch.setattr(
+        settings_provider_module,
+        "dotenv_values",
+        lambda path: parses.append(path) or dotenv_values(path),
+    )
+
+    for _ in range(3):
+        assert provider.env_values() == {"RESPONSE_CACHE_TTL_SECONDS": "5"}
+    assert parses == []
+
+    write_env(env_file, "RESPONSE_CACHE_TTL_SECONDS=7\n")
+    assert provider.env_values() == {"RESPONSE_CACHE_TTL_SECONDS": "7"}
+    assert provider.env_values() == {"RESPONSE_CACHE_TTL_SECONDS": "7"}
+    assert len(parses) == 1
+
+    env_file.unlink()
+    assert not provider.env_exists()
+    assert provider.env_values() == {}
+
+
+def test_reloads_tunable_settings(provider, env_file):
+    """
+    Test reloading a changed .env file:
+    - Reloadable settings are applied in place and listeners are notified
+    - Other settings are left alone, pending a restart
+    """
+    notified = []
+    provider.subscribe(lambda settings, changed: notified.append(changed))
+    database_url = provider.settings.DATABASE_URL
+
+    write_env(
+        env_file,
+        "RESPONSE_CACHE_TTL_SECONDS=9\nRATE_LIMIT_BURST=3\nDATABASE_URL=sqlite://\n",
+    )
+    changed = provider.check()
+
+    assert changed == {"RESPONSE_CACHE_TTL_SECONDS": 9.0, "RATE_LIMIT_BURST": 3}
+    assert notified == [changed]
+    assert provider.settings.RESPONSE_CACHE_TTL_SECONDS == 9.0
+    assert provider.settings.RATE_LIMIT_BURST == 3
+    assert provider.settings.DATABASE_URL == database_url
+    assert provider.pending_restart == {"DATABASE_URL": "sqlite://"}
+    assert provider.check() == {}  # Unchanged since
+    assert len(notified) == 1
+
+
+def test_invalid_env_file_keeps_settings(provider, env_file):
+    """Test that invalid settings are ignored until the file is fixed."""
+    failures = metrics.get("settings.reload_failures")
+
+    write_env(env_file, "RESPONSE_CACHE_TTL_SECONDS=soon\n")
+    assert provider.check() == {}
+    assert provider.settings.RESPONSE_CACHE_TTL_SECONDS == 5.0
+    assert metrics.get("settings.reload_failures") == failures + 1
+
+    write_env(env_file, "RESPONSE_CACHE_TTL_SECONDS=6\n")
+    assert provider.check() == {"RESPONSE_CACHE_TTL_SECONDS": 6.0}
+
+
+def test_components_are_reconfigured_while_alive(provider, env_file, monkeypatch):
+    """
+    Test that middlewares subscribe without being kept alive:
+    - A live middleware applies the reloaded settings
+    - A dropped one is no longer referenced by the provider
+    """
+    monkeypatch.setattr("app.core.deadlines.settings_provider", provider)
+    middleware = DeadlineMiddleware(None, provider.settings)
+    DeadlineMiddleware(None, provider.settings)
+    gc.collect()
+    assert list(provider._components) == [middleware]
+
+    write_env(env_file, "REQUEST_TIMEOUT_SECONDS=3\n")
+    provider.check()
+
+    assert middleware.default_timeout == 3.0
+
+
+def test_admission_control_is_reconfigured(provider, env_file, monkeypatch):
+    """Test that admission control applies reloaded limits to its limiters."""
+    monkeypatch.setattr("app.core.admission.settings_provider", provider, raising=True)
+    middleware = AdmissionControlMiddleware(None, provider.settings)
+    limiter = middleware.global_limiter
+    assert middleware.rate_limiter is None
+
+    write_env(
+        env_file,
+        "RATE_LIMIT_PER_SECOND=10\nMAX_IN_FLIGHT_REQUESTS=4\n"
+        'ROUTE_MAX_IN_FLIGHT={"/api/v1/users/import": 1}\n',
+    )
+    provider.check()
+
+    assert middleware.global_limiter is limiter
+    assert limiter.limit == 4
+    assert middleware.rate_limiter.rate == 10
+    assert [prefix for prefix, _ in middleware.route_limiters] == [
+        "/api/v1/users/import"
+    ]
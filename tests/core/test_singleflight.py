@@ -0,0 +1,122 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core.metrics import metrics
+from app.core.singleflight import SingleFlight
+
+
+def test_do_coalesces_concurrent_calls():
+    """
+    Test that concurrent threads asking for the same key:
+    - Execute the function once
+    - All receive the leader's result
+    - Are counted as coalesced in the metrics
+    """
+    group = SingleFlight("test_threads")
+    release = threading.Event()
+    executions = []
+
+    def fetch():
+        executions.append(1)
+        release.wait(timeout=5)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [pool.submit(group.do, "key", fetch) for _ in range(5)]
+        while metrics.get("singleflight.test_threads.calls") < 5:
+            threading.Event().wait(0.01)
+        release.set()
+        results = [f.result(timeout=5) for f in futures]
+
+    assert results == ["result"] * 5
+    assert len(executions) == 1
+    assert metrics.get("singleflight.test_threads.coalesced") == 4
+
+    # Nothing is cached once the call has completed
+    assert group.do("key", lambda: "again") == "again"
+
+
+def test_do_follower_timeout():
+    """Test that followers stop waiting after their timeout, not the leader."""
+    group = SingleFlight("test_timeout")
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(timeout=5)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        leader = pool.submit(group.do, "key", slow)
+        started.wait(timeout=5)
+        with pytest.raises(TimeoutError):
+            group.do("key", lambda: "unused", timeout=0.01)
+        release.set()
+        assert leader.result(timeout=5) == "result"
+
+
+def test_do_shares_exceptions():
+    """Test that followers receive the leader's exception."""
+    group = SingleFlight("test_errors")
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(timeout=5)
+        raise RuntimeError("boom")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(group.do, "key", fail)
+        started.wait(timeout=5)
+        follower = pool.submit(group.do, "key", lambda: "unused")
+        while metrics.get("singleflight.test_errors.calls") < 2:
+            threading.Event().wait(0.01)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError, match="boom"):
+                future.result(timeout=5)
+
+
+def test_do_async_coalesces_concurrent_calls():
+    """Test that concurrent coroutines asking for the same key share one call."""
+    group = SingleFlight("test_async")
+    executions = []
+
+    async def fetch():
+        executions.append(1)
+        await asyncio.sleep(0.01)
+        return 42
+
+    async def main():
+        return await asyncio.gather(
+            *(group.do_async("key", fetch) for _ in range(10)),
+            group.do_async("other", fetch),
+        )
+
+    assert asyncio.run(main()) == [42] * 11
+    assert len(executions) == 2
+    assert metrics.get("singleflight.test_async.coalesced") == 9
+
+
+def test_do_async_retries_when_leader_is_cancelled():
+    """Test that a follower runs the call itself if the leader gets cancelled."""
+    group = SingleFlight("test_cancel")
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    async def main():
+        leader = asyncio.ensure_future(group.do_async("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(group.do_async("key", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == "ok"
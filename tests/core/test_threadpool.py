@@ -0,0 +1,72 @@
+import threading
+
+import anyio
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.threadpool import Bulkhead, read_bulkhead, write_bulkhead
+from app.routers.users import router
+
+
+def test_bulkhead_limits_and_counts_calls():
+    """
+    Test that a bulkhead:
+    - Runs at most `size` calls at once, queueing the others
+    - Reports its running and queued calls
+    - Applies a new size to its limiter
+    """
+    bulkhead = Bulkhead("test", 1)
+    release = threading.Event()
+    stats = []
+
+    async def main():
+        async with anyio.create_task_group() as tasks:
+            for _ in range(2):
+                tasks.start_soon(bulkhead.run_sync, lambda: release.wait(5))
+            while bulkhead.running + bulkhead.queued < 2:
+                await anyio.sleep(0.01)
+            stats.append(bulkhead.stats())
+            release.set()
+        bulkhead.resize(3)
+        stats.append(bulkhead.stats())
+        return bulkhead.limiter().total_tokens
+
+    assert anyio.run(main) == 3
+    assert stats[0] == {
+        "threadpool.test.size": 1,
+        "threadpool.test.running": 1,
+        "threadpool.test.queued": 1,
+    }
+    assert stats[1]["threadpool.test.running"] == 0
+    assert stats[1]["threadpool.test.queued"] == 0
+    assert metrics.get("threadpool.test.queue_wait_seconds.count") == 2
+
+
+def test_user_routes_run_in_bulkheads():
+    """
+    Test that user routes are assigned to bulkheads:
+    - Sync reads (including the POST multi-get) to the read bulkhead
+    - Sync writes to the write bulkhead
+    - Async routes to none
+    """
+    bulkheads = {
+        (route.path, method): getattr(route.endpoint, "bulkhead", None)
+        for route in router.routes
+        for method in route.methods
+    }
+    assert bulkheads["/users/{user_id}", "GET"] is read_bulkhead
+    assert bulkheads["/users/batch-get", "POST"] is read_bulkhead
+    assert bulkheads["/users/", "POST"] is write_bulkhead
+    assert bulkheads["/users/{user_id}", "PATCH"] is write_bulkhead
+    assert bulkheads["/users/stream", "GET"] is None
+
+
+def test_threadpool_metrics(client):
+    """Test that the threadpool and bulkhead usage is exported as metrics."""
+    client.get("/api/v1/users/")
+    snapshot = client.get("/api/v1/system/metrics").json()["metrics"]
+
+    assert snapshot["threadpool.default.size"] == settings.THREADPOOL_SIZE
+    assert snapshot["threadpool.read.size"] == read_bulkhead.size
+    assert snapshot["threadpool.read.queue_wait_seconds.count"] >= 1
+    assert "threadpool.write.queued" in snapshot
@@ -0,0 +1,184 @@
+import gc
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.core import tracing
+from app.core.config import Settings
+from app.core.settings_provider import settings_provider
+from app.core.tracing import (
+    SpanExporter,
+    TracingMiddleware,
+    current_span,
+    install_sql_tracing,
+    parse_traceparent,
+    span,
+    start_trace,
+    traced,
+)
+from app.db import get_db
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+TRACEPARENT = f"00-{TRACE_ID}-00f067aa0ba902b7-01"
+
+
+@pytest.fixture
+def exporter(tmp_path, monkeypatch):
+    """Fixture that exports the spans to a temporary file, read by ``read_spans``."""
+    exporter = SpanExporter(str(tmp_path / "traces" / "spans.jsonl"))
+    monkeypatch.setattr(tracing, "span_exporter", exporter)
+    monkeypatch.setattr(main, "span_exporter", exporter)
+    exporter.start()
+    yield exporter
+    exporter.stop()
+
+
+def read_spans(exporter: SpanExporter):
+    exporter.stop()
+    with open(exporter.path) as file:
+        return [json.loads(line) for line in file]
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        None,
+        "garbage",
+        f"ff-{TRACE_ID}-00f067aa0ba902b7-01",
+        f"00-{'0' * 32}-00f067aa0ba902b7-01",
+        f"00-{TRACE_ID}-{'0' * 16}-01",
+    ],
+)
+def test_parse_traceparent_invalid(header):
+    """Test that missing and invalid traceparent headers are ignored."""
+    assert parse_traceparent(header) is None
+
+
+def test_start_trace_sampling():
+    """
+    Test the sampling of requests:
+    - Without traceparent, at the sample rate
+    - With one, as sampled by the caller, continuing its trace
+    """
+    assert start_trace("GET /", None, 0.0) is None
+    root = start_trace("GET /", None, 1.0)
+    assert len(root.trace_id) == 32 and root.parent_id is None
+
+    assert start_trace("GET /", TRACEPARENT[:-2] + "00", 1.0) is None
+    root = start_trace("GET /", TRACEPARENT, 0.0)
+    assert (root.trace_id, root.parent_id) == (TRACE_ID, "00f067aa0ba902b7")
+
+
+def test_spans_nest_and_record_errors(exporter):
+    """
+    Test that spans:
+    - Are only recorded within a sampled trace
+    - Are children of the span current when they start
+    - Record the error that ended them
+    """
+
+    @traced
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        fail()  # Outside of a trace
+
+    root = start_trace("GET /", TRACEPARENT, 0.0)
+    token = current_span.set(root)
+    try:
+        with span("outer", answer=42), pytest.raises(ValueError):
+            fail()
+    finally:
+        current_span.reset(token)
+    root.end()
+
+    inner, outer, exported_root = read_spans(exporter)
+    assert inner["name"].endswith("fail")
+    assert inner["parentSpanId"] == outer["spanId"]
+    assert inner["status"] == {
+        "code": "STATUS_CODE_ERROR",
+        "message": "ValueError: boom",
+    }
+    assert outer["parentSpanId"] == exported_root["spanId"]
+    assert outer["attributes"] == {"answer": 42}
+    assert {span["traceId"] for span in (inner, outer, exported_root)} == {TRACE_ID}
+
+
+def test_exporter_rotates_file(tmp_path):
+    """Test that the span file is rotated beyond its max size."""
+    exporter = SpanExporter(str(tmp_path / "spans.jsonl"), max_bytes=1, backup_count=2)
+    spans = [start_trace(f"span {i}", None, 1.0) for i in range(4)]
+    for value in spans:
+        value.end_ns = value.start_ns
+        exporter._write(open(exporter.path, "a"), [value]).close()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "spans.jsonl",
+        "spans.jsonl.1",
+        "spans.jsonl.2",
+    ]
+    with open(exporter.path) as file:
+        assert json.loads(file.read())["name"] == "span 3"
+
+
+def test_tracing_middleware_subscribes_weakly():
+    """Test that the middleware follows reloads without being kept alive."""
+    components = len(settings_provider._components)
+    middleware = TracingMiddleware(None, settings_provider.settings)
+    assert middleware in settings_provider._components
+
+    del middleware
+    gc.collect()
+    assert len(settings_provider._components) == components
+
+
+def test_tracing_middleware(exporter, file_engine, file_session_factory):
+    """
+    Test tracing requests end to end:
+    - The request, handler, service, repository and SQL spans of a trace
+    - Named after the route, continuing the caller's trace
+    """
+    install_sql_tracing(file_engine)
+    app = main.create_app(
+        Settings(
+            TRACING_ENABLED=True,
+            TRACING_SAMPLE_RATE=0.0,
+            JOBS_ENABLED=False,
+            MAINTENANCE_ENABLED=False,
+            READINESS_PROBE_ENABLED=False,
+            SETTINGS_RELOAD_ENABLED=False,
+        )
+    )
+
+    def override_get_db():
+        db = file_session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    with TestClient(app) as client:
+        assert client.get("/api/v1/users/1").status_code == 404
+        response = client.get("/api/v1/users/1", headers={"traceparent": TRACEPARENT})
+        assert response.status_code == 404
+
+    spans = {span["name"]: span for span in read_spans(exporter)}
+    assert {span["traceId"] for span in spans.values()} == {TRACE_ID}
+    root = spans["GET /users/{user_id}"]
+    assert root["parentSpanId"] == "00f067aa0ba902b7"
+    assert root["attributes"]["http.response.status_code"] == 404
+    assert spans["users.get_user"]["parentSpanId"] == root["spanId"]
+    assert (
+        spans["UserService.get_user"]["parentSpanId"]
+        == spans["users.get_user"]["spanId"]
+    )
+    assert (
+        spans["BaseRepository.get"]["parentSpanId"]
+        == spans["UserService.get_user"]["spanId"]
+    )
+    assert spans["SELECT"]["parentSpanId"] == spans["BaseRepository.get"]["spanId"]
+    assert spans["SELECT"]["attributes"]["db.system"] == "sqlite"
@@ -0,0 +1,211 @@
+import uuid
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import Base, get_engine
+from app.repositories.sharded_user_repository import (
+    PartialCommitError,
+    ShardedUserRepository,
+)
+from app.schemas.user import UserCreate, UserFilter, UserUpdate
+from app.services.user_service import UserService
+
+SHARDS = 3
+
+
+def unique_email():
+    return f"test_{uuid.uuid4()}@example.com"
+
+
+def email_for_shard(repository, shard):
+    """Generate a unique email whose home is the given shard."""
+    while True:
+        email = unique_email()
+        if repository.shard_for_email(email) == shard:
+            return email
+
+
+@pytest.fixture
+def shard_urls(tmp_path):
+    """Fixture that provides the URLs of empty shard databases."""
+    urls = [f"sqlite:///{tmp_path / f'shard{i}.db'}" for i in range(SHARDS)]
+    for url in urls:
+        Base.metadata.create_all(bind=get_engine(url))
+    yield urls
+    for url in urls:
+        get_engine(url).dispose()
+
+
+@pytest.fixture
+def sharded_repository(shard_urls):
+    """Fixture that provides a ShardedUserRepository over the test shards."""
+    return ShardedUserRepository(shard_urls)
+
+
+def test_create_routes_to_home_shard(sharded_repository):
+    """
+    Test that creating users:
+    - Stores each user in the home shard of its email
+    - Allocates ids congruent to that shard
+    - Makes users retrievable by id and email
+    """
+    users = [
+        sharded_repository.create(
+            UserCreate(name="User", email=email_for_shard(sharded_repository, shard))
+        )
+        for shard in (0, 1, 2, 1)
+    ]
+
+    assert [user.id % SHARDS for user in users] == [0, 1, 2, 1]
+    assert len({user.id for user in users}) == 4
+    for user in users:
+        assert sharded_repository.get(user.id).email == user.email
+        assert sharded_repository.get_by_email(user.email).id == user.id
+        with sharded_repository._repository(user.id % SHARDS) as repository:
+            assert repository.get(user.id) is not None
+
+
+def test_email_unique_across_shards(sharded_repository):
+    """Test that an email used in any shard cannot be registered again."""
+    user = sharded_repository.create(
+        UserCreate(name="User", email=email_for_shard(sharded_repository, 0))
+    )
+    moved_email = email_for_shard(sharded_repository, 1)
+    sharded_repository.update(user.id, UserUpdate(email=moved_email))
+
+    # The user kept its shard, but is still found by its new email
+    assert user.id % SHARDS == 0
+    assert sharded_repository.get_by_email(moved_email).id == user.id
+    with pytest.raises(ValueError, match="already registered"):
+        sharded_repository.create(UserCreate(name="Other", email=moved_email))
+
+    other = sharded_repository.create(
+        UserCreate(name="Other", email=email_for_shard(sharded_repository, 2))
+    )
+    with pytest.raises(ValueError, match="already registered"):
+        sharded_repository.update(other.id, UserUpdate(email=moved_email))
+
+
+def test_scatter_gather_reads(sharded_repository):
+    """
+    Test that list reads gather all shards:
+    - get_all merges the shards in id order, also with sparse fields
+    - get_many/get_many_by_email keep the requested order and skip missing
+    """
+    users = [
+        sharded_repository.create(
+            UserCreate(
+                name=f"User {i}", email=email_for_shard(sharded_repository, i % 3)
+            )
+        )
+        for i in range(6)
+    ]
+    ids = sorted(user.id for user in users)
+
+    assert [user.id for user in sharded_repository.get_all()] == ids
+    rows = sharded_repository.get_all(fields=("email",))
+    assert [row.id for row in rows] == ids
+    assert {row.email for row in rows} == {user.email for user in users}
+
+    requested = [users[4].id, 999, users[0].id, users[2].id]
+    assert [u.id for u in sharded_repository.get_many(requested)] == [
+        users[4].id,
+        users[0].id,
+        users[2].id,
+    ]
+    emails = [users[5].email, unique_email(), users[1].email]
+    assert [u.id for u in sharded_repository.get_many_by_email(emails)] == [
+        users[5].id,
+        users[1].id,
+    ]
+
+
+def test_create_many_and_bulk_operations(sharded_repository):
+    """Test multi-shard inserts and bulk operations merging each shard's result."""
+    domain = f"{uuid.uuid4().hex[:8]}.example.com"
+    schemas = [
+        UserCreate(name=f"User {i}", email=f"user{i}@{domain}") for i in range(9)
+    ]
+    assert sharded_repository.create_many(schemas) == 9
+    users = sharded_repository.get_many_by_email([s.email for s in schemas])
+    assert len(users) == 9
+    assert all(
+        user.id % SHARDS == sharded_repository.shard_for_email(user.email)
+        for user in users
+    )
+
+    criteria = sharded_repository.filter_criteria(UserFilter(email_domain=domain))
+    ids = sorted(user.id for user in users)
+    assert sharded_repository.bulk_update(criteria, {"name": "x"}, dry_run=True) == (
+        9,
+        None,
+    )
+    assert sharded_repository.bulk_update(criteria, {"name": "Renamed"}) == (9, None)
+    assert {user.name for user in sharded_repository.get_all()} == {"Renamed"}
+    assert sharded_repository.bulk_delete(criteria, return_ids=True) == (9, ids)
+    assert sharded_repository.get_all() == []
+
+
+def test_create_many_rolls_back_all_shards(sharded_repository):
+    """Test that a conflict in one shard leaves every shard unchanged."""
+    taken = sharded_repository.create(UserCreate(name="User", email=unique_email()))
+    schemas = [UserCreate(name="User", email=unique_email()) for _ in range(6)]
+
+    with pytest.raises(Exception, match="UNIQUE"):
+        sharded_repository.create_many(
+            [*schemas, UserCreate(name="Dup", email=taken.email)]
+        )
+    assert [user.id for user in sharded_repository.get_all()] == [taken.id]
+
+
+def fail_commits_after(monkeypatch, count):
+    """Make Session.commit fail once ``count`` commits succeeded."""
+    commit = Session.commit
+    commits = []
+
+    def failing_commit(self):
+        if len(commits) >= count:
+            raise OperationalError("COMMIT", {}, Exception("disk I/O error"))
+        commit(self)
+        commits.append(self)
+
+    monkeypatch.setattr(Session, "commit", failing_commit)
+
+
+def test_create_many_reports_partial_commit(sharded_repository, monkeypatch):
+    """
+    Test that a commit failing after other shards committed:
+    - Rolls back the shards left
+    - Raises PartialCommitError with the users stored and those not stored
+    """
+    schemas = [
+        UserCreate(name="User", email=email_for_shard(sharded_repository, shard))
+        for shard in (0, 1, 2, 0)
+    ]
+    fail_commits_after(monkeypatch, 1)
+
+    with pytest.raises(PartialCommitError, match="after 1 of 3 shards") as info:
+        sharded_repository.create_many(schemas)
+
+    monkeypatch.undo()
+    assert info.value.committed == [schemas[0], schemas[3]]
+    assert info.value.failed == [schemas[1], schemas[2]]
+    stored = sharded_repository.get_all()
+    assert sorted(user.email for user in stored) == sorted(
+        [schemas[0].email, schemas[3].email]
+    )
+
+
+def test_service_uses_configured_shards(shard_urls, monkeypatch):
+    """Test that UserService transparently uses the shards when configured."""
+    monkeypatch.setattr(settings, "USER_SHARD_URLS", shard_urls)
+    service = UserService(db=None)
+    assert isinstance(service.repository, ShardedUserRepository)
+
+    user = service.create_user(UserCreate(name="User", email=unique_email()))
+    assert service.get_user(user.id).email == user.email
+    assert service.delete_user(user.id) is True
+    assert service.get_all_users() == []
@@ -1,8 +1,12 @@
 import uuid
 from datetime import datetime, timezone
 
+import pytest
+from sqlalchemy.exc import IntegrityError
+
 from app.models.user import User
 from app.repositories.base import BaseRepository
+from app.repositories.user_repository import UserRepository, VersionMismatchError
 from app.schemas.user import UserCreate, UserUpdate
 
 
@@ -110,6 +114,65 @@ def test_base_repository_update(db_session):
     assert non_existent is None
 
 
+def test_user_repository_conditional_update(db_session):
+    """
+    Test user repository updates with an expected version:
+    - Every update increments the version
+    - An update at another version raises without writing
+    - An update of a non-existent user returns None
+    """
+    repo = UserRepository(db_session)
+    user = repo.create(UserCreate(name="Test User", email=unique_email()))
+    assert user.version == 1
+
+    updated = repo.update(user.id, UserUpdate(name="First"), expected_version=1)
+    assert (updated.name, updated.version) == ("First", 2)
+
+    with pytest.raises(VersionMismatchError) as error:
+        repo.update(user.id, UserUpdate(name="Second"), expected_version=1)
+    assert error.value.current_version == 2
+    assert repo.get(user.id).name == "First"
+
+    assert repo.update(user.id, UserUpdate(name="Third")).version == 3
+    assert repo.update(999, UserUpdate(name="Third"), expected_version=1) is None
+
+
+def test_user_repository_update_miss_releases_write_lock(file_session_factory):
+    """
+    Test that updates matching no row end their transaction, so that other
+    connections can write afterwards
+    """
+    repo = UserRepository(file_session_factory())
+    user = repo.create(UserCreate(name="Test User", email=unique_email()))
+    other = UserRepository(file_session_factory())
+    other.db.connection().exec_driver_sql("PRAGMA busy_timeout = 100")
+
+    assert repo.update(999, UserUpdate(name="Nobody")) is None
+    other.create(UserCreate(name="Other", email=unique_email()))
+    with pytest.raises(VersionMismatchError):
+        repo.update(user.id, UserUpdate(name="Stale"), expected_version=5)
+    assert other.update(user.id, UserUpdate(name="Renamed")).name == "Renamed"
+
+
+def test_user_repository_update_constraint_violations(file_session_factory):
+    """
+    Test that update maps constraint violations:
+    - A duplicate email to ValueError
+    - Others are raised as they are
+    """
+    repo = UserRepository(file_session_factory())
+    user = repo.create(UserCreate(name="Test User", email=unique_email()))
+    other = repo.create(UserCreate(name="Other User", email=unique_email()))
+
+    # Skip the email check, as if the email was registered concurrently
+    repo.get_by_email = lambda email, fields=None: None
+    with pytest.raises(ValueError, match="already registered"):
+        repo.update(user.id, UserUpdate(email=other.email))
+    with pytest.raises(IntegrityError):
+        repo.update(user.id, UserUpdate.model_construct(name=None))
+    assert repo.get(user.id).name == "Test User"
+
+
 def test_base_repository_delete(db_session):
     """
     Test base repository delete operation:
@@ -151,3 +214,75 @@ def test_create_user(db_session):
     assert user.email.startswith("test_")
     assert user.created_at is not None
     assert user.updated_at is not None
+
+
+def test_base_repository_get_with_fields(db_session):
+    """
+    Test that repository reads can be restricted to a subset of columns:
+    - Only the requested columns are selected
+    - Returns None for non-existent ID
+    """
+    repo = BaseRepository(User, db_session)
+    created_user = repo.create(UserCreate(name="Test User", email=unique_email()))
+
+    row = repo.get(created_user.id, fields=("id", "email"))
+    assert row._asdict() == {"id": created_user.id, "email": created_user.email}
+    assert repo.get(999, fields=("id",)) is None
+
+    rows = repo.get_all(fields=("name",))
+    assert [r._asdict() for r in rows] == [{"name": "Test User"}]
+
+
+def test_base_repository_get_many(db_session):
+    """
+    Test fetching many entities in one query:
+    - Results follow the requested order, duplicates collapsed
+    - Missing IDs are skipped
+    - The key column is selected when fields are restricted
+    """
+    repo = BaseRepository(User, db_session)
+    users = [
+        repo.create(UserCreate(name=f"User {i}", email=unique_email()))
+        for i in range(3)
+    ]
+
+    fetched = repo.get_many([users[2].id, 999, users[0].id, users[2].id])
+    assert [u.id for u in fetched] == [users[2].id, users[0].id]
+    assert repo.get_many([]) == []
+
+    rows = repo.get_many([users[1].id], fields=("name",))
+    assert rows[0]._asdict() == {"id": users[1].id, "name": "User 1"}
+
+
+def test_user_repository_get_many_by_email(db_session):
+    """Test fetching many users by email address in one query."""
+    repo = UserRepository(db_session)
+    user = repo.create(UserCreate(name="Test User", email=unique_email()))
+
+    fetched = repo.get_many_by_email([unique_email(), user.email])
+    assert [u.id for u in fetched] == [user.id]
+
+
+def test_base_repository_bulk_update_and_delete(db_session):
+    """
+    Test bulk operations:
+    - Update and delete match the criteria with a single statement
+    - Dry runs report the matches without writing
+    """
+    repo = BaseRepository(User, db_session)
+    users = [
+        repo.create(UserCreate(name=f"User {i}", email=unique_email()))
+        for i in range(3)
+    ]
+    first_two = [User.id.in_([users[0].id, users[1].id])]
+
+    assert repo.bulk_update(first_two, {"name": "Renamed"}, dry_run=True) == (2, None)
+    assert repo.bulk_update(first_two, {"name": "Renamed"}, return_ids=True) == (
+        2,
+        [users[0].id, users[1].id],
+    )
+    db_session.expire_all()
+    assert [u.name for u in repo.get_all()] == ["Renamed", "Renamed", "User 2"]
+
+    assert repo.bulk_delete(first_two) == (2, None)
+    assert [u.id for u in repo.get_all()] == [users[2].id]
@@ -3,8 +3,11 @@ from typing import Dict
 import pytest
 from fastapi import FastAPI
 
+from app.core.config import settings
 from app.routers import system, users
 
+ADMIN_TOKEN = "test-admin-token"
+
 
 @pytest.fixture
 def test_app(client) -> FastAPI:
@@ -15,6 +18,14 @@ def test_app(client) -> FastAPI:
     return app
 
 
+@pytest.fixture
+def admin_client(client, monkeypatch):
+    """Test client sending the configured admin token with every request."""
+    monkeypatch.setattr(settings, "ADMIN_API_TOKEN", ADMIN_TOKEN)
+    client.headers["X-Admin-Token"] = ADMIN_TOKEN
+    return client
+
+
 @pytest.fixture
 def api_headers() -> Dict[str, str]:
     """Fixture that provides common API headers."""
@@ -0,0 +1,166 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import status
+
+from app.core.config import settings
+from app.main import app
+from app.models.user import User
+from app.routers.admin import get_maintenance_scheduler
+from app.services.maintenance import MaintenanceScheduler
+
+BULK_UPDATE = f"{settings.API_V1_STR}/admin/users/bulk-update"
+BULK_DELETE = f"{settings.API_V1_STR}/admin/users/bulk-delete"
+MAINTENANCE = f"{settings.API_V1_STR}/admin/maintenance"
+
+
+@pytest.fixture
+def users(db_session):
+    """Fixture that provides users spread over two email domains and dates."""
+    users = [
+        User(
+            name=f"User {i}",
+            email=f"user{i}@{'old.example.com' if i < 2 else 'example.org'}",
+            created_at=datetime(2020 + i, 1, 1, tzinfo=timezone.utc),
+        )
+        for i in range(4)
+    ]
+    db_session.add_all(users)
+    db_session.commit()
+    return users
+
+
+def test_bulk_update_users(admin_client, db_session, users):
+    """
+    Test bulk updating users:
+    - Only users matching every criterion are updated
+    - Affected IDs are returned on request
+    """
+    response = admin_client.post(
+        BULK_UPDATE,
+        json={
+            "filter": {"email_domain": "OLD.example.com", "ids": [users[1].id]},
+            "changes": {"name": "Deactivated"},
+            "return_ids": True,
+        },
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"affected": 1, "ids": [users[1].id], "dry_run": False}
+
+    db_session.expire_all()
+    assert [u.name for u in db_session.query(User).order_by(User.id)] == [
+        "User 0",
+        "Deactivated",
+        "User 2",
+        "User 3",
+    ]
+
+
+def test_bulk_delete_users_dry_run(admin_client, db_session, users):
+    """Test that a dry run reports the matching users without deleting them."""
+    response = admin_client.post(
+        BULK_DELETE,
+        json={
+            "filter": {"created_before": "2022-01-01T00:00:00"},
+            "dry_run": True,
+            "return_ids": True,
+        },
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "affected": 2,
+        "ids": [users[0].id, users[1].id],
+        "dry_run": True,
+    }
+    assert db_session.query(User).count() == 4
+
+
+def test_bulk_delete_users(admin_client, db_session, users):
+    """Test deleting all users in a created_at range with a single request."""
+    response = admin_client.post(
+        BULK_DELETE,
+        json={
+            "filter": {
+                "created_after": "2021-01-01T00:00:00",
+                "created_before": "2023-01-01T00:00:00",
+            }
+        },
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"affected": 2, "ids": None, "dry_run": False}
+    assert {u.id for u in db_session.query(User)} == {users[0].id, users[3].id}
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"filter": {}},
+        {"filter": {"ids": []}},
+        {"filter": {"email_domain": "%"}},
+        {
+            "filter": {
+                "created_after": "2023-01-01T00:00:00",
+                "created_before": "2022-01-01T00:00:00",
+            }
+        },
+    ],
+)
+def test_bulk_delete_invalid_filter(admin_client, payload):
+    """Test that empty or invalid filters are rejected with 422."""
+    response = admin_client.post(BULK_DELETE, json=payload)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_bulk_update_rejects_email_changes(admin_client):
+    """Test that emails cannot be bulk updated."""
+    response = admin_client.post(
+        BULK_UPDATE,
+        json={"filter": {"ids": [1]}, "changes": {"email": "same@example.com"}},
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_admin_token(client, monkeypatch):
+    """
+    Test that admin endpoints require X-Admin-Token:
+    - Refused to everyone while no token is configured
+    - Refused without the configured token, allowed with it
+    """
+    payload = {"filter": {"ids": [1]}, "dry_run": True}
+    monkeypatch.setattr(settings, "ADMIN_API_TOKEN", None)
+    response = client.post(BULK_DELETE, json=payload)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    response = client.post(BULK_DELETE, json=payload, headers={"X-Admin-Token": ""})
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    monkeypatch.setattr(settings, "ADMIN_API_TOKEN", "secret")
+    response = client.post(BULK_DELETE, json=payload)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    response = client.post(
+        BULK_DELETE, json=payload, headers={"X-Admin-Token": "secret"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_run_maintenance(admin_client, file_engine):
+    """Test triggering database maintenance manually."""
+    scheduler = MaintenanceScheduler(engines=lambda: [("test", file_engine)])
+    app.dependency_overrides[get_maintenance_scheduler] = lambda: scheduler
+
+    response = admin_client.post(MAINTENANCE)
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [db["database"] for db in data["databases"]] == [file_engine.url.database]
+    assert scheduler.last_report is not None
+
+
+def test_run_maintenance_in_progress(admin_client):
+    """Test that a manual run is refused while another one is in progress."""
+    scheduler = MaintenanceScheduler(engines=lambda: [])
+    app.dependency_overrides[get_maintenance_scheduler] = lambda: scheduler
+
+    with scheduler._run_lock:
+        response = admin_client.post(MAINTENANCE)
+    assert response.status_code == status.HTTP_409_CONFLICT
@@ -21,3 +21,39 @@ def test_health_check_headers(client):
     """
     response = client.get(f"{settings.API_V1_STR}/system/health")
     assert response.headers["content-type"] == "application/json"
+
+
+def test_readiness_check(client):
+    """
+    Test the readiness endpoint returns the prober's report:
+    - 200 status code when ready
+    - 503 status code with the failed checks when degraded
+    """
+    from app.routers.system import get_readiness_prober
+    from app.schemas.system import DependencyCheck, ReadinessResponse
+
+    class StubProber:
+        def __init__(self, ok):
+            self.ok = ok
+
+        def report(self):
+            return ReadinessResponse(
+                status="ready" if self.ok else "degraded",
+                checked_at="2024-01-01T00:00:00Z",
+                age_seconds=1.5,
+                checks=[DependencyCheck(name="main.database", ok=self.ok)],
+            )
+
+    client.app.dependency_overrides[get_readiness_prober] = lambda: StubProber(True)
+    response = client.get(f"{settings.API_V1_STR}/system/ready")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == "ready"
+    assert response.json()["age_seconds"] == 1.5
+
+    client.app.dependency_overrides[get_readiness_prober] = lambda: StubProber(False)
+    response = client.get(f"{settings.API_V1_STR}/system/ready")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json()["status"] == "degraded"
+    assert response.json()["checks"] == [
+        {"name": "main.database", "ok": False, "detail": None}
+    ]
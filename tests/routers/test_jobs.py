@@ -0,0 +1,113 @@
+import pytest
+from fastapi import status
+
+from app.core.config import settings
+from app.main import app
+from app.routers.system import get_job_runner
+from app.services.job_runner import JobRunner, register_job_handler
+
+
+@register_job_handler("test.noop")
+def noop(context, payload):
+    return None
+
+
+@pytest.fixture
+def jobs_client(admin_client):
+    """Test client whose job runner is not started, so jobs stay queued."""
+    app.dependency_overrides[get_job_runner] = JobRunner
+    yield admin_client
+
+
+def test_submit_and_get_job(jobs_client):
+    """
+    Test submitting a job:
+    - Returns 202 with the queued job
+    - The job can be polled and listed
+    """
+    response = jobs_client.post(
+        f"{settings.API_V1_STR}/system/jobs",
+        json={"type": "test.noop", "payload": {"a": 1}},
+    )
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    job = response.json()
+    assert job["status"] == "queued"
+    assert job["payload"] == {"a": 1}
+    assert job["max_attempts"] == settings.JOB_MAX_ATTEMPTS
+
+    response = jobs_client.get(f"{settings.API_V1_STR}/system/jobs/{job['id']}")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["id"] == job["id"]
+
+    response = jobs_client.get(
+        f"{settings.API_V1_STR}/system/jobs", params={"status": "queued"}
+    )
+    assert [j["id"] for j in response.json()] == [job["id"]]
+
+
+def test_cancel_job(jobs_client):
+    """Test cancelling a queued job through the API."""
+    job = jobs_client.post(
+        f"{settings.API_V1_STR}/system/jobs", json={"type": "test.noop"}
+    ).json()
+
+    response = jobs_client.post(f"{settings.API_V1_STR}/system/jobs/{job['id']}/cancel")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == "cancelled"
+
+
+def test_job_errors(jobs_client):
+    """Test unknown job types (422) and unknown job ids (404)."""
+    response = jobs_client.post(
+        f"{settings.API_V1_STR}/system/jobs", json={"type": "test.unknown"}
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    assert (
+        jobs_client.get(f"{settings.API_V1_STR}/system/jobs/999").status_code
+        == status.HTTP_404_NOT_FOUND
+    )
+    assert (
+        jobs_client.post(f"{settings.API_V1_STR}/system/jobs/999/cancel").status_code
+        == status.HTTP_404_NOT_FOUND
+    )
+
+
+def test_import_job_paths(jobs_client, tmp_path, monkeypatch):
+    """Test that import jobs may only read files within IMPORT_UPLOAD_DIR."""
+    monkeypatch.setattr(settings, "IMPORT_UPLOAD_DIR", str(tmp_path / "uploads"))
+    (tmp_path / "uploads").mkdir()
+    (tmp_path / "uploads" / "link.csv").symlink_to("/etc/passwd")
+
+    for path in [
+        "/etc/passwd",
+        str(tmp_path / "uploads" / ".." / "users.csv"),
+        str(tmp_path / "uploads" / "link.csv"),
+        None,
+    ]:
+        response = jobs_client.post(
+            f"{settings.API_V1_STR}/system/jobs",
+            json={"type": "users.import", "payload": {"path": path}},
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY, path
+
+    response = jobs_client.post(
+        f"{settings.API_V1_STR}/system/jobs",
+        json={
+            "type": "users.import",
+            "payload": {"path": str(tmp_path / "uploads" / "users.csv")},
+        },
+    )
+    assert response.status_code == status.HTTP_202_ACCEPTED
+
+
+def test_jobs_require_admin_token(client, monkeypatch):
+    """Test that the job endpoints are guarded like the admin endpoints."""
+    monkeypatch.setattr(settings, "ADMIN_API_TOKEN", "secret")
+    url = f"{settings.API_V1_STR}/system/jobs"
+
+    assert client.get(url).status_code == status.HTTP_403_FORBIDDEN
+    response = client.post(url, json={"type": "test.noop"})
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    response = client.get(url, headers={"X-Admin-Token": "secret"})
+    assert response.status_code == status.HTTP_200_OK
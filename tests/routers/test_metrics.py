@@ -0,0 +1,16 @@
+from fastapi import status
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+def test_get_metrics(client):
+    """
+    Test the metrics endpoint returns:
+    - 200 status code
+    - The current values of the metrics registry
+    """
+    metrics.increment("test.requests", 3)
+    response = client.get(f"{settings.API_V1_STR}/system/metrics")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["metrics"]["test.requests"] >= 3
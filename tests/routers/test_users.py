@@ -1,3 +1,4 @@
+import asyncio
 import uuid
 
 import pytest
@@ -7,6 +8,10 @@ from fastapi.testclient import TestClient
 from app.core.config import settings
 from app.db import get_db
 from app.main import app
+from app.repositories.user_repository import UserRepository
+from app.routers.users import get_user_service, stream_events
+from app.services.single_writer import WriteQueueFullError
+from app.services.user_service import UserService, user_events
 
 
 @pytest.fixture
@@ -86,6 +91,35 @@ def test_get_users(client):
     assert any(u["email"] == email for u in users)
 
 
+def test_users_response_matches_response_model(client, db_session):
+    """
+    Test that users are serialized exactly as the response_model would:
+    - Same JSON bytes as FastAPI's List[User] encoding
+    - The route still documents its response model
+    """
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    from app.schemas.user import User, UserCreate
+
+    repository = UserRepository(db_session)
+    for i in range(3):
+        repository.create(UserCreate(name=f"User {i}", email=unique_email()))
+    rows = repository.get_all()
+
+    response = client.get(f"{settings.API_V1_STR}/users/")
+
+    expected = JSONResponse(
+        jsonable_encoder([User.model_validate(row) for row in rows])
+    ).body
+    assert response.content == expected
+    assert response.headers["content-type"] == "application/json"
+    schema = client.get(f"{settings.API_V1_STR}/openapi.json").json()
+    assert schema["paths"]["/api/v1/users/"]["get"]["responses"]["200"]["content"][
+        "application/json"
+    ]["schema"]["items"] == {"$ref": "#/components/schemas/User"}
+
+
 def test_create_user_invalid_email(client):
     """
     Test that creating a user with invalid email:
@@ -127,3 +161,324 @@ def test_create_user_invalid_data(client: TestClient):
     }
     response = client.post("/api/v1/users/", json=user_data)
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_get_user(client, test_user):
+    """
+    Test getting a single user by ID:
+    - Returns 200 status code
+    - Returns the user's details
+    """
+    response = client.get(f"{settings.API_V1_STR}/users/{test_user.id}")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["id"] == test_user.id
+    assert data["email"] == test_user.email
+
+
+def test_get_user_not_found(client):
+    """Test that getting a non-existent user returns 404."""
+    response = client.get(f"{settings.API_V1_STR}/users/999")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_get_users_sparse_fields(client, test_user):
+    """
+    Test getting users with a sparse fieldset:
+    - Only the requested fields are returned
+    - Fields are returned regardless of their order or duplication
+    """
+    response = client.get(
+        f"{settings.API_V1_STR}/users/", params={"fields": "email, id,email"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [{"id": test_user.id, "email": test_user.email}]
+
+
+def test_get_user_sparse_fields(client, test_user):
+    """Test getting a single user with a sparse fieldset."""
+    response = client.get(
+        f"{settings.API_V1_STR}/users/{test_user.id}",
+        params={"fields": "name,created_at"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert set(data) == {"name", "created_at"}
+    assert data["name"] == test_user.name
+
+
+@pytest.mark.parametrize("fields", ["password", "id,unknown", " , "])
+def test_get_users_invalid_fields(client, fields):
+    """Test that unknown or empty fieldsets are rejected with 422."""
+    response = client.get(f"{settings.API_V1_STR}/users/", params={"fields": fields})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert "detail" in response.json()
+
+
+def test_get_users_by_ids(client, db_session):
+    """
+    Test fetching many users with ?ids=:
+    - Users are returned in the requested order
+    - Missing IDs are reported in the X-Missing-Ids header
+    """
+    ids = [
+        client.post(
+            "/api/v1/users/", json={"name": "U", "email": unique_email()}
+        ).json()["id"]
+        for _ in range(3)
+    ]
+    requested = [ids[2], 999, ids[0]]
+    response = client.get(
+        f"{settings.API_V1_STR}/users/",
+        params={"ids": ",".join(map(str, requested))},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert [u["id"] for u in response.json()] == [ids[2], ids[0]]
+    assert response.headers["X-Missing-Ids"] == "999"
+
+    response = client.get(
+        f"{settings.API_V1_STR}/users/", params={"ids": str(ids[1]), "fields": "email"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert list(response.json()[0]) == ["email"]
+    assert response.headers["X-Missing-Ids"] == ""
+
+
+@pytest.mark.parametrize("ids", ["1,a", "", ",".join(["1"] * 101)])
+def test_get_users_by_ids_invalid(client, ids):
+    """Test that malformed, empty or oversized id lists are rejected with 422."""
+    response = client.get(f"{settings.API_V1_STR}/users/", params={"ids": ids})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_batch_get_users(client, test_user):
+    """
+    Test fetching many users by ID and email in one request:
+    - A user matched by both ID and email is only returned once
+    - Missing IDs and emails are reported
+    """
+    missing_email = unique_email()
+    response = client.post(
+        f"{settings.API_V1_STR}/users/batch-get",
+        json={"ids": [test_user.id, 999], "emails": [test_user.email, missing_email]},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [u["id"] for u in data["users"]] == [test_user.id]
+    assert data["missing_ids"] == [999]
+    assert data["missing_emails"] == [missing_email]
+
+
+def test_batch_get_users_invalid(client):
+    """Test that empty or oversized batches are rejected with 422."""
+    response = client.post(f"{settings.API_V1_STR}/users/batch-get", json={})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    response = client.post(
+        f"{settings.API_V1_STR}/users/batch-get", json={"ids": list(range(101))}
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_import_users(client, tmp_path, monkeypatch):
+    """
+    Test importing users from an uploaded file:
+    - Returns a summary of the import
+    - Failed rows can be downloaded as an error report
+    """
+    monkeypatch.setattr(settings, "IMPORT_REPORT_DIR", str(tmp_path))
+    email = unique_email()
+    content = f"name,email\nUser,{email}\nBad,not-an-email\n"
+
+    response = client.post(
+        f"{settings.API_V1_STR}/users/import",
+        params={"chunk_size": 1},
+        files={"file": ("users.csv", content, "text/csv")},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    result = response.json()
+    assert (result["total_rows"], result["imported"], result["failed"]) == (2, 1, 1)
+
+    response = client.get(
+        f"{settings.API_V1_STR}/users/import/{result['import_id']}/errors"
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "not-an-email" in response.text
+
+
+def test_import_users_unknown_format(client):
+    """Test that an upload with no recognizable format is rejected with 422."""
+    response = client.post(
+        f"{settings.API_V1_STR}/users/import",
+        files={"file": ("users.txt", "name,email\n", "text/plain")},
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_get_import_errors_not_found(client):
+    """Test that unknown or malformed import ids return 404."""
+    for import_id in ("0" * 32, "..%2F..%2Fsecret"):
+        response = client.get(f"{settings.API_V1_STR}/users/import/{import_id}/errors")
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_create_user_idempotency_key(client, db_session):
+    """
+    Test creating users with an Idempotency-Key:
+    - Retries replay the first response without creating the user again
+    - Replayed client errors too
+    - Reusing the key with another body returns 422
+    """
+    user_data = {"name": "Retried User", "email": unique_email()}
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+    first = client.post(
+        f"{settings.API_V1_STR}/users/", json=user_data, headers=headers
+    )
+    retry = client.post(
+        f"{settings.API_V1_STR}/users/", json=user_data, headers=headers
+    )
+
+    assert first.status_code == retry.status_code == status.HTTP_201_CREATED
+    assert retry.content == first.content
+    assert "idempotent-replayed" not in first.headers
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert len(UserRepository(db_session).get_many_by_email([user_data["email"]])) == 1
+
+    duplicate = {"Idempotency-Key": str(uuid.uuid4())}
+    for _ in range(2):
+        response = client.post(
+            f"{settings.API_V1_STR}/users/", json=user_data, headers=duplicate
+        )
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert "already registered" in response.json()["detail"]
+
+    response = client.post(
+        f"{settings.API_V1_STR}/users/",
+        json={**user_data, "name": "Other"},
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_update_user_if_match(client, test_user):
+    """
+    Test updating a user with If-Match:
+    - GET returns the user's ETag, which PATCH accepts and changes
+    - An outdated ETag returns 412 with the current one
+    - Without If-Match the update is unconditional
+    """
+    url = f"{settings.API_V1_STR}/users/{test_user.id}"
+    etag = client.get(url).headers["etag"]
+
+    response = client.patch(url, json={"name": "First"}, headers={"If-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["name"] == "First"
+    assert response.headers["etag"] != etag
+    assert client.get(url).headers["etag"] == response.headers["etag"]
+
+    response = client.patch(url, json={"name": "Second"}, headers={"If-Match": etag})
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    assert response.headers["etag"] != etag
+    assert client.get(url).json()["name"] == "First"
+
+    response = client.patch(url, json={"name": "Third"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["name"] == "Third"
+
+
+@pytest.mark.parametrize("body", [{"name": None}, {"email": None}])
+def test_update_user_null_fields(client, test_user, body):
+    """Test that required fields cannot be cleared with an explicit null."""
+    response = client.patch(f"{settings.API_V1_STR}/users/{test_user.id}", json=body)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.parametrize("if_match", ["*", '"1"'])
+def test_update_user_not_found(client, if_match):
+    """Test that updating a non-existent user returns 404."""
+    response = client.patch(
+        f"{settings.API_V1_STR}/users/999",
+        json={"name": "Nobody"},
+        headers={"If-Match": if_match},
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_create_user_write_queue_full(client, sample_user_data):
+    """Test that writes rejected by a full write queue are answered with 503."""
+
+    class FullWriter:
+        def run(self, operation):
+            raise WriteQueueFullError(retry_after=1.0)
+
+    app.dependency_overrides[get_user_service] = lambda: UserService(
+        repository=UserRepository(None), writer=FullWriter()
+    )
+    response = client.post("/api/v1/users/", json=sample_user_data)
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_get_user_changes(client, sample_user_data):
+    """
+    Test the delta-sync endpoint:
+    - Without `since`, returns only the current cursor
+    - Returns the changes made after the cursor, with the next cursor
+    - Answers 410 when the cursor is unknown, so the client resyncs
+    """
+    url = f"{settings.API_V1_STR}/users/changes"
+    since = client.get(url).json()["next_since"]
+    created = client.post(f"{settings.API_V1_STR}/users/", json=sample_user_data)
+
+    response = client.get(url, params={"since": since})
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [c["operation"] for c in data["changes"]] == ["create"]
+    assert data["changes"][0]["user"] == created.json()
+    assert data["next_since"] == since + 1
+    assert data["has_more"] is False
+
+    response = client.get(url, params={"since": since + 100})
+    assert response.status_code == status.HTTP_410_GONE
+
+
+def test_stream_user_events():
+    """
+    Test the user event stream:
+    - Sends keep-alive comments while idle
+    - Sends published events with their id and type
+    """
+
+    async def main():
+        stream = stream_events(None, heartbeat=0.01)
+        assert await stream.__anext__() == ": keep-alive\n\n"
+        event = user_events.publish("user.deleted", '{"id": 1}')
+        message = await stream.__anext__()
+        await stream.aclose()
+        return event, message
+
+    event, message = asyncio.run(main())
+    assert message == f'id: {event.id}\nevent: user.deleted\ndata: {{"id": 1}}\n\n'
+    assert user_events.subscriber_count == 0
+
+
+def test_stream_user_events_resync():
+    """Test that streams resumed from an unknown event id start with a resync."""
+
+    async def main():
+        stream = stream_events("unknown-1", heartbeat=0.01)
+        message = await stream.__anext__()
+        await stream.aclose()
+        return message
+
+    assert asyncio.run(main()) == "event: resync\ndata: {}\n\n"
+
+
+def test_stream_user_events_limit(client, monkeypatch):
+    """Test that streams beyond SSE_MAX_SUBSCRIBERS are refused."""
+    monkeypatch.setattr(settings, "SSE_MAX_SUBSCRIBERS", 0)
+    response = client.get(f"{settings.API_V1_STR}/users/stream")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
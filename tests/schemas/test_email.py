@@ -0,0 +1,40 @@
+import pytest
+from pydantic import TypeAdapter, ValidationError
+
+from app.core.metrics import metrics
+from app.schemas.email import Email, normalize_email
+from app.schemas.user import UserBatchGet, UserCreate
+
+
+def test_email_behaves_like_email_str():
+    """Test that emails are normalized and rejected like EmailStr does."""
+    adapter = TypeAdapter(Email)
+    assert adapter.validate_python("john@Example.COM") == "john@example.com"
+    assert adapter.validate_python("John <john@example.com>") == "john@example.com"
+    with pytest.raises(ValidationError, match="not a valid email address"):
+        UserCreate(name="John", email="not-an-email")
+    assert adapter.json_schema() == {"type": "string", "format": "email"}
+
+
+def test_repeated_emails_are_validated_once():
+    """Test that each distinct address is validated once, and stats reported."""
+    normalize_email.cache_clear()
+    emails = [f"user{i % 5}@example.com" for i in range(50)]
+
+    batch = UserBatchGet(emails=emails)
+
+    assert batch.emails == emails
+    info = normalize_email.cache_info()
+    assert (info.misses, info.hits) == (5, 45)
+    stats = metrics.snapshot()
+    assert stats["email_cache.entries"] == 5
+    assert stats["email_cache.hit_ratio"] == 0.9
+
+
+def test_invalid_emails_are_not_cached():
+    """Test that invalid addresses raise every time without filling the cache."""
+    normalize_email.cache_clear()
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            normalize_email("not-an-email")
+    assert normalize_email.cache_info().currsize == 0
@@ -0,0 +1,211 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.core.deadlines import (
+    DeadlineExceededError,
+    deadline,
+    install_deadline_handler,
+)
+from app.repositories.idempotency_repository import IdempotencyRepository
+from app.services.idempotency import (
+    IdempotencyKeyInProgressError,
+    IdempotencyKeyMismatchError,
+    IdempotencyService,
+    request_hash,
+)
+
+FINGERPRINT = request_hash("POST", "/users", b'{"name":"John"}')
+
+
+class Counter:
+    """Request handler counting its executions."""
+
+    def __init__(self, response=(201, b'{"id":1}')):
+        self.calls = 0
+        self.response = response
+
+    def __call__(self):
+        self.calls += 1
+        return self.response
+
+
+def test_request_hash():
+    """Test that fingerprints tell requests apart, and only them."""
+    assert request_hash("POST", "/users", b"{}") == request_hash(
+        "POST", "/users", b"{}"
+    )
+    assert request_hash("POST", "/users", b"{}") != request_hash("POST", "/users", b"")
+    assert request_hash("POST", "/a", b"b") != request_hash("POST", "/ab", b"")
+
+
+def test_retries_get_the_stored_response(file_session_factory):
+    """
+    Test that a key's request runs once:
+    - Retries get the stored response, marked as replayed
+    - Reusing the key for another request is an error
+    """
+    service = IdempotencyService(file_session_factory())
+    execute = Counter()
+
+    first = service.run("key-1", FINGERPRINT, execute)
+    retry = IdempotencyService(file_session_factory()).run(
+        "key-1", FINGERPRINT, execute
+    )
+
+    assert first == ((201, b'{"id":1}'), False)
+    assert retry == ((201, b'{"id":1}'), True)
+    assert execute.calls == 1
+    with pytest.raises(IdempotencyKeyMismatchError):
+        service.run("key-1", request_hash("POST", "/users", b"{}"), execute)
+
+
+def test_concurrent_duplicates_wait(file_session_factory):
+    """Test that duplicates sent while the first request runs wait for it."""
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def execute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 201, b"created"
+
+    results = []
+
+    def send():
+        service = IdempotencyService(file_session_factory())
+        results.append(service.run("key-2", FINGERPRINT, execute))
+
+    threads = [threading.Thread(target=send) for _ in range(3)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results) == [
+        ((201, b"created"), False),
+        ((201, b"created"), True),
+        ((201, b"created"), True),
+    ]
+
+
+def test_waits_on_requests_in_flight_elsewhere(file_session_factory):
+    """
+    Test a key claimed by another process:
+    - Conflict once the wait is over while it is still in flight
+    - Its response, once stored
+    """
+    other_process = IdempotencyRepository(file_session_factory())
+    now = datetime.now(timezone.utc)
+    assert other_process.claim(
+        "key-3", FINGERPRINT, now, now + timedelta(hours=1), now + timedelta(hours=1)
+    )
+    service = IdempotencyService(file_session_factory(), wait=0.1)
+    execute = Counter()
+
+    with pytest.raises(IdempotencyKeyInProgressError):
+        service.run("key-3", FINGERPRINT, execute)
+
+    other_process.complete("key-3", 409, b"conflict")
+    assert service.run("key-3", FINGERPRINT, execute) == ((409, b"conflict"), True)
+    assert execute.calls == 0
+
+
+def test_failures_and_expired_keys_run_again(file_session_factory):
+    """
+    Test that requests run again:
+    - After the first attempt failed with an exception or a server error
+    - Once the stored response expired
+    """
+    service = IdempotencyService(file_session_factory())
+
+    def fail():
+        raise RuntimeError("database is locked")
+
+    with pytest.raises(RuntimeError):
+        service.run("key-4", FINGERPRINT, fail)
+    assert service.run("key-4", FINGERPRINT, Counter((503, b""))) == ((503, b""), False)
+    assert service.run("key-4", FINGERPRINT, Counter()) == ((201, b'{"id":1}'), False)
+
+    expiring = IdempotencyService(file_session_factory(), ttl=timedelta(seconds=-1))
+    execute = Counter()
+    expiring.run("key-5", FINGERPRINT, execute)
+    expiring.run("key-5", FINGERPRINT, execute)
+    assert execute.calls == 2
+
+
+def test_keys_of_lost_requests_are_taken_over(file_session_factory):
+    """
+    Test a key claimed by a request that was lost (its process crashed):
+    - Retries wait while its claim holds
+    - A retry takes the key over and runs once the claim lapsed
+    """
+    other_process = IdempotencyRepository(file_session_factory())
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(hours=1)
+    assert other_process.claim("key-6", FINGERPRINT, now, expires_at, expires_at)
+    execute = Counter()
+
+    with pytest.raises(IdempotencyKeyInProgressError):
+        IdempotencyService(file_session_factory(), wait=0.1).run(
+            "key-6", FINGERPRINT, execute
+        )
+
+    assert other_process.claim("key-7", FINGERPRINT, now, expires_at, now)
+    service = IdempotencyService(file_session_factory(), wait=0.1)
+    assert service.run("key-7", FINGERPRINT, execute) == ((201, b'{"id":1}'), False)
+    assert execute.calls == 1
+    assert not other_process.take_over("key-7", FINGERPRINT, now, expires_at)
+
+
+def test_keys_are_released_past_the_deadline(file_engine, file_session_factory):
+    """Test that a request aborted by its deadline releases its key."""
+    install_deadline_handler(file_engine)
+    db = file_session_factory()
+    service = IdempotencyService(db)
+
+    def slow():
+        db.execute(text("SELECT 1"))  # Raises once the deadline passed
+        return 201, b""
+
+    with deadline(0), pytest.raises(DeadlineExceededError):
+        service.run("key-8", FINGERPRINT, slow)
+    assert service.run("key-8", FINGERPRINT, Counter()) == ((201, b'{"id":1}'), False)
+
+
+def test_duplicates_wait_until_their_deadline(file_session_factory):
+    """Test that a duplicate waiting on the request in flight gives up at its
+    deadline, while that request goes on."""
+    started, release = threading.Event(), threading.Event()
+
+    def execute():
+        started.set()
+        release.wait(5)
+        return 201, b"created"
+
+    results = []
+    first = threading.Thread(
+        target=lambda: results.append(
+            IdempotencyService(file_session_factory()).run(
+                "key-9", FINGERPRINT, execute
+            )
+        )
+    )
+    first.start()
+    started.wait(5)
+    try:
+        with deadline(0.05), pytest.raises(DeadlineExceededError):
+            IdempotencyService(file_session_factory()).run(
+                "key-9", FINGERPRINT, Counter()
+            )
+    finally:
+        release.set()
+        first.join(5)
+    assert results == [((201, b"created"), False)]
@@ -0,0 +1,187 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.job import Job
+from app.schemas.job import JobCreate, JobStatus
+from app.services.job_runner import JobRunner, register_job_handler
+
+calls = []
+release = threading.Event()
+
+
+@register_job_handler("test.succeed")
+def succeed(context, payload):
+    context.report_progress(0.5)
+    calls.append(("succeed", context.attempt))
+    return {"echo": payload.get("value")}
+
+
+@register_job_handler("test.flaky")
+def flaky(context, payload):
+    calls.append(("flaky", context.attempt))
+    if context.attempt < 2:
+        raise RuntimeError("temporary failure")
+    return "ok"
+
+
+@register_job_handler("test.wait")
+def wait(context, payload):
+    while not release.wait(0.01):
+        context.report_progress(0.1)
+    return "released"
+
+
+@pytest.fixture
+def runner(file_session_factory, monkeypatch):
+    """Fixture that provides a started JobRunner on a temporary database."""
+    monkeypatch.setattr("app.core.config.settings.JOB_RETRY_DELAY_SECONDS", 0.01)
+    calls.clear()
+    release.clear()
+    runner = JobRunner(session_factory=file_session_factory, workers=2)
+    runner.start()
+    yield runner
+    release.set()
+    runner.stop()
+
+
+def wait_for_status(session_factory, job_id, expected, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        db = session_factory()
+        job = db.get(Job, job_id)
+        db.close()
+        if job.status == expected.value:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} is {job.status}, expected {expected.value}")
+
+
+def test_run_job(runner, file_session_factory):
+    """
+    Test running a submitted job:
+    - The handler gets the payload
+    - The job ends succeeded with its result and full progress
+    """
+    db = file_session_factory()
+    job = runner.submit(db, JobCreate(type="test.succeed", payload={"value": 7}))
+    db.close()
+
+    job = wait_for_status(file_session_factory, job.id, JobStatus.SUCCEEDED)
+    assert job.result == {"echo": 7}
+    assert job.progress == 1.0
+    assert job.attempts == 1
+    assert job.finished_at is not None
+
+
+def test_retry_failed_job(runner, file_session_factory):
+    """Test that a failing job is retried until it succeeds."""
+    db = file_session_factory()
+    job = runner.submit(db, JobCreate(type="test.flaky", max_attempts=3))
+    db.close()
+
+    job = wait_for_status(file_session_factory, job.id, JobStatus.SUCCEEDED)
+    assert job.attempts == 2
+    assert calls == [("flaky", 1), ("flaky", 2)]
+
+
+def test_fail_after_max_attempts(runner, file_session_factory):
+    """Test that a job failing on its last attempt is marked failed."""
+    db = file_session_factory()
+    job = runner.submit(db, JobCreate(type="test.flaky", max_attempts=1))
+    db.close()
+
+    job = wait_for_status(file_session_factory, job.id, JobStatus.FAILED)
+    assert "temporary failure" in job.error
+
+
+def test_retry_backoff_survives_rescans(runner, file_session_factory, monkeypatch):
+    """
+    Test that a retried job waits for its backoff:
+    - Rescans (e.g. from the heartbeat) do not run it early
+    - It runs once due
+    """
+    monkeypatch.setattr("app.core.config.settings.JOB_RETRY_DELAY_SECONDS", 0.5)
+    db = file_session_factory()
+    job = runner.submit(db, JobCreate(type="test.flaky", max_attempts=3))
+    db.close()
+
+    while not calls:
+        time.sleep(0.01)
+    queued = wait_for_status(file_session_factory, job.id, JobStatus.QUEUED)
+    assert queued.not_before is not None
+    runner._rescan(requeue_stale=True)
+    time.sleep(0.1)
+    assert calls == [("flaky", 1)]
+
+    job = wait_for_status(file_session_factory, job.id, JobStatus.SUCCEEDED)
+    assert calls == [("flaky", 1), ("flaky", 2)]
+
+
+def test_cancel_running_job(runner, file_session_factory):
+    """Test that a running job stops at its next progress report when cancelled."""
+    db = file_session_factory()
+    job = runner.submit(db, JobCreate(type="test.wait"))
+    wait_for_status(file_session_factory, job.id, JobStatus.RUNNING)
+
+    cancelled = runner.cancel(db, job.id)
+    db.close()
+    assert cancelled.cancel_requested is True
+    wait_for_status(file_session_factory, job.id, JobStatus.CANCELLED)
+
+
+def test_cancel_queued_job(file_session_factory):
+    """Test that a queued job is cancelled right away and never runs."""
+    runner = JobRunner(session_factory=file_session_factory)
+    db = file_session_factory()
+    job = runner.submit(db, JobCreate(type="test.succeed"))
+    assert runner.cancel(db, job.id).status == JobStatus.CANCELLED.value
+    assert runner.cancel(db, 999) is None
+    db.close()
+
+
+def test_resume_jobs_on_start(file_session_factory, monkeypatch):
+    """
+    Test that starting a runner resumes:
+    - Jobs queued while no runner was started
+    - Jobs left running by a runner that stopped sending heartbeats
+    """
+    monkeypatch.setattr("app.core.config.settings.JOB_STALE_SECONDS", 60)
+    db = file_session_factory()
+    queued_id = (
+        JobRunner(session_factory=file_session_factory)
+        .submit(db, JobCreate(type="test.succeed"))
+        .id
+    )
+    stale = Job(
+        type="test.succeed",
+        status=JobStatus.RUNNING.value,
+        attempts=1,
+        max_attempts=3,
+        heartbeat_at=datetime.now(timezone.utc) - timedelta(minutes=5),
+    )
+    db.add(stale)
+    db.commit()
+    stale_id = stale.id
+    db.close()
+
+    runner = JobRunner(session_factory=file_session_factory)
+    runner.start()
+    try:
+        wait_for_status(file_session_factory, queued_id, JobStatus.SUCCEEDED)
+        job = wait_for_status(file_session_factory, stale_id, JobStatus.SUCCEEDED)
+        assert job.attempts == 2
+    finally:
+        runner.stop()
+
+
+def test_submit_unknown_job_type(file_session_factory):
+    """Test that submitting an unregistered job type is rejected."""
+    db = file_session_factory()
+    with pytest.raises(ValueError, match="Unknown job type"):
+        JobRunner(session_factory=file_session_factory).submit(
+            db, JobCreate(type="test.unknown")
+        )
+    db.close()
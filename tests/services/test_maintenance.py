@@ -0,0 +1,153 @@
+import threading
+from datetime import datetime, time, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.core.metrics import metrics
+from app.services.maintenance import (
+    MaintenanceInProgressError,
+    MaintenanceScheduler,
+    in_window,
+    maintain_database,
+    parse_window,
+)
+
+
+@pytest.fixture
+def vacuum_engine(file_engine):
+    """Fixture that provides a database in incremental auto_vacuum mode with
+    free pages left behind by deleted rows."""
+    with file_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+    with file_engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO users (name, email) VALUES (:name, :email)"),
+            [{"name": "x" * 200, "email": f"user{i}@example.com"} for i in range(2000)],
+        )
+        conn.execute(text("DELETE FROM users WHERE id > 100"))
+    return file_engine
+
+
+def test_parse_window():
+    """Test parsing maintenance windows, including invalid ones."""
+    assert parse_window(None) is None
+    assert parse_window("02:00-05:30") == (time(2, 0), time(5, 30))
+    with pytest.raises(ValueError, match="HH:MM-HH:MM"):
+        parse_window("2am")
+
+
+@pytest.mark.parametrize(
+    "now,expected",
+    [(time(1, 0), False), (time(2, 0), True), (time(4, 59), True), (time(5), False)],
+)
+def test_in_window(now, expected):
+    """Test that the window includes its start and excludes its end."""
+    assert in_window(now, (time(2), time(5))) is expected
+
+
+def test_in_window_across_midnight():
+    """Test windows spanning midnight, and the absence of a window."""
+    window = (time(23), time(2))
+    assert in_window(time(23, 30), window)
+    assert in_window(time(1), window)
+    assert not in_window(time(12), window)
+    assert in_window(time(12), None)
+
+
+def test_maintain_database(vacuum_engine):
+    """
+    Test a maintenance pass:
+    - Reclaims the free pages, shrinking the file
+    - Refreshes the planner statistics
+    """
+    result = maintain_database(vacuum_engine, vacuum_pages=0)
+
+    assert result.freelist_pages_before > 0
+    assert result.freelist_pages_after == 0
+    assert result.vacuumed_pages == result.freelist_pages_before
+    assert result.file_size_after < result.file_size_before
+    assert not result.wal_checkpointed
+    with vacuum_engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM sqlite_stat1")).scalar() > 0
+
+
+def test_maintain_database_limits_vacuum(vacuum_engine):
+    """Test that only the configured number of pages is reclaimed per pass."""
+    result = maintain_database(vacuum_engine, vacuum_pages=5)
+    assert result.freelist_pages_after > 0
+    assert result.freelist_pages_before - result.freelist_pages_after <= 10
+
+
+def test_maintain_database_compacts_changes(vacuum_engine):
+    """Test that changes older than the cutoff are dropped, except the latest."""
+    result = maintain_database(
+        vacuum_engine, vacuum_pages=0, compact_before=datetime(2000, 1, 1)
+    )
+    assert result.compacted_changes == 0
+
+    result = maintain_database(
+        vacuum_engine,
+        vacuum_pages=0,
+        compact_before=datetime.now(timezone.utc) + timedelta(hours=1),
+    )
+    assert result.compacted_changes == 2000 + 1900 - 1
+    with vacuum_engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM user_changes")).scalar() == 1
+
+
+def test_scheduler_run(vacuum_engine):
+    """Test a manual run, its report and metrics, and concurrent runs."""
+    scheduler = MaintenanceScheduler(engines=lambda: [("test", vacuum_engine)])
+    runs = metrics.get("maintenance.runs")
+
+    report = scheduler.run()
+
+    assert scheduler.last_report is report
+    assert [db.database for db in report.databases] == [vacuum_engine.url.database]
+    assert metrics.get("maintenance.runs") == runs + 1
+    assert metrics.get("maintenance.test.freelist_pages") == 0
+    assert metrics.get("maintenance.test.file_size_bytes") == (
+        report.databases[0].file_size_after
+    )
+
+    started, release = threading.Event(), threading.Event()
+
+    def slow_engines():
+        started.set()
+        release.wait(5)
+        return []
+
+    scheduler.engines = slow_engines
+    thread = threading.Thread(target=scheduler.run)
+    thread.start()
+    started.wait(5)
+    try:
+        with pytest.raises(MaintenanceInProgressError):
+            scheduler.run()
+    finally:
+        release.set()
+        thread.join(5)
+
+
+def test_scheduler_runs_periodically(vacuum_engine):
+    """Test that the started scheduler runs maintenance on its own."""
+    done = threading.Event()
+    scheduler = MaintenanceScheduler(
+        engines=lambda: [("test", vacuum_engine)], interval=0.01
+    )
+    original_run = scheduler._run
+
+    def run():
+        report = original_run()
+        done.set()
+        return report
+
+    scheduler._run = run
+    scheduler.start()
+    try:
+        assert done.wait(5)
+    finally:
+        scheduler.stop()
+    assert scheduler.last_report.databases[0].freelist_pages_after == 0
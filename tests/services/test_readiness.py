@@ -0,0 +1,107 @@
+import time
+
+from sqlalchemy import create_engine, text
+
+from app.core.metrics import metrics
+from app.services.readiness import ReadinessProber, migration_heads
+
+
+def stamp_head(engine):
+    """Record the migration head as applied, as ``alembic stamp head`` would."""
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32))"))
+        for head in migration_heads():
+            conn.execute(text("INSERT INTO alembic_version VALUES (:v)"), {"v": head})
+
+
+def test_ready_when_all_checks_pass(file_engine):
+    """Test that an up to date, reachable database with free disk is ready."""
+    stamp_head(file_engine)
+    prober = ReadinessProber(lambda: [("main", file_engine)], min_free_disk_mb=0)
+
+    report = prober.report()
+
+    assert report.status == "ready"
+    assert [check.name for check in report.checks] == [
+        "main.database",
+        "main.pool",
+        "main.migrations",
+        "main.disk",
+    ]
+    assert all(check.ok for check in report.checks)
+    assert metrics.get("readiness.ready") == 1
+
+
+def test_degraded_checks(file_engine):
+    """
+    Test that the report is degraded:
+    - When migrations are not applied up to the head
+    - When the disk is short of space
+    - When a database is unreachable, without hiding the other checks
+    """
+    unreachable = create_engine("sqlite:////nonexistent/dir/test.db")
+    prober = ReadinessProber(
+        lambda: [("main", file_engine), ("shard0", unreachable)],
+        min_free_disk_mb=10**12,
+    )
+
+    report = prober.report()
+    checks = {check.name: check for check in report.checks}
+
+    assert report.status == "degraded"
+    assert not checks["main.migrations"].ok
+    assert checks["main.migrations"].detail.startswith("none, head is")
+    assert not checks["main.disk"].ok
+    assert checks["main.database"].ok
+    assert not checks["shard0.database"].ok
+    assert metrics.get("readiness.ready") == 0
+
+
+def test_pool_saturation(file_engine):
+    """Test that a pool with most connections checked out is degraded."""
+    stamp_head(file_engine)
+    prober = ReadinessProber(
+        lambda: [("main", file_engine)], min_free_disk_mb=0, max_pool_usage=0.05
+    )
+    with file_engine.connect():
+        report = prober.report()
+    pool = next(check for check in report.checks if check.name == "main.pool")
+    assert not pool.ok
+    assert pool.detail == "1/15 in use"
+
+
+def test_report_is_served_from_cache(file_engine):
+    """
+    Test that reports reuse the last probe:
+    - Without probing again within the interval
+    - Probing again on demand once it is older, when the prober is not running
+    - Flagging a running prober that stopped probing
+    """
+    stamp_head(file_engine)
+    prober = ReadinessProber(
+        lambda: [("main", file_engine)], interval=60, min_free_disk_mb=0
+    )
+    probes = metrics.get("readiness.probes")
+
+    first = prober.report()
+    second = prober.report()
+    assert metrics.get("readiness.probes") == probes + 1
+    assert second.checked_at == first.checked_at
+    assert second.age_seconds >= first.age_seconds
+
+    prober._checked -= 61
+    assert prober.report().age_seconds < 1
+    assert metrics.get("readiness.probes") == probes + 2
+
+    prober.start()
+    try:
+        deadline = time.monotonic() + 5
+        while metrics.get("readiness.probes") < probes + 3:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        prober._checked -= 181
+        report = prober.report()
+    finally:
+        prober.stop()
+    assert report.status == "degraded"
+    assert report.checks[-1].name == "prober"
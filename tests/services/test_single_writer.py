@@ -0,0 +1,165 @@
+import threading
+import time
+import uuid
+
+import pytest
+
+from app.core.metrics import metrics
+from app.models.user import User as UserModel
+from app.repositories.user_repository import UserRepository
+from app.schemas.user import UserCreate, UserFilter, UserUpdate
+from app.services.single_writer import SingleWriter, WriteQueueFullError
+from app.services.user_service import UserService
+
+
+def unique_email():
+    return f"test_{uuid.uuid4()}@example.com"
+
+
+@pytest.fixture
+def writer(file_engine):
+    """Fixture that provides a SingleWriter on a temporary database."""
+    writer = SingleWriter(engine=file_engine)
+    yield writer
+    writer.stop()
+
+
+def test_run_on_writer_thread(writer):
+    """Test that operations run on the writer thread and return detached objects."""
+    threads = []
+
+    def create(db):
+        threads.append(threading.current_thread().name)
+        return UserRepository(db).create(UserCreate(name="User", email=unique_email()))
+
+    user = writer.run(create)
+    other = writer.run(create)
+
+    assert threads == ["single-writer", "single-writer"]
+    assert user.id is not None and other.id == user.id + 1
+    assert user.name == "User"
+    assert metrics.get("single_writer.wait_seconds.count") >= 2
+
+
+def test_run_error_rolls_back(writer, file_session_factory):
+    """Test that a failing operation is rolled back and the writer keeps going."""
+    email = unique_email()
+
+    def fail(db):
+        db.add(UserModel(name="User", email=email))
+        db.flush()
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        writer.run(fail)
+    user = writer.run(
+        lambda db: UserRepository(db).create(UserCreate(name="User", email=email))
+    )
+
+    db = file_session_factory()
+    assert UserRepository(db).get_by_email(email).id == user.id
+    db.close()
+
+
+def test_run_rejects_when_queue_full(file_engine):
+    """Test that writes are shed once the queue stays full for the timeout."""
+    writer = SingleWriter(engine=file_engine, max_queue_size=1, timeout=0.05)
+    started, release = threading.Event(), threading.Event()
+
+    def block(db):
+        started.set()
+        release.wait(5)
+
+    blocker = threading.Thread(target=writer.run, args=(block,))
+    blocker.start()
+    started.wait(5)
+    queued = threading.Thread(target=writer.run, args=(lambda db: None,))
+    queued.start()
+    while writer.stats()["single_writer.queue_depth"] < 1:
+        time.sleep(0.01)
+    rejected = metrics.get("single_writer.rejected")
+
+    try:
+        with pytest.raises(WriteQueueFullError) as exc_info:
+            writer.run(lambda db: None)
+        assert exc_info.value.retry_after == 0.05
+        assert metrics.get("single_writer.rejected") == rejected + 1
+    finally:
+        release.set()
+        blocker.join(5)
+        queued.join(5)
+        writer.stop()
+
+
+def test_service_writes_through_writer(writer, file_session_factory):
+    """Test that UserService runs its writes on the writer, reads on its session."""
+    db = file_session_factory()
+    service = UserService(db=db, writer=writer)
+
+    user = service.create_user(UserCreate(name="User", email=unique_email()))
+    assert service.update_user(user.id, UserUpdate(name="Renamed")).name == "Renamed"
+    assert service.get_user(user.id).name == "Renamed"
+    result = service.bulk_delete_users(UserFilter(ids=[user.id]), return_ids=True)
+    assert result.ids == [user.id]
+    assert service.delete_user(user.id) is False
+    db.close()
+
+
+def test_connection_failure_fails_writes_and_restarts(file_engine, monkeypatch):
+    """
+    Test that when the writer thread cannot connect:
+    - Queued writes fail with the connection error instead of hanging
+    - The next write starts a new writer thread
+    """
+    writer = SingleWriter(engine=file_engine)
+    connect = file_engine.connect
+
+    def fail_to_connect():
+        raise OSError("unable to open database file")
+
+    monkeypatch.setattr(file_engine, "connect", fail_to_connect)
+    try:
+        with pytest.raises(OSError, match="unable to open"):
+            writer.run(lambda db: None)
+        monkeypatch.setattr(file_engine, "connect", connect)
+        assert writer.run(lambda db: "written") == "written"
+    finally:
+        writer.stop()
+
+
+def test_result_timeout(file_engine):
+    """Test that callers stop waiting for writes still queued after the timeout."""
+    writer = SingleWriter(engine=file_engine)
+    started, release = threading.Event(), threading.Event()
+    ran = []
+
+    def block(db):
+        started.set()
+        release.wait(5)
+
+    blocker = threading.Thread(target=writer.run, args=(block,), daemon=True)
+    blocker.start()
+    started.wait(5)
+    writer.result_timeout = 0.05
+    try:
+        with pytest.raises(WriteQueueFullError):
+            writer.run(lambda db: ran.append(1))
+    finally:
+        release.set()
+        blocker.join(5)
+        writer.stop()
+    assert ran == []  # Cancelled, never run
+
+
+def test_open_transaction_is_ended(writer, file_session_factory):
+    """Test that a write lock left by an operation is released after it."""
+
+    def update_without_commit(db):
+        db.execute(UserModel.__table__.update().values(name="Uncommitted"))
+        return "done"
+
+    assert writer.run(update_without_commit) == "done"
+    db = file_session_factory()
+    db.connection().exec_driver_sql("PRAGMA busy_timeout = 100")
+    UserRepository(db).create(UserCreate(name="User", email=unique_email()))
+    db.close()
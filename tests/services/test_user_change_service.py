@@ -0,0 +1,89 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.user_change import UserChange
+from app.repositories.user_change_repository import UserChangeRepository
+from app.repositories.user_repository import UserRepository
+from app.schemas.user import UserChangeOperation, UserCreate, UserUpdate
+from app.services.user_change_service import ResyncRequiredError, UserChangeService
+
+
+def unique_email():
+    return f"test_{uuid.uuid4()}@example.com"
+
+
+@pytest.fixture
+def change_service(db_session):
+    """Fixture that provides a UserChangeService instance."""
+    return UserChangeService(db=db_session)
+
+
+def test_changes_are_logged_in_order(db_session, change_service):
+    """
+    Test that creates, updates and deletes are logged with the user's state
+    after the change, in order, after the cursor taken beforehand
+    """
+    since = change_service.get_changes(None, 10).next_since
+    users = UserRepository(db_session)
+    user = users.create(UserCreate(name="Before", email=unique_email()))
+    users.update(user.id, UserUpdate(name="After"))
+    users.delete(user.id)
+
+    page = change_service.get_changes(since, 10)
+
+    assert [c.operation for c in page.changes] == [
+        UserChangeOperation.CREATE,
+        UserChangeOperation.UPDATE,
+        UserChangeOperation.DELETE,
+    ]
+    assert {c.user_id for c in page.changes} == {user.id}
+    assert page.changes[1].user.name == "After"
+    assert page.changes[1].user.email == user.email
+    assert page.changes[2].user is None
+    assert page.next_since == page.changes[-1].seq == since + 3
+    assert not page.has_more
+    assert change_service.get_changes(page.next_since, 10).changes == []
+
+
+def test_changes_paging(db_session, change_service):
+    """Test that pages follow each other through the returned cursor."""
+    since = change_service.get_changes(None, 10).next_since
+    users = UserRepository(db_session)
+    for i in range(5):
+        users.create(UserCreate(name=f"User {i}", email=unique_email()))
+
+    first = change_service.get_changes(since, 3)
+    second = change_service.get_changes(first.next_since, 3)
+
+    assert first.has_more and not second.has_more
+    assert [c.seq for c in first.changes + second.changes] == list(
+        range(since + 1, since + 6)
+    )
+
+
+def test_compaction_requires_resync(db_session, change_service):
+    """
+    Test that compaction:
+    - Drops the old changes but always keeps the latest one
+    - Makes older cursors (and unknown ones) fail with ResyncRequiredError
+    """
+    since = change_service.get_changes(None, 10).next_since
+    users = UserRepository(db_session)
+    for i in range(3):
+        users.create(UserCreate(name=f"User {i}", email=unique_email()))
+    db_session.query(UserChange).update({UserChange.changed_at: datetime(2020, 1, 1)})
+
+    compacted = UserChangeRepository(db_session).compact(
+        datetime.now(timezone.utc) - timedelta(hours=1)
+    )
+
+    assert compacted >= 2
+    latest = since + 3
+    assert UserChangeRepository(db_session).bounds() == (latest, latest)
+    assert change_service.get_changes(latest - 1, 10).changes[0].seq == latest
+    with pytest.raises(ResyncRequiredError):
+        change_service.get_changes(latest - 2, 10)
+    with pytest.raises(ResyncRequiredError):
+        change_service.get_changes(latest + 1, 10)
@@ -0,0 +1,126 @@
+import csv
+import io
+import json
+import uuid
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.db import Base, get_engine
+from app.models.user import User
+from app.repositories.sharded_user_repository import ShardedUserRepository
+from app.schemas.user import ImportFormat
+from app.services.user_import_service import UserImportService
+
+
+def unique_email():
+    return f"test_{uuid.uuid4()}@example.com"
+
+
+@pytest.fixture
+def import_service(db_session):
+    """Fixture that provides a UserImportService with a small chunk size."""
+    return UserImportService(db=db_session, chunk_size=2)
+
+
+def read_report(path):
+    with open(path, newline="", encoding="utf-8") as report:
+        return list(csv.DictReader(report))
+
+
+def test_import_csv(import_service, db_session, tmp_path):
+    """
+    Test importing a CSV file spanning several chunks:
+    - Valid rows are inserted
+    - No error report is written when every row succeeds
+    """
+    emails = [unique_email() for _ in range(5)]
+    content = "\ufeffname,email\n" + "".join(f"User,{e}\n" for e in emails)
+
+    result = import_service.import_users(
+        io.BytesIO(content.encode()), ImportFormat.CSV, report_dir=str(tmp_path)
+    )
+
+    assert (result.total_rows, result.imported, result.failed) == (5, 5, 0)
+    assert result.error_report is None
+    assert db_session.query(User).filter(User.email.in_(emails)).count() == 5
+
+
+def test_import_ndjson_reports_failed_rows(import_service, db_session, tmp_path):
+    """
+    Test importing an NDJSON file with bad rows:
+    - Invalid JSON, invalid emails and duplicates are reported per line
+    - The remaining rows are imported
+    """
+    email = unique_email()
+    db_session.add(User(name="Existing", email=email))
+    db_session.commit()
+    new_email = unique_email()
+    lines = [
+        json.dumps({"name": "A", "email": new_email}),
+        "{not json",
+        "",
+        json.dumps({"name": "B", "email": "not-an-email"}),
+        json.dumps({"name": "C", "email": email}),
+        json.dumps({"name": "D", "email": new_email}),
+        json.dumps(["not", "an", "object"]),
+    ]
+
+    result = import_service.import_users(
+        io.BytesIO("\n".join(lines).encode()),
+        ImportFormat.NDJSON,
+        report_dir=str(tmp_path),
+    )
+
+    assert (result.total_rows, result.imported, result.failed) == (6, 1, 5)
+    report = read_report(result.error_report)
+    assert [row["line"] for row in report] == ["2", "4", "5", "6", "7"]
+    assert "Invalid JSON" in report[0]["error"]
+    assert report[1]["error"].startswith("email:")
+    assert "already registered" in report[2]["error"]
+    assert "already registered" in report[3]["error"]
+
+
+def test_import_reports_rows_of_uncommitted_shards(tmp_path, monkeypatch):
+    """
+    Test that when a chunk commits in some shards only, the rows of the other
+    shards are reported as failed and the rest counted as imported.
+    """
+    urls = [f"sqlite:///{tmp_path / f'shard{i}.db'}" for i in range(2)]
+    for url in urls:
+        Base.metadata.create_all(bind=get_engine(url))
+    repository = ShardedUserRepository(urls)
+    emails = [unique_email() for _ in range(6)]
+    while len({repository.shard_for_email(e) for e in emails}) < 2:
+        emails = [unique_email() for _ in range(6)]
+    content = "name,email\n" + "".join(f"User,{e}\n" for e in emails)
+    commit = Session.commit
+    commits = []
+
+    def commit_first_shard_only(self):
+        if commits:
+            raise OperationalError("COMMIT", {}, Exception("disk I/O error"))
+        commit(self)
+        commits.append(self)
+
+    monkeypatch.setattr(Session, "commit", commit_first_shard_only)
+    service = UserImportService(repository=repository, chunk_size=10)
+
+    try:
+        result = service.import_users(
+            io.BytesIO(content.encode()), ImportFormat.CSV, report_dir=str(tmp_path)
+        )
+    finally:
+        monkeypatch.undo()
+        for url in urls:
+            get_engine(url).dispose()
+
+    first = repository.shard_for_email(emails[0])
+    committed = [e for e in emails if repository.shard_for_email(e) == first]
+    assert (result.total_rows, result.imported) == (6, len(committed))
+    report = read_report(result.error_report)
+    assert sorted(row["email"] for row in report) == sorted(
+        set(emails) - set(committed)
+    )
+    assert all("Commit failed" in row["error"] for row in report)
@@ -1,11 +1,17 @@
+import asyncio
+import json
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+from app.core.broadcast import Broadcaster
+from app.core.metrics import metrics
 from app.repositories.user_repository import UserRepository
-from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.user import User, UserCreate, UserUpdate
 from app.services.user_service import UserService
 
 
@@ -181,3 +187,72 @@ def test_user_service_operations(db_session):
 
     # Clean up
     service.delete_user(user.id)
+
+
+def test_get_user_coalesces_concurrent_lookups(db_session, test_user, monkeypatch):
+    """
+    Test that concurrent lookups for the same user share one repository call
+    and return a schema detached from the session that loaded it.
+    """
+    service = UserService(db=db_session)
+    release = threading.Event()
+    original_get = service.repository.get
+    calls = []
+
+    def slow_get(*args, **kwargs):
+        calls.append(1)
+        release.wait(timeout=5)
+        return original_get(*args, **kwargs)
+
+    monkeypatch.setattr(service.repository, "get", slow_get)
+    coalesced = metrics.get("singleflight.user_lookup.coalesced")
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(service.get_user, test_user.id) for _ in range(3)]
+        while metrics.get("singleflight.user_lookup.coalesced") < coalesced + 2:
+            threading.Event().wait(0.01)
+        release.set()
+        users = [f.result(timeout=5) for f in futures]
+
+    assert len(calls) == 1
+    assert all(isinstance(u, User) and u.id == test_user.id for u in users)
+
+
+def test_get_user_without_coalescing(db_session, test_user):
+    """Test that lookups go straight to the repository when coalescing is off."""
+    service = UserService(db=db_session, coalesce_lookups=False)
+    user = service.get_user(test_user.id)
+    assert user is test_user
+
+
+def test_get_user_by_email(user_service, test_user):
+    """Test getting a user by email, whole or restricted to some fields."""
+    assert user_service.get_user_by_email(test_user.email).id == test_user.id
+    row = user_service.get_user_by_email(test_user.email, fields=["id"])
+    assert row.id == test_user.id
+    assert user_service.get_user_by_email(unique_email()) is None
+
+
+def test_writes_are_published(db_session):
+    """Test that committed creates, updates and deletes are published."""
+    events = Broadcaster("test_user_events")
+    service = UserService(db=db_session, events=events)
+
+    async def main():
+        subscription = events.subscribe()
+        user = service.create_user(UserCreate(name="Test", email=unique_email()))
+        service.update_user(user.id, UserUpdate(name="Renamed"))
+        service.delete_user(user.id)
+        service.delete_user(user.id)  # Nothing deleted, nothing published
+        received = [await subscription.get(timeout=1) for _ in range(3)]
+        assert await subscription.get(timeout=0.01) is None
+        return user, received
+
+    user, received = asyncio.run(main())
+    assert [e.type for e in received] == [
+        "user.created",
+        "user.updated",
+        "user.deleted",
+    ]
+    assert User.model_validate_json(received[1].data).name == "Renamed"
+    assert json.loads(received[2].data) == {"id": user.id}
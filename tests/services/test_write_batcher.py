@@ -0,0 +1,133 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.core.metrics import metrics
+from app.models.user import User as UserModel
+from app.schemas.user import User, UserCreate, UserUpdate
+from app.services.user_service import UserService
+from app.services.write_batcher import WriteBatcher
+
+
+def unique_email():
+    return f"test_{uuid.uuid4()}@example.com"
+
+
+@pytest.fixture
+def batcher(file_session_factory):
+    """Fixture that provides a WriteBatcher with a generous batching window."""
+    batcher = WriteBatcher(session_factory=file_session_factory, window_ms=200)
+    yield batcher
+    batcher.stop()
+
+
+def test_concurrent_creates_share_one_commit(batcher, file_session_factory):
+    """
+    Test that concurrent creates:
+    - Are committed together in a single transaction
+    - Each get their own created user back
+    - Fail individually on duplicate emails
+    """
+    taken = unique_email()
+    db = file_session_factory()
+    db.add(UserModel(name="Existing", email=taken))
+    db.commit()
+    db.close()
+    commits = metrics.get("write_batcher.commits")
+    emails = [unique_email() for _ in range(4)] + [taken]
+    barrier = threading.Barrier(len(emails))
+
+    def create(email):
+        barrier.wait()
+        return batcher.create(UserCreate(name="User", email=email))
+
+    with ThreadPoolExecutor(max_workers=len(emails)) as pool:
+        futures = [pool.submit(create, email) for email in emails]
+        created = [f.result(timeout=5) for f in futures[:-1]]
+        with pytest.raises(ValueError, match="already registered"):
+            futures[-1].result(timeout=5)
+
+    assert metrics.get("write_batcher.commits") == commits + 1
+    assert all(isinstance(user, User) for user in created)
+    assert sorted(user.email for user in created) == sorted(emails[:-1])
+    assert len({user.id for user in created}) == 4
+
+
+def test_update_through_batcher(batcher, file_session_factory):
+    """Test updating users through the batcher, including missing users."""
+    user = batcher.create(UserCreate(name="User", email=unique_email()))
+    other = batcher.create(UserCreate(name="Other", email=unique_email()))
+    db = file_session_factory()
+    created_updated_at = db.get(UserModel, user.id).updated_at
+    db.close()
+
+    updated = batcher.update(user.id, UserUpdate(name="Renamed"))
+    assert (updated.id, updated.name, updated.email) == (user.id, "Renamed", user.email)
+    assert batcher.update(999, UserUpdate(name="Nobody")) is None
+    with pytest.raises(ValueError, match="already registered"):
+        batcher.update(user.id, UserUpdate(email=other.email))
+
+    db = file_session_factory()
+    stored = db.get(UserModel, user.id)
+    assert stored.name == "Renamed"
+    assert stored.updated_at > created_updated_at
+    db.close()
+
+
+def test_replay_batch_on_commit_conflict(batcher, file_session_factory, monkeypatch):
+    """
+    Test that a batch whose commit hits a unique constraint is replayed item
+    by item, so only the conflicting write fails.
+    """
+    email = unique_email()
+    original_apply = batcher._apply
+
+    def apply_after_concurrent_insert(db, batch):
+        # Simulate a writer outside the batcher registering the email meanwhile
+        if len(batch) > 1:
+            other = file_session_factory()
+            other.add(UserModel(name="Concurrent", email=email))
+            other.commit()
+            other.close()
+        return original_apply(db, batch)
+
+    monkeypatch.setattr(batcher, "_apply", apply_after_concurrent_insert)
+    barrier = threading.Barrier(2)
+
+    def create(email):
+        barrier.wait()
+        return batcher.create(UserCreate(name="User", email=email))
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        ok = pool.submit(create, unique_email())
+        conflict = pool.submit(create, email)
+        assert ok.result(timeout=5).id is not None
+        with pytest.raises(ValueError, match="already registered"):
+            conflict.result(timeout=5)
+
+
+def test_service_uses_write_batcher(db_session, batcher):
+    """Test that UserService routes writes through its write batcher."""
+    service = UserService(db=db_session, write_batcher=batcher)
+    user = service.create_user(UserCreate(name="User", email=unique_email()))
+    assert isinstance(user, User)
+    assert service.update_user(user.id, UserUpdate(name="Renamed")).name == "Renamed"
+
+
+def test_other_integrity_errors_pass_through(batcher, monkeypatch):
+    """Test that only email conflicts are reported as a registered email."""
+    error = IntegrityError(
+        "INSERT INTO users", {}, Exception("NOT NULL constraint failed: users.name")
+    )
+
+    def apply_failing(db, batch):
+        raise error
+
+    monkeypatch.setattr(batcher, "_apply", apply_failing)
+
+    with pytest.raises(IntegrityError) as info:
+        batcher.create(UserCreate(name="User", email=unique_email()))
+    assert info.value is error
@@ -0,0 +1,27 @@
+import uuid
+
+from app import cli
+from app.models.user import User
+
+
+def test_import_users_command(db_session, tmp_path, monkeypatch, capsys):
+    """
+    Test the import-users command:
+    - Imports the file and prints a summary
+    - Exits with a non-zero status when some rows failed
+    """
+    monkeypatch.setattr(cli, "SessionLocal", lambda: db_session)
+    email = f"test_{uuid.uuid4()}@example.com"
+    path = tmp_path / "users.ndjson"
+    path.write_text(
+        f'{{"name": "User", "email": "{email}"}}\n{{"name": "Bad"}}\n',
+        encoding="utf-8",
+    )
+
+    exit_code = cli.main(
+        ["import-users", str(path), "--report-dir", str(tmp_path / "reports")]
+    )
+
+    assert exit_code == 1
+    assert "Imported 1 of 2 rows (1 failed)" in capsys.readouterr().out
+    assert db_session.query(User).filter(User.email == email).count() == 1
@@ -1,7 +1,10 @@
+import os
+
+import pytest
 from sqlalchemy import text
 
 from app.core.config import settings
-from app.db import SessionLocal, engine
+from app.db import SessionLocal, engine, get_engine
 
 
 def test_database_connection(db_session):
@@ -49,3 +52,25 @@ def test_engine_configuration():
         assert engine.pool._dialect.name == "sqlite"
     else:
         assert engine.dialect.name != "sqlite"
+
+
+def test_engine_created_once_per_process():
+    """Test that the engine is shared within a process and recreated after fork."""
+    assert get_engine() is get_engine() is engine
+    if not hasattr(os, "fork"):
+        pytest.skip("os.fork is not available")
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # Child: must get its own engine
+        try:
+            child_engine = get_engine()
+            ok = child_engine is not engine and child_engine is get_engine()
+            os.write(write_fd, b"1" if ok else b"0")
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    os.waitpid(pid, 0)
+    assert os.read(read_fd, 1) == b"1"
+    os.close(read_fd)
+    assert get_engine() is engine
@@ -0,0 +1,64 @@
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from app.core.config import Settings, settings
+from app.db import get_db, get_engine
+from app.main import app, create_app
+
+
+def test_create_app_uses_given_settings():
+    """Test that the factory builds an independent app from the given settings."""
+    custom = Settings(PROJECT_NAME="Custom", API_V1_STR="/api/v2", JOBS_ENABLED=False)
+    custom_app = create_app(custom)
+
+    assert custom_app is not app
+    assert custom_app.title == "Custom"
+    assert custom_app.state.settings is custom
+    with TestClient(custom_app) as client:
+        response = client.get("/api/v2/system/health")
+        assert response.status_code == status.HTTP_200_OK
+        assert client.get("/api/v1/system/health").status_code == 404
+
+
+def test_routes_use_the_app_settings(db_session):
+    """Test that routes and the services they use read the app's settings."""
+    custom = Settings(
+        API_V1_STR="/v2",
+        VERSION="9.9.9",
+        USER_BATCH_MAX_SIZE=2,
+        ADMIN_API_TOKEN="secret",
+        JOBS_ENABLED=False,
+        MAINTENANCE_ENABLED=False,
+        READINESS_PROBE_ENABLED=False,
+        SETTINGS_RELOAD_ENABLED=False,
+    )
+    custom_app = create_app(custom)
+    custom_app.dependency_overrides[get_db] = lambda: db_session
+
+    with TestClient(custom_app) as client:
+        assert client.get("/v2/system/health").json()["version"] == "9.9.9"
+        response = client.get("/v2/users/", params={"ids": "1,2"})
+        assert response.status_code == status.HTTP_200_OK
+        response = client.get("/v2/users/", params={"ids": "1,2,3,4"})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        response = client.post("/v2/users/batch-get", json={"ids": [1, 2, 3]})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        response = client.post("/v2/admin/maintenance")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_create_app_configures_its_database(tmp_path):
+    """Test that each app created uses its own DATABASE_URL, also the default."""
+    other = f"sqlite:///{tmp_path / 'other.db'}"
+    try:
+        create_app(Settings(DATABASE_URL=other, JOBS_ENABLED=False))
+        assert str(get_engine().url) == other
+    finally:
+        create_app()
+    assert str(get_engine().url) == settings.DATABASE_URL
+
+
+def test_default_app_uses_global_settings():
+    """Test that the module level app is built from the global settings."""
+    assert app.title == settings.PROJECT_NAME
+    assert app.state.settings is settings